@@ -3,6 +3,9 @@ from django.db import models
 from django.utils.html import format_html
 
 from .models import *
+from .services.supplier_scoring import (
+    complaint_edit_increments, complaint_increments, complaint_removal_increments, record_event,
+)
 
 
 # ============================================================
@@ -207,6 +210,157 @@ class VisitorLogAdmin(admin.ModelAdmin):
     ordering = ("-visited_at",)
 
 
+# ============================================================
+# VISITOR ROLLUP ADMIN
+# ============================================================
+@admin.register(VisitorHourlyRollup, VisitorDailyRollup)
+class VisitorRollupAdmin(admin.ModelAdmin):
+    list_display = ("bucket_start", "path", "location", "views")
+    list_filter = ("bucket_start", "location")
+    search_fields = ("path", "location")
+    date_hierarchy = "bucket_start"
+    ordering = ("-bucket_start",)
+
+
+@admin.register(VisitorIpDailyRollup)
+class VisitorIpRollupAdmin(admin.ModelAdmin):
+    list_display = ("bucket_start", "ip_address", "views")
+    search_fields = ("ip_address",)
+    date_hierarchy = "bucket_start"
+    ordering = ("-bucket_start",)
+
+
+# ============================================================
+# KPI SNAPSHOT ADMIN
+# ============================================================
+@admin.register(KpiSnapshot)
+class KpiSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("group", "is_dirty", "version", "computed_at")
+    list_filter = ("is_dirty",)
+    readonly_fields = ("group", "data", "version", "computed_at")
+    ordering = ("group",)
+
+
+# ============================================================
+# LLM RESPONSE CACHE ADMIN
+# ============================================================
+@admin.register(LlmResponse)
+class LlmResponseAdmin(admin.ModelAdmin):
+    list_display = ("key", "model", "hits", "created_at", "last_used_at")
+    list_filter = ("model",)
+    readonly_fields = ("key", "model", "response", "hits", "created_at", "last_used_at")
+    ordering = ("-last_used_at",)
+
+
+# ============================================================
+# AI INSIGHT CLAIM ADMIN
+# ============================================================
+@admin.register(AiInsightClaim)
+class AiInsightClaimAdmin(admin.ModelAdmin):
+    list_display = ("snapshot_hash", "claimed_at")
+    readonly_fields = ("snapshot_hash", "claimed_at")
+    ordering = ("-claimed_at",)
+
+
+# ============================================================
+# EMAIL OUTBOX ADMIN
+# ============================================================
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("subject", "status", "attempts", "next_attempt_at", "created_at", "sent_at")
+    list_filter = ("status", "template_name")
+    search_fields = ("subject", "last_error")
+    readonly_fields = ("created_at", "sent_at", "last_error")
+    ordering = ("-created_at",)
+
+
+# ============================================================
+# NOTIFICATION EVENT ADMIN
+# ============================================================
+@admin.register(NotificationEvent)
+class NotificationEventAdmin(admin.ModelAdmin):
+    list_display = ("subject", "kind", "recipient", "created_at", "digested_at")
+    list_filter = ("kind", "recipient")
+    readonly_fields = ("created_at", "digested_at")
+    ordering = ("-created_at",)
+
+
+# ============================================================
+# SUPPLIER SCORE STATS ADMIN
+# ============================================================
+@admin.register(SupplierScoreStats)
+class SupplierScoreStatsAdmin(admin.ModelAdmin):
+    list_display = ("supplier", "deliveries", "complaints", "reviews", "sentiments", "updated_at")
+    search_fields = ("supplier__name",)
+    readonly_fields = ("updated_at",)
+    ordering = ("-updated_at",)
+
+
+# ============================================================
+# SCORE WEIGHT PROFILE ADMIN
+# ============================================================
+@admin.register(ScoreWeightProfile)
+class ScoreWeightProfileAdmin(admin.ModelAdmin):
+    list_display = ("name", "is_active", "weights", "created_at")
+    list_filter = ("is_active",)
+    search_fields = ("name", "description")
+    readonly_fields = ("created_at",)
+
+
+# ============================================================
+# ORDER SEQUENCE ADMIN
+# ============================================================
+@admin.register(OrderSequence)
+class OrderSequenceAdmin(admin.ModelAdmin):
+    list_display = ("year", "last_value")
+    ordering = ("-year",)
+
+
+# ============================================================
+# STOCK LEDGER ADMIN
+# ============================================================
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ("item", "quantity", "reason", "delivery", "created_at")
+    list_filter = ("reason", "created_at")
+    search_fields = ("item__sku", "item__name", "delivery__order_number")
+    raw_id_fields = ("item", "delivery")
+    date_hierarchy = "created_at"
+    ordering = ("-created_at",)
+
+    # The ledger is append-only: movements are written with their stock change
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+# ============================================================
+# DEMAND FORECAST ADMIN
+# ============================================================
+@admin.register(DemandForecast)
+class DemandForecastAdmin(admin.ModelAdmin):
+    list_display = (
+        "item", "method", "daily_demand", "lead_time_days", "recommended_reorder_level", "days_of_cover", "computed_at",
+    )
+    list_filter = ("method",)
+    search_fields = ("item__sku", "item__name")
+    raw_id_fields = ("item",)
+    ordering = ("days_of_cover",)
+
+
+# ============================================================
+# SUPPLIER DELAY HISTOGRAM ADMIN
+# ============================================================
+@admin.register(SupplierDelayBin)
+class SupplierDelayBinAdmin(admin.ModelAdmin):
+    list_display = ("supplier", "days", "deliveries")
+    search_fields = ("supplier__name",)
+    raw_id_fields = ("supplier",)
+    ordering = ("supplier", "days")
+
+
 # ============================================================
 # SCRAPED MARKET SOURCE ADMIN
 # ============================================================
@@ -487,6 +641,7 @@ class InventoryItemAdmin(admin.ModelAdmin):
         'category',
         'quantity_in_stock',
         'reorder_level',
+        'is_below_reorder',
         'unit_cost',
         'selling_price',
         'is_active',
@@ -496,6 +651,7 @@ class InventoryItemAdmin(admin.ModelAdmin):
         'category',
         'supplier',
         'is_active',
+        'is_below_reorder',
     )
 
     search_fields = (
@@ -524,6 +680,7 @@ class SupplierPerformanceScoreAdmin(admin.ModelAdmin):
         'consistency_score',
         'trust_index',
         'risk_index',
+        'lead_time_p90',
         'last_updated',
     )
 
@@ -657,6 +814,20 @@ class ComplaintAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
     readonly_fields = ('created_at',)
 
+    def save_model(self, request, obj, form, change):
+        old = Complaint.objects.get(pk=obj.pk) if change else None
+        super().save_model(request, obj, form, change)
+        # Keep the running score stats in step with severity, resolved and supplier edits
+        if old is None:
+            record_event(obj.supplier_id, complaint_increments(obj))
+        elif old.supplier_id != obj.supplier_id:
+            record_event(old.supplier_id, complaint_removal_increments(old))
+            record_event(obj.supplier_id, complaint_increments(obj))
+        else:
+            increments = complaint_edit_increments(old, obj)
+            if increments:
+                record_event(obj.supplier_id, increments)
+
 
 @admin.register(SupplierSentiment)
 class SupplierSentimentAdmin(admin.ModelAdmin):
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class AppConfig(AppConfig):
     name = 'app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .services.warmup import warm_up_in_background
+        warm_up_in_background()
@@ -0,0 +1,38 @@
+"""
+app/management/commands/backfill_visitor_rollups.py
+
+Usage:
+    python manage.py backfill_visitor_rollups                    # rebuild from all history
+    python manage.py backfill_visitor_rollups --since 2026-01-01 # rebuild from a date onwards
+
+Rollups for the affected days are deleted and recomputed from VisitorLog.
+Run it with VISITOR_LOG_MODE="off" (or during a quiet period) so visits
+logged mid-rebuild are not double counted.
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from app.services.visitor_rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild hourly, daily and per-IP visitor rollups from raw VisitorLog history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Only rebuild from this date (YYYY-MM-DD)")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = timezone.make_aware(datetime.strptime(options["since"], "%Y-%m-%d"))
+            except ValueError:
+                raise CommandError("--since must be a date in YYYY-MM-DD format")
+
+        self.stdout.write("Rebuilding visitor rollups...")
+        hourly, daily, visitors = rebuild_rollups(since=since, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"  ✓ {hourly} hourly rows, {daily} daily rows, {visitors} visitor rows"))
@@ -0,0 +1,61 @@
+"""
+app/management/commands/bench_ai_insights.py
+
+Usage:
+    python manage.py bench_ai_insights                        # 20 calls, fixture backend
+    python manage.py bench_ai_insights --latency 0.5          # fixture backend with simulated latency
+    python manage.py bench_ai_insights --backend settings     # whatever LLM_BACKEND points at
+
+Times get_ai_insights() on the current KPI snapshot with the response cache
+bypassed (every call reaches the backend) and with it enabled (first call
+fills the cache). Cache rows written by the benchmark are deleted afterwards.
+"""
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from app.management.commands.llm_stub_server import DEFAULT_REPLY
+from app.models import LlmResponse
+from app.services import llm
+from app.services.ai_insights import get_ai_insights
+from app.views import build_data_snapshot
+
+
+class Command(BaseCommand):
+    help = "Benchmark AI insight latency with and without the LLM response cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calls", type=int, default=20, help="Calls per mode")
+        parser.add_argument("--backend", choices=("fixture", "settings"), default="fixture")
+        parser.add_argument("--latency", type=float, default=0.0, help="Fixture backend delay in seconds")
+
+    def handle(self, *args, **options):
+        snapshot = build_data_snapshot()
+        backend = {"backend": "fixture", "reply": DEFAULT_REPLY, "latency": options["latency"]}
+        overrides = {} if options["backend"] == "settings" else {"LLM_BACKEND": backend}
+        existing = set(LlmResponse.objects.values_list("id", flat=True))
+
+        results = []
+        try:
+            for mode, enabled in (("uncached", False), ("cached", True)):
+                cache_options = {**llm._cache_options(), "enabled": enabled}
+                with override_settings(LLM_CACHE=cache_options, **overrides):
+                    timings = []
+                    for _ in range(options["calls"]):
+                        start = time.perf_counter()
+                        get_ai_insights(snapshot)
+                        timings.append((time.perf_counter() - start) * 1000)
+                results.append((mode, timings))
+        finally:
+            deleted, _ = LlmResponse.objects.exclude(id__in=existing).delete()
+
+        self.stdout.write(f"{'mode':<10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for mode, timings in results:
+            p95 = statistics.quantiles(timings, n=20, method="inclusive")[-1] if len(timings) > 1 else timings[0]
+            self.stdout.write(f"{mode:<10}{statistics.median(timings):>10.2f}{p95:>10.2f}{max(timings):>10.2f}")
+        for url, status in llm.circuit_status().items():
+            self.stdout.write(f"circuit {url}: {status['state']} ({status['failures']} consecutive failures)")
+        self.stdout.write(self.style.SUCCESS(f"Done — {deleted} benchmark cache rows cleaned up."))
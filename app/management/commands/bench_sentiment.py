@@ -0,0 +1,108 @@
+"""
+app/management/commands/bench_sentiment.py
+
+Usage:
+    python manage.py bench_sentiment                          # 1k, 10k and 100k texts
+    python manage.py bench_sentiment --sizes 1000 5000 --workers 4
+    python manage.py bench_sentiment --unique 0.1             # 10% unique texts, 90% boilerplate
+    python manage.py bench_sentiment --sizes 1000 --transformer /models/sst2 --max-length 128
+
+Measures texts/sec for one-at-a-time VADER scoring (the old inline path)
+against SentimentService.score_many on a cold cache, a warm cache and, with
+--workers > 1, a process pool. With --transformer, the local model's
+batched CPU inference is timed on the same texts (no cache), to judge
+whether blending it into bert_score is affordable. Texts mix repeated
+delivery/complaint boilerplate with unique sentences.
+"""
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.services.sentiment import SentimentService, TransformerScorer, _vader
+
+BOILERPLATE = [
+    "Delivered on time, all items in good condition.",
+    "Late delivery again, driver did not call ahead.",
+    "Packaging was damaged and two crates were missing.",
+    "Invoice did not match the order.",
+    "Great service, very professional team!",
+    "Products were fresh and well presented.",
+]
+WORDS = (
+    "fresh late damaged excellent poor delivery supplier order crate chicken "
+    "driver invoice quality terrible great slow quick missing cold warm price"
+).split()
+
+
+def _texts(n, unique_ratio, rng):
+    texts = []
+    for i in range(n):
+        if rng.random() < unique_ratio:
+            texts.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 16))) + f" #{i}")
+        else:
+            texts.append(rng.choice(BOILERPLATE))
+    return texts
+
+
+class Command(BaseCommand):
+    help = "Benchmark sentiment scoring throughput for single-text and batched paths"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+        parser.add_argument("--unique", type=float, default=0.3, help="Share of unique (non-boilerplate) texts")
+        parser.add_argument("--workers", type=int, default=1, help="Process-pool workers for the pool run")
+        parser.add_argument("--transformer", help="Local model directory to benchmark against VADER")
+        parser.add_argument("--max-length", type=int, default=256)
+        parser.add_argument("--transformer-batch", type=int, default=32)
+        parser.add_argument("--threads", type=int, default=None, help="torch threads (default: all cores)")
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        analyzer = _vader()
+
+        transformer = None
+        if options["transformer"]:
+            transformer = TransformerScorer(
+                options["transformer"], max_length=options["max_length"],
+                batch_size=options["transformer_batch"], threads=options["threads"],
+            )
+            if not transformer.available:
+                self.stderr.write("Transformer model could not be loaded; benchmarking VADER only.")
+                transformer = None
+
+        self.stdout.write(f"{'texts':>8}  {'mode':<12}{'texts/s':>12}{'seconds':>10}")
+        for n in options["sizes"]:
+            texts = _texts(n, options["unique"], rng)
+            runs = []
+
+            start = time.perf_counter()
+            for text in texts:
+                analyzer.polarity_scores(text)
+            runs.append(("single", time.perf_counter() - start))
+
+            service = SentimentService(cache_size=max(n, 1), workers=1)
+            start = time.perf_counter()
+            service.score_many(texts)
+            runs.append(("batch cold", time.perf_counter() - start))
+
+            start = time.perf_counter()
+            service.score_many(texts)
+            runs.append(("batch warm", time.perf_counter() - start))
+
+            if options["workers"] > 1:
+                pooled = SentimentService(cache_size=max(n, 1), workers=options["workers"], pool_threshold=1)
+                start = time.perf_counter()
+                pooled.score_many(texts)
+                runs.append((f"pool x{options['workers']}", time.perf_counter() - start))
+
+            if transformer is not None:
+                start = time.perf_counter()
+                transformer.score(texts)
+                runs.append(("transformer", time.perf_counter() - start))
+
+            for mode, elapsed in runs:
+                self.stdout.write(f"{n:>8}  {mode:<12}{n / elapsed:>12,.0f}{elapsed:>10.3f}")
+
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -0,0 +1,78 @@
+"""
+app/management/commands/bench_visitor_logging.py
+
+Usage:
+    python manage.py bench_visitor_logging                  # 2000 requests per mode
+    python manage.py bench_visitor_logging --requests 10000
+
+Measures requests/sec through VisitorLoggingMiddleware with logging off,
+synchronous (one INSERT per request) and buffered (background bulk_create).
+Rows written by the benchmark are deleted afterwards.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from app.middleware import VisitorLoggingMiddleware
+from app.models import VisitorDailyRollup, VisitorHourlyRollup, VisitorLog
+from app.services.visitor_log_buffer import VisitorLogBuffer
+
+BENCH_PATH = "/__bench__/visitor-logging/"
+
+
+def _ok(request):
+    return HttpResponse("ok")
+
+
+class Command(BaseCommand):
+    help = "Benchmark requests/sec with visitor logging off, sync and buffered"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000, help="Requests per mode")
+        parser.add_argument("--batch-size", type=int, default=500, help="Buffered mode batch size")
+
+    def handle(self, *args, **options):
+        n = options["requests"]
+        factory = RequestFactory()
+        requests = [
+            factory.get(f"{BENCH_PATH}{i % 50}", REMOTE_ADDR=f"10.0.{i % 200}.{i % 250 + 1}")
+            for i in range(n)
+        ]
+
+        results = []
+        try:
+            for mode in ("off", "sync", "buffered"):
+                with override_settings(VISITOR_LOG_MODE=mode):
+                    middleware = VisitorLoggingMiddleware(_ok)
+                if mode == "buffered":
+                    middleware.buffer = VisitorLogBuffer(
+                        max_size=n, batch_size=options["batch_size"], flush_interval=0.5
+                    )
+
+                start = time.perf_counter()
+                for request in requests:
+                    middleware(request)
+                elapsed = time.perf_counter() - start
+
+                drain = 0.0
+                if middleware.buffer is not None:
+                    drain_start = time.perf_counter()
+                    middleware.buffer.stop()
+                    drain = time.perf_counter() - drain_start
+
+                results.append((mode, elapsed, drain))
+        finally:
+            deleted, _ = VisitorLog.objects.filter(path__startswith=BENCH_PATH).delete()
+            VisitorHourlyRollup.objects.filter(path__startswith=BENCH_PATH).delete()
+            VisitorDailyRollup.objects.filter(path__startswith=BENCH_PATH).delete()
+
+        self.stdout.write(f"{'mode':<10}{'req/s':>12}{'ms/req':>10}{'drain s':>10}")
+        for mode, elapsed, drain in results:
+            self.stdout.write(
+                f"{mode:<10}{n / elapsed:>12,.0f}{elapsed / n * 1000:>10.3f}{drain:>10.2f}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Done — {deleted} benchmark rows cleaned up."))
@@ -0,0 +1,71 @@
+"""
+app/management/commands/import_csv.py
+
+Usage:
+    python manage.py import_csv deliveries exports/deliveries.csv
+    python manage.py import_csv orders exports/orders.csv --rejects orders_rejects.csv
+    python manage.py import_csv deliveries big.csv --chunk-size 20000 --no-rescore
+
+Streams an ERP export of orders or deliveries into the database in chunks:
+each chunk is validated column-wise, its good rows bulk-inserted in one
+transaction and, for deliveries, added to inventory stock with one UPDATE.
+Rows that fail validation are written to --rejects (default:
+<file>.rejects.csv) with the reason in an `error` column. Delivery
+chunks also update the running score stats and scores of their
+suppliers; after a delivery import every supplier is recomputed from
+scratch unless --no-rescore is given.
+"""
+
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.services.csv_import import IMPORT_KINDS, CsvImportError, import_csv
+from app.services.supplier_scoring import score_all_suppliers
+
+
+class Command(BaseCommand):
+    help = "Bulk import orders or deliveries from a CSV export"
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=IMPORT_KINDS)
+        parser.add_argument("path", help="CSV file to import")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Rows read, validated and written at a time")
+        parser.add_argument("--rejects", help="Where to write rejected rows (default: <path>.rejects.csv)")
+        parser.add_argument("--no-rescore", action="store_true", help="Skip recomputing supplier scores")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.isfile(path):
+            raise CommandError(f"No such file: {path}")
+        rejects_path = options["rejects"] or f"{os.path.splitext(path)[0]}.rejects.csv"
+
+        def progress(stats):
+            self.stdout.write(
+                f"  {stats['rows']} rows read, {stats['imported']} imported, "
+                f"{stats['rejected']} rejected ({stats['rows_per_sec']:.0f} rows/s)"
+            )
+
+        try:
+            with open(rejects_path, "w", newline="", encoding="utf-8") as rejects:
+                stats = import_csv(
+                    options["kind"], path, chunk_size=options["chunk_size"], rejects=rejects, progress=progress,
+                )
+        except (CsvImportError, ValueError) as e:
+            os.remove(rejects_path)
+            raise CommandError(str(e))
+        if not stats["rejected"]:
+            os.remove(rejects_path)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"  ✓ {stats['imported']} {options['kind']} imported from {stats['rows']} rows "
+            f"in {stats['seconds']:.2f}s ({stats['rows_per_sec']:.0f} rows/s)"
+        ))
+        if stats["kind"] == "deliveries":
+            self.stdout.write(self.style.SUCCESS(f"  ✓ {stats['inventory_items']} inventory items restocked"))
+        if stats["rejected"]:
+            self.stdout.write(self.style.WARNING(f"  ! {stats['rejected']} rows rejected, see {rejects_path}"))
+
+        if options["kind"] == "deliveries" and stats["imported"] and not options["no_rescore"]:
+            scored = score_all_suppliers()
+            self.stdout.write(self.style.SUCCESS(f"  ✓ {scored} suppliers rescored"))
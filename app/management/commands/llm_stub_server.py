@@ -0,0 +1,78 @@
+"""
+app/management/commands/llm_stub_server.py
+
+Usage:
+    python manage.py llm_stub_server                           # 127.0.0.1:8765, instant replies
+    python manage.py llm_stub_server --latency 1.5             # simulate a slow model
+    python manage.py llm_stub_server --reply-file replies.json # canned replies by prompt key
+
+An offline, OpenAI-compatible /chat/completions endpoint. Point the app at
+it with
+    LLM_BACKEND = {"backend": "http", "url": "http://127.0.0.1:8765/v1/chat/completions", "api_key": "stub"}
+to load-test the AI report path without network access or API spend.
+"""
+
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from app.services.llm import prompt_key
+
+DEFAULT_REPLY = json.dumps({
+    "summary": "Stub analysis: supplier performance is stable.",
+    "risks": ["Late deliveries concentrated in a few suppliers"],
+    "opportunities": ["Consolidate orders with top-rated suppliers"],
+    "actions": ["Review late suppliers", "Restock low-stock items", "Resolve open complaints"],
+})
+
+
+class Command(BaseCommand):
+    help = "Serve canned chat completions locally in place of OpenRouter"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before replying")
+        parser.add_argument("--reply-file", help="JSON file mapping prompt keys to replies")
+
+    def handle(self, *args, **options):
+        replies = {}
+        if options["reply_file"]:
+            with open(options["reply_file"], encoding="utf-8") as fh:
+                replies = json.load(fh)
+        latency = options["latency"]
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                messages = {m.get("role"): m.get("content", "") for m in body.get("messages", [])}
+                key = prompt_key(messages.get("system", ""), messages.get("user", ""),
+                                 body.get("model"), body.get("max_tokens"))
+                if latency:
+                    time.sleep(latency)
+
+                payload = json.dumps({
+                    "model": body.get("model"),
+                    "choices": [{"message": {"role": "assistant", "content": replies.get(key, DEFAULT_REPLY)}}],
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((options["host"], options["port"]), Handler)
+        self.stdout.write(self.style.SUCCESS(
+            f"  ✓ LLM stub listening on http://{options['host']}:{options['port']}/v1/chat/completions"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
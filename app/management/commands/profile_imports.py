@@ -0,0 +1,88 @@
+"""
+app/management/commands/profile_imports.py
+
+Usage:
+    python manage.py profile_imports                    # top 20 imports for app.urls
+    python manage.py profile_imports --top 40
+    python manage.py profile_imports --module app.views --sort self
+    python manage.py profile_imports --warm-up          # include app.services.warmup.warm_up()
+
+Runs a fresh interpreter with `python -X importtime`, sets Django up,
+imports the module a web worker would load (app.urls by default) and
+reports the slowest imports, by cumulative or self time, plus the total
+start-up time. Use it to check that heavy analytics dependencies stay out
+of the import path until first use.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Analytics dependencies that should only load on first use
+HEAVY_MODULES = ("numpy", "pandas", "vaderSentiment", "torch", "transformers", "requests", "feedparser", "bs4")
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Profile import time of the web worker start-up path"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--module", default="app.urls", help="Module to import after django.setup()")
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument("--sort", choices=("cumulative", "self"), default="cumulative")
+        parser.add_argument("--warm-up", action="store_true", help="Also run warm_up() after the import")
+
+    def handle(self, *args, **options):
+        code = f"import django; django.setup(); import {options['module']}"
+        if options["warm_up"]:
+            # The step timings are printed so the report can tell that warm-up ran
+            code += "; import json; from app.services.warmup import warm_up; print(json.dumps(warm_up()))"
+
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "supplyinsights.settings"))
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        rows = parse_importtime(result.stderr)
+        if result.returncode != 0:
+            errors = [line for line in result.stderr.splitlines() if not IMPORT_LINE.match(line)]
+            raise CommandError("Import failed:\n" + "\n".join(errors[-20:]))
+
+        total = sum(row[1] for row in rows)
+        column = 2 if options["sort"] == "cumulative" else 1
+        self.stdout.write(f"{len(rows)} modules imported in {total / 1000:,.0f} ms\n")
+        self.stdout.write(f"{'self ms':>9} {'cumul ms':>9}  module")
+        for module, self_us, cumulative_us, depth in sorted(rows, key=lambda r: r[column], reverse=True)[:options["top"]]:
+            self.stdout.write(f"{self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}  {module}")
+
+        if options["warm_up"]:
+            timings = json.loads(result.stdout.strip().splitlines()[-1]) if result.stdout.strip() else {}
+            if timings:
+                steps = ", ".join(f"{name} {secs * 1000:.0f} ms" for name, secs in timings.items())
+                self.stdout.write(self.style.SUCCESS(f"  ✓ Warm-up ran: {steps}"))
+            else:
+                self.stdout.write(self.style.WARNING("  ! warm_up() ran no steps"))
+            return
+
+        heavy = [m for m in HEAVY_MODULES if any(row[0] == m for row in rows)]
+        if heavy:
+            self.stdout.write(self.style.WARNING(f"  ! Loaded at import time: {', '.join(heavy)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("  ✓ No heavy analytics dependencies on the import path"))
@@ -0,0 +1,33 @@
+"""
+app/management/commands/refresh_ai_insights.py
+
+Usage:
+    python manage.py refresh_ai_insights
+
+Generates the Strategic AI Analysis for the current KPI snapshot in the
+foreground and stores it as a DecisionRecommendation. Nothing is generated
+when a stored analysis already matches the snapshot hash, so it is safe to
+run from cron after data imports.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.services.ai_insights import ai_available, refresh_insights, snapshot_hash
+from app.views import build_data_snapshot
+
+
+class Command(BaseCommand):
+    help = "Generate and store AI insights for the current KPI snapshot"
+
+    def handle(self, *args, **options):
+        if not ai_available():
+            raise CommandError("No LLM backend available (is OPENROUTER_API_KEY configured?)")
+
+        snapshot = build_data_snapshot()
+        digest = snapshot_hash(snapshot)
+        self.stdout.write(f"Snapshot {digest[:12]}...")
+
+        recommendation = refresh_insights(snapshot, digest)
+        if recommendation is None:
+            raise CommandError("The model returned no usable insights")
+        self.stdout.write(self.style.SUCCESS(f"  ✓ Insight #{recommendation.pk} ({recommendation.created_at:%Y-%m-%d %H:%M})"))
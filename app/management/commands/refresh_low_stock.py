@@ -0,0 +1,30 @@
+"""
+app/management/commands/refresh_low_stock.py
+
+Usage:
+    python manage.py refresh_low_stock
+    python manage.py refresh_low_stock --no-alerts     # fix flags without emailing
+
+Re-evaluates InventoryItem.is_below_reorder for every item and alerts on
+items that have just dropped to their reorder level. Stock changes made
+through the app keep the flag current as they happen; this repairs it
+after edits made directly in the database.
+"""
+
+from django.core.management.base import BaseCommand
+
+from app.services.kpi_snapshot import mark_dirty
+from app.services.low_stock import refresh_low_stock
+
+
+class Command(BaseCommand):
+    help = "Recompute low-stock flags and alert on items that just went low"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--no-alerts", action="store_true", help="Update flags without sending notify_low_stock")
+
+    def handle(self, *args, **options):
+        entered, left = refresh_low_stock(notify=not options["no_alerts"])
+        if entered or left:
+            mark_dirty("inventory")
+        self.stdout.write(self.style.SUCCESS(f"  ✓ {entered} items went low, {left} recovered"))
@@ -0,0 +1,210 @@
+"""
+app/management/commands/rescore_sentiment.py
+
+Usage:
+    python manage.py rescore_sentiment                         # everything, resuming from the checkpoint
+    python manage.py rescore_sentiment --since 2026-01-01      # only rows created from a date onwards
+    python manage.py rescore_sentiment --workers 4 --batch-size 5000
+    python manage.py rescore_sentiment --restart               # ignore the checkpoint and start over
+    python manage.py rescore_sentiment --only reviews complaints
+
+Recomputes sentiment in bulk with the sentiment service:
+    reviews              Review.full_experience      -> SentimentAnalysis (created or updated)
+    supplier_sentiments  existing SupplierSentiment  -> re-scored from their stored text
+    supplier_reviews     SupplierReview comments     -> SupplierSentiment for reviews that have none
+    complaints           Complaint descriptions      -> SupplierSentiment for complaints that have none
+
+Rows are streamed in primary-key order with iterator(chunk_size=...) and
+written back with bulk_create / bulk_update. After every batch the last
+primary key of each phase is saved to the checkpoint file, so an
+interrupted run picks up where it stopped.
+"""
+
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from app.models import Complaint, Review, SentimentAnalysis, SupplierReview, SupplierSentiment
+from app.services.kpi_snapshot import mark_dirty
+from app.services.sentiment import SentimentService
+
+PHASES = ("reviews", "supplier_sentiments", "supplier_reviews", "complaints")
+DEFAULT_CHECKPOINT = Path(settings.BASE_DIR) / ".rescore_sentiment.json"
+
+
+def review_label(score):
+    # Same rule customer_review_view applies to new reviews
+    return "Positive" if score >= 0 else "Negative"
+
+
+def supplier_label(score):
+    # VADER's recommended compound thresholds
+    if score >= 0.05:
+        return "Positive"
+    if score <= -0.05:
+        return "Negative"
+    return "Neutral"
+
+
+class Command(BaseCommand):
+    help = "Backfill and re-score customer and supplier sentiment in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Only rows created from this date (YYYY-MM-DD)")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--workers", type=int, default=1, help="Process-pool workers for scoring")
+        parser.add_argument("--only", nargs="+", choices=PHASES, help="Run only these phases")
+        parser.add_argument("--checkpoint", default=str(DEFAULT_CHECKPOINT), help="Checkpoint file path")
+        parser.add_argument("--restart", action="store_true", help="Ignore and overwrite the checkpoint")
+
+    # ── Checkpoint ────────────────────────────────────────────────────
+    def _load_checkpoint(self):
+        if self.restart or not self.checkpoint_path.exists():
+            return {}
+        state = json.loads(self.checkpoint_path.read_text())
+        if state.get("since") != self.since_arg:
+            raise CommandError(
+                f"Checkpoint was written for --since {state.get('since')!r}; "
+                "pass the same --since or use --restart"
+            )
+        return state
+
+    def _save_checkpoint(self):
+        self.state["since"] = self.since_arg
+        self.checkpoint_path.write_text(json.dumps(self.state))
+
+    # ── Driver ────────────────────────────────────────────────────────
+    def handle(self, *args, **options):
+        self.since_arg = options["since"]
+        self.since = None
+        if self.since_arg:
+            try:
+                self.since = timezone.make_aware(datetime.strptime(self.since_arg, "%Y-%m-%d"))
+            except ValueError:
+                raise CommandError("--since must be a date in YYYY-MM-DD format")
+
+        self.batch_size = options["batch_size"]
+        self.restart = options["restart"]
+        self.checkpoint_path = Path(options["checkpoint"])
+        self.state = self._load_checkpoint()
+
+        workers = options["workers"]
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        self.service = SentimentService(
+            cache_size=50000, workers=workers, pool_threshold=self.batch_size // 2 or 1, executor=executor,
+        )
+
+        try:
+            for phase in options["only"] or PHASES:
+                getattr(self, f"_run_{phase}")(phase)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        # bulk writes skip the post_save signals that invalidate KPIs
+        mark_dirty("sentiments", "supplier_sentiment")
+        self.checkpoint_path.unlink(missing_ok=True)
+        self.stdout.write(self.style.SUCCESS("  ✓ Sentiment rescore complete (checkpoint cleared)"))
+
+    def _stream(self, phase, queryset):
+        """Yield batches of rows after the phase's checkpoint, saving progress after each."""
+        queryset = queryset.filter(pk__gt=self.state.get(phase, 0)).order_by("pk")
+        if self.since is not None:
+            queryset = queryset.filter(created_at__gte=self.since)
+
+        self.stdout.write(f"{phase}: starting after pk {self.state.get(phase, 0)}")
+        done, start, batch = 0, time.perf_counter(), []
+        for row in queryset.iterator(chunk_size=self.batch_size):
+            batch.append(row)
+            if len(batch) == self.batch_size:
+                yield batch
+                done += len(batch)
+                self._progress(phase, batch[-1].pk, done, start)
+                batch = []
+        if batch:
+            yield batch
+            done += len(batch)
+            self._progress(phase, batch[-1].pk, done, start)
+        self.stdout.write(self.style.SUCCESS(f"  ✓ {phase}: {done} rows"))
+
+    def _progress(self, phase, last_pk, done, start):
+        self.state[phase] = last_pk
+        self._save_checkpoint()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"  {phase}: {done} rows, {done / elapsed:,.0f} rows/s (last pk {last_pk})")
+
+    # ── Phases ────────────────────────────────────────────────────────
+    def _run_reviews(self, phase):
+        for reviews in self._stream(phase, Review.objects.only("id", "full_experience")):
+            scores = self.service.score_many([r.full_experience for r in reviews])
+            existing = {
+                a.review_id: a for a in SentimentAnalysis.objects.filter(review__in=reviews)
+            }
+
+            created, updated = [], []
+            for review, (vader, bert) in zip(reviews, scores):
+                final = (vader + bert) / 2
+                analysis = existing.get(review.pk) or SentimentAnalysis(review=review)
+                analysis.vader_score = vader
+                analysis.bert_score = bert
+                analysis.final_sentiment_score = final
+                analysis.sentiment_label = review_label(final)
+                (updated if analysis.pk else created).append(analysis)
+
+            with transaction.atomic():
+                SentimentAnalysis.objects.bulk_create(created)
+                SentimentAnalysis.objects.bulk_update(
+                    updated, ["vader_score", "bert_score", "final_sentiment_score", "sentiment_label"],
+                )
+
+    def _run_supplier_sentiments(self, phase):
+        for sentiments in self._stream(phase, SupplierSentiment.objects.only("id", "source_type", "text")):
+            scores = self.service.score_many([s.text for s in sentiments])
+            for sentiment, (vader, _) in zip(sentiments, scores):
+                # Complaints are never scored as positive (see record_complaint)
+                if sentiment.source_type.upper() == "COMPLAINT":
+                    vader = min(vader, 0)
+                sentiment.sentiment_label = supplier_label(vader)
+                sentiment.confidence_score = vader
+            SupplierSentiment.objects.bulk_update(sentiments, ["sentiment_label", "confidence_score"])
+
+    def _create_missing(self, phase, queryset, source_type, text_field, clamp_negative=False):
+        for rows in self._stream(phase, queryset):
+            rows = [r for r in rows if getattr(r, text_field)]
+            have = set(
+                SupplierSentiment.objects
+                .filter(source_type__iexact=source_type, source_id__in=[r.pk for r in rows])
+                .values_list("source_id", flat=True)
+            )
+            rows = [r for r in rows if r.pk not in have]
+            scores = self.service.score_many([getattr(r, text_field) for r in rows])
+
+            new = []
+            for row, (vader, _) in zip(rows, scores):
+                if clamp_negative:
+                    vader = min(vader, 0)
+                new.append(SupplierSentiment(
+                    supplier_id=row.supplier_id, source_type=source_type, source_id=row.pk,
+                    text=getattr(row, text_field), sentiment_label=supplier_label(vader),
+                    confidence_score=vader,
+                ))
+            SupplierSentiment.objects.bulk_create(new)
+
+    def _run_supplier_reviews(self, phase):
+        self._create_missing(
+            phase, SupplierReview.objects.only("id", "supplier_id", "review_comment"),
+            "REVIEW", "review_comment",
+        )
+
+    def _run_complaints(self, phase):
+        self._create_missing(
+            phase, Complaint.objects.only("id", "supplier_id", "description"),
+            "COMPLAINT", "description", clamp_negative=True,
+        )
@@ -0,0 +1,41 @@
+"""
+app/management/commands/run_benchmarks.py
+
+Usage:
+    python manage.py run_benchmarks                     # the current quarter
+    python manage.py run_benchmarks --period 2025-Q1
+    python manage.py run_benchmarks --period 2025-03 --period 2025
+
+Computes every supplier's delivery metrics for an evaluation period
+(a year, a quarter like 2025-Q1, or a month like 2025-03), ranks them
+against all suppliers that delivered in the period, and replaces that
+period's Benchmark rows. The per-period percentile table used by
+percentile_of() is refreshed at the same time.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.services.benchmarking import current_period, period_bounds, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = "Compute supplier benchmarks (industry averages and percentile ranks) for evaluation periods"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--period", action="append", help="Evaluation period (default: current quarter)")
+
+    def handle(self, *args, **options):
+        periods = options["period"] or [current_period()]
+        for period in periods:
+            try:
+                period_bounds(period)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        for period in periods:
+            start = time.perf_counter()
+            written = run_benchmarks(period)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(self.style.SUCCESS(f"  ✓ {period}: {written} benchmark rows in {elapsed:.2f}s"))
@@ -0,0 +1,45 @@
+"""
+app/management/commands/score_suppliers.py
+
+Usage:
+    python manage.py score_suppliers
+    python manage.py score_suppliers --batch-size 5000
+    python manage.py score_suppliers --profile "Quality first"   # score with a stored weight profile
+
+Recomputes every SupplierPerformanceScore (timeliness, quantity accuracy,
+quality, complaint, consistency, trust and risk, then the weighted final
+score and rating) from raw deliveries, complaints, supplier reviews and
+supplier sentiments. The running SupplierScoreStats that new events update
+incrementally are rebuilt at the same time, so this also repairs any drift
+from edits made outside the recording views. Safe to run from cron after
+data imports. Weights come from --profile, else the active
+ScoreWeightProfile, else SupplierPerformanceScore.DEFAULT_WEIGHTS.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.models import ScoreWeightProfile
+from app.services.supplier_scoring import score_all_suppliers
+
+
+class Command(BaseCommand):
+    help = "Recompute all supplier performance scores from raw delivery data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per bulk_update statement")
+        parser.add_argument("--profile", help="ScoreWeightProfile name (default: the active profile)")
+
+    def handle(self, *args, **options):
+        weights = None
+        if options["profile"]:
+            profile = ScoreWeightProfile.objects.filter(name=options["profile"]).first()
+            if profile is None:
+                raise CommandError(f"No weight profile named {options['profile']!r}")
+            weights = profile.resolved_weights()
+
+        start = time.perf_counter()
+        scored = score_all_suppliers(weights=weights, batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f"  ✓ {scored} suppliers scored in {elapsed:.2f}s"))
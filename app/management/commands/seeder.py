@@ -241,7 +241,7 @@ class Command(BaseCommand):
                 qty = random.randint(50, 500)
                 expected = rand_future_date(45) if random.random() > 0.4 else rand_date(60, 5)
                 status = random.choice(["PENDING", "CONFIRMED", "DISPATCHED", "DELIVERED", "DELIVERED", "DELIVERED"])
-                order = Order.objects.create(
+                orders.append(Order(
                     supplier=supplier,
                     product_name=product[0],
                     product_category=product[1],
@@ -251,8 +251,9 @@ class Command(BaseCommand):
                     expected_delivery_date=expected,
                     status=status,
                     notes=random.choice(["Urgent — low stock", "Standard reorder", "Promotional stock-up", ""]),
-                )
-                orders.append(order)
+                ))
+        # Numbers for the whole batch are reserved in one block
+        orders = Order.objects.bulk_create(orders)
         self.stdout.write(self.style.SUCCESS(f"  ✓ {len(orders)} orders"))
 
         # ── 3. Deliveries ────────────────────────────────────────────────────
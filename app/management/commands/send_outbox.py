@@ -0,0 +1,47 @@
+"""
+app/management/commands/send_outbox.py
+
+Usage:
+    python manage.py send_outbox                 # send everything due, then exit (cron)
+    python manage.py send_outbox --loop          # keep draining every 10 seconds
+    python manage.py send_outbox --loop --interval 30 --batch-size 100
+
+Queues any notification digests whose window has closed, then drains
+EmailOutbox over one SMTP connection per run. Failed messages are retried
+with exponential backoff (see EMAIL_OUTBOX in settings) and marked
+"failed" after the last attempt.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.notifications import flush_digests
+from app.services.email_outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = "Send queued transactional emails from the EmailOutbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep running and drain periodically")
+        parser.add_argument("--interval", type=float, default=10.0, help="Seconds between drains with --loop")
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        while True:
+            flush_digests()
+            try:
+                sent, failed = drain_outbox(batch_size=options["batch_size"])
+            except Exception as e:
+                # e.g. SMTP server unreachable: rows stay pending for the next run
+                if not options["loop"]:
+                    raise CommandError(f"Outbox drain failed: {e}")
+                self.stderr.write(f"Outbox drain failed: {e}")
+                sent = failed = 0
+            else:
+                if sent or failed or not options["loop"]:
+                    self.stdout.write(self.style.SUCCESS(f"  ✓ {sent} sent, {failed} failed"))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -1,21 +1,35 @@
+from django.conf import settings
 from django.utils import timezone
 from ipaddress import ip_address as ip_parse
 
 from .models import VisitorLog
+from .services.visitor_log_buffer import get_visitor_log_buffer
+from .services.visitor_rollups import record_visits
 
 
 class VisitorLoggingMiddleware:
     """
     Middleware that logs basic visit metadata: IP, path, method, referrer,
     user agent, timestamp, and a simple location hint (if provided by proxy headers).
+
+    settings.VISITOR_LOG_MODE selects how rows are written:
+      "buffered" — queued in-process and bulk-inserted by a background thread
+                   (what supplyinsights/settings.py configures)
+      "sync"     — one INSERT per request (used when the setting is absent)
+      "off"      — logging disabled
     """
 
     def __init__(self, get_response):
         self.get_response = get_response
+        self.mode = getattr(settings, "VISITOR_LOG_MODE", "sync")
+        self.buffer = get_visitor_log_buffer() if self.mode == "buffered" else None
 
     def __call__(self, request):
         response = self.get_response(request)
 
+        if self.mode == "off":
+            return response
+
         # Skip logging for static/admin if desired
         path = request.path or ""
         if path.startswith("/static") or path.startswith("/admin"):
@@ -25,7 +39,7 @@ class VisitorLoggingMiddleware:
             ip = self._get_client_ip(request)
             location = self._get_location_hint(request)
 
-            VisitorLog.objects.create(
+            entry = VisitorLog(
                 user=request.user if getattr(request, "user", None) and request.user.is_authenticated else None,
                 ip_address=ip,
                 path=path[:512],
@@ -35,6 +49,11 @@ class VisitorLoggingMiddleware:
                 location=location[:255] if location else "Unknown",
                 visited_at=timezone.now(),
             )
+            if self.buffer is not None:
+                self.buffer.put(entry)
+            else:
+                entry.save()
+                record_visits([entry])
         except Exception:
             # Swallow logging errors to never block user traffic
             pass
@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_order'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VisitorDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('path', models.CharField(max_length=512)),
+                ('location', models.CharField(default='Unknown', max_length=255)),
+                ('ip_address', models.CharField(blank=True, default='', max_length=45)),
+                ('views', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Visitor Daily Rollup',
+                'verbose_name_plural': 'Visitor Daily Rollups',
+                'constraints': [models.UniqueConstraint(fields=('bucket_start', 'path', 'location', 'ip_address'), name='unique_visitor_daily_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VisitorHourlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('path', models.CharField(max_length=512)),
+                ('location', models.CharField(default='Unknown', max_length=255)),
+                ('ip_address', models.CharField(blank=True, default='', max_length=45)),
+                ('views', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Visitor Hourly Rollup',
+                'verbose_name_plural': 'Visitor Hourly Rollups',
+                'constraints': [models.UniqueConstraint(fields=('bucket_start', 'path', 'location', 'ip_address'), name='unique_visitor_hourly_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_kpisnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='decisionrecommendation',
+            name='snapshot_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='decisionrecommendation',
+            name='report_type',
+            field=models.CharField(choices=[('risk', 'Risk Analysis'), ('performance', 'Performance'), ('inventory', 'Inventory'), ('sentiment', 'Sentiment'), ('strategy', 'Strategic AI Analysis')], max_length=50),
+        ),
+    ]
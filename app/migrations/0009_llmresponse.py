@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_decisionrecommendation_snapshot_hash_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LlmResponse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('model', models.CharField(max_length=100)),
+                ('response', models.TextField()),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'LLM Response',
+                'verbose_name_plural': 'LLM Response Cache',
+            },
+        ),
+    ]
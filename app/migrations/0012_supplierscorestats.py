@@ -0,0 +1,47 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_notificationevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplierScoreStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('deliveries', models.IntegerField(default=0)),
+                ('on_time', models.IntegerField(default=0)),
+                ('late', models.IntegerField(default=0)),
+                ('damaged', models.IntegerField(default=0)),
+                ('partial', models.IntegerField(default=0)),
+                ('ordered', models.FloatField(default=0)),
+                ('delivered', models.FloatField(default=0)),
+                ('delay_sum', models.FloatField(default=0)),
+                ('delay_squares', models.FloatField(default=0)),
+                ('complaints', models.IntegerField(default=0)),
+                ('unresolved', models.IntegerField(default=0)),
+                ('open_severity', models.IntegerField(default=0)),
+                ('resolved_severity', models.IntegerField(default=0)),
+                ('reviews', models.IntegerField(default=0)),
+                ('communication_sum', models.FloatField(default=0)),
+                ('flexibility_sum', models.FloatField(default=0)),
+                ('price_sum', models.FloatField(default=0)),
+                ('documentation_sum', models.FloatField(default=0)),
+                ('sentiments', models.IntegerField(default=0)),
+                ('confidence_sum', models.FloatField(default=0)),
+                ('negative', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('supplier', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='score_stats', to='app.supplier')),
+            ],
+            options={
+                'verbose_name': 'Supplier Score Stats',
+                'verbose_name_plural': 'Supplier Score Stats',
+            },
+        ),
+    ]
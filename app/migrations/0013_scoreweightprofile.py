@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_supplierscorestats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreWeightProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('description', models.TextField(blank=True)),
+                ('weights', models.JSONField(default=dict)),
+                ('is_active', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Score Weight Profile',
+                'verbose_name_plural': 'Score Weight Profiles',
+            },
+        ),
+    ]
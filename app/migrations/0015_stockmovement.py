@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0014_ordersequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(help_text='Units added (negative for units removed)')),
+                ('reason', models.CharField(choices=[('DELIVERY', 'Delivery'), ('IMPORT', 'CSV Import'), ('ADJUSTMENT', 'Adjustment')], default='DELIVERY', max_length=20)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('delivery', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='app.delivery')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='app.inventoryitem')),
+            ],
+            options={
+                'verbose_name': 'Stock Movement',
+                'verbose_name_plural': 'Stock Movements',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['item', 'created_at'], name='app_stockmo_item_id_37923e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:59
+
+from django.db import migrations, models
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
+
+
+def flag_low_stock(apps, schema_editor):
+    # One UPDATE for existing rows; no alerts for items that were already low
+    InventoryItem = apps.get_model("app", "InventoryItem")
+    InventoryItem.objects.update(is_below_reorder=ExpressionWrapper(
+        Q(quantity_in_stock__lte=F("reorder_level")), output_field=BooleanField(),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_stockmovement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='is_below_reorder',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(flag_low_stock, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['is_below_reorder', 'is_active', 'quantity_in_stock'], name='app_invento_is_belo_fc5e52_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:03
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_inventoryitem_is_below_reorder_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(choices=[('SES', 'Exponential Smoothing'), ('CROSTON', 'Croston (intermittent)'), ('NONE', 'No demand history')], max_length=10)),
+                ('daily_demand', models.FloatField(default=0)),
+                ('demand_std', models.FloatField(default=0)),
+                ('lead_time_days', models.FloatField(default=0)),
+                ('recommended_reorder_level', models.PositiveIntegerField(default=0)),
+                ('days_of_cover', models.FloatField(blank=True, help_text='Days the current stock lasts at the forecast demand (empty: no demand)', null=True)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='forecast', to='app.inventoryitem')),
+            ],
+            options={
+                'verbose_name': 'Demand Forecast',
+                'verbose_name_plural': 'Demand Forecasts',
+                'indexes': [models.Index(fields=['days_of_cover'], name='app_demandf_days_of_bce648_idx')],
+            },
+        ),
+    ]
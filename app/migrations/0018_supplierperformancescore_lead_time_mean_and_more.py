@@ -0,0 +1,78 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:12
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+DELAY_CLIP = 60
+
+
+def fill_delay_bins(apps, schema_editor):
+    # Deliveries grouped by supplier and dates in the database, then
+    # clipped and counted into at most 121 bars per supplier
+    Delivery = apps.get_model("app", "Delivery")
+    SupplierDelayBin = apps.get_model("app", "SupplierDelayBin")
+    rows = (
+        Delivery.objects.values_list("supplier_id", "expected_delivery_date", "actual_delivery_date")
+        .annotate(n=Count("id")).order_by()
+    )
+    bars = Counter()
+    for supplier_id, expected, actual, n in rows.iterator(chunk_size=20000):
+        days = max(-DELAY_CLIP, min(DELAY_CLIP, (actual - expected).days))
+        bars[supplier_id, days] += n
+    SupplierDelayBin.objects.bulk_create(
+        [SupplierDelayBin(supplier_id=pk, days=days, deliveries=n) for (pk, days), n in bars.items()],
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_demandforecast'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supplierperformancescore',
+            name='lead_time_mean',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='supplierperformancescore',
+            name='lead_time_p50',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='supplierperformancescore',
+            name='lead_time_p90',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='supplierperformancescore',
+            name='lead_time_p99',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='supplierperformancescore',
+            name='lead_time_std',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='SupplierDelayBin',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('days', models.SmallIntegerField()),
+                ('deliveries', models.IntegerField(default=0)),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='delay_bins', to='app.supplier')),
+            ],
+            options={
+                'verbose_name': 'Supplier Delay Bin',
+                'verbose_name_plural': 'Supplier Delay Bins',
+                'constraints': [models.UniqueConstraint(fields=('supplier', 'days'), name='unique_supplier_delay_bin')],
+            },
+        ),
+        migrations.RunPython(fill_delay_bins, migrations.RunPython.noop),
+    ]
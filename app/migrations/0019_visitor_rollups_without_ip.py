@@ -0,0 +1,81 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:27
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def split_out_ip_rollups(apps, schema_editor):
+    # Per-day IP counts come straight from the daily rollups' IP column
+    VisitorDailyRollup = apps.get_model("app", "VisitorDailyRollup")
+    VisitorIpDailyRollup = apps.get_model("app", "VisitorIpDailyRollup")
+    rows = VisitorDailyRollup.objects.values("bucket_start", "ip_address").annotate(total=Sum("views")).order_by()
+    VisitorIpDailyRollup.objects.bulk_create(
+        (VisitorIpDailyRollup(bucket_start=r["bucket_start"], ip_address=r["ip_address"], views=r["total"])
+         for r in rows.iterator(chunk_size=5000)),
+        batch_size=5000,
+    )
+
+
+def merge_page_rollups(apps, schema_editor):
+    # Rows that differed only by IP now share a key: sum them into one
+    for name in ("VisitorHourlyRollup", "VisitorDailyRollup"):
+        model = apps.get_model("app", name)
+        merged = [
+            model(bucket_start=r["bucket_start"], path=r["path"], location=r["location"], views=r["total"])
+            for r in model.objects.values("bucket_start", "path", "location").annotate(total=Sum("views")).order_by()
+        ]
+        model.objects.all().delete()
+        model.objects.bulk_create(merged, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0018_supplierperformancescore_lead_time_mean_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VisitorIpDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('ip_address', models.CharField(blank=True, default='', max_length=45)),
+                ('views', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Visitor IP Daily Rollup',
+                'verbose_name_plural': 'Visitor IP Daily Rollups',
+            },
+        ),
+        migrations.RunPython(split_out_ip_rollups, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='visitordailyrollup',
+            name='unique_visitor_daily_bucket',
+        ),
+        migrations.RemoveConstraint(
+            model_name='visitorhourlyrollup',
+            name='unique_visitor_hourly_bucket',
+        ),
+        migrations.RemoveField(
+            model_name='visitordailyrollup',
+            name='ip_address',
+        ),
+        migrations.RemoveField(
+            model_name='visitorhourlyrollup',
+            name='ip_address',
+        ),
+        migrations.RunPython(merge_page_rollups, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='visitordailyrollup',
+            constraint=models.UniqueConstraint(fields=('bucket_start', 'path', 'location'), name='unique_visitor_daily_bucket'),
+        ),
+        migrations.AddConstraint(
+            model_name='visitorhourlyrollup',
+            constraint=models.UniqueConstraint(fields=('bucket_start', 'path', 'location'), name='unique_visitor_hourly_bucket'),
+        ),
+        migrations.AddConstraint(
+            model_name='visitoripdailyrollup',
+            constraint=models.UniqueConstraint(fields=('bucket_start', 'ip_address'), name='unique_visitor_ip_daily_bucket'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0019_visitor_rollups_without_ip'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='demandforecast',
+            name='method',
+            field=models.CharField(choices=[('SES', 'Exponential Smoothing'), ('CROSTON', 'Croston (intermittent)'), ('RECEIPTS', 'Receipts only (no outbound history)'), ('NONE', 'No demand history')], max_length=10),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0020_demandforecast_receipts_method'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AiInsightClaim',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_hash', models.CharField(max_length=64, unique=True)),
+                ('claimed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'AI Insight Claim',
+                'verbose_name_plural': 'AI Insight Claims',
+            },
+        ),
+    ]
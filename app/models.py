@@ -1,5 +1,8 @@
+import sqlite3
+
 from django.conf import settings
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, models, transaction
 from django.utils import timezone
 
 
@@ -32,6 +35,187 @@ class VisitorLog(models.Model):
         return f"{self.path} @ {self.visited_at}"
 
 
+# ---------------------------------------
+# Visitor Rollups (pre-aggregated VisitorLog)
+# ---------------------------------------
+class VisitorRollup(models.Model):
+    """
+    Page views per (bucket, path, location). Maintained incrementally as
+    visits are logged and rebuilt by the backfill_visitor_rollups command.
+    """
+    bucket_start = models.DateTimeField()
+    path = models.CharField(max_length=512)
+    location = models.CharField(max_length=255, default="Unknown")
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"{self.path} @ {self.bucket_start} ({self.views})"
+
+
+class VisitorHourlyRollup(VisitorRollup):
+    class Meta:
+        verbose_name = "Visitor Hourly Rollup"
+        verbose_name_plural = "Visitor Hourly Rollups"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["bucket_start", "path", "location"],
+                name="unique_visitor_hourly_bucket",
+            ),
+        ]
+
+
+class VisitorDailyRollup(VisitorRollup):
+    class Meta:
+        verbose_name = "Visitor Daily Rollup"
+        verbose_name_plural = "Visitor Daily Rollups"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["bucket_start", "path", "location"],
+                name="unique_visitor_daily_bucket",
+            ),
+        ]
+
+
+class VisitorIpDailyRollup(models.Model):
+    """
+    Page views per (day, IP): one row per visitor per day, from which unique
+    visitors and bounces (IPs with a single view) are counted in SQL. Kept
+    apart from the page rollups so those do not grow with every new IP.
+    """
+    bucket_start = models.DateTimeField()
+    ip_address = models.CharField(max_length=45, blank=True, default="")
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Visitor IP Daily Rollup"
+        verbose_name_plural = "Visitor IP Daily Rollups"
+        constraints = [
+            models.UniqueConstraint(fields=["bucket_start", "ip_address"], name="unique_visitor_ip_daily_bucket"),
+        ]
+
+    def __str__(self):
+        return f"{self.ip_address or 'unknown'} @ {self.bucket_start} ({self.views})"
+
+
+# ---------------------------------------
+# KPI Snapshot (materialized dashboard KPIs)
+# ---------------------------------------
+class KpiSnapshot(models.Model):
+    """
+    Last computed result of one kpi_engine metric group. Signals mark a group
+    dirty (and bump `version`) when its source tables change; the next read
+    recomputes only the dirty groups.
+    """
+    group = models.CharField(max_length=50, unique=True)
+    data = models.JSONField(default=dict)
+    is_dirty = models.BooleanField(default=True)
+    version = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "KPI Snapshot"
+        verbose_name_plural = "KPI Snapshots"
+
+    def __str__(self):
+        return f"{self.group} ({'dirty' if self.is_dirty else 'clean'})"
+
+
+# ---------------------------------------
+# LLM Response Cache
+# ---------------------------------------
+class LlmResponse(models.Model):
+    """
+    Cached completion keyed by a sha256 of (system prompt, user prompt,
+    model, max_tokens). Entries expire after LLM_CACHE["ttl"] seconds and
+    the least recently used are evicted past LLM_CACHE["max_entries"].
+    """
+    key = models.CharField(max_length=64, unique=True)
+    model = models.CharField(max_length=100)
+    response = models.TextField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = "LLM Response"
+        verbose_name_plural = "LLM Response Cache"
+
+    def __str__(self):
+        return f"{self.model} · {self.key[:12]}"
+
+
+# ---------------------------------------
+# Email Outbox (transactional notifications)
+# ---------------------------------------
+class EmailOutbox(models.Model):
+    """
+    A rendered email waiting to be sent. Rows are written in the same
+    transaction as the record they announce and drained by
+    `python manage.py send_outbox`.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    from_email = models.CharField(max_length=255)
+    recipients = models.JSONField(default=list)
+    text_body = models.TextField()
+    html_body = models.TextField(blank=True)
+    template_name = models.CharField(max_length=100, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Email Outbox"
+        verbose_name_plural = "Email Outbox"
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+
+# ---------------------------------------
+# Notification Event (digest buffer)
+# ---------------------------------------
+class NotificationEvent(models.Model):
+    """
+    One notification waiting for its recipient's digest. Events of the same
+    kind for the same recipient are rendered into a single email once the
+    oldest of them is NOTIFICATION_DIGEST["window"] seconds old.
+    """
+    KIND_CHOICES = [
+        ('complaint', 'Complaint Logged'),
+        ('delivery', 'Delivery Alert'),
+        ('low_stock', 'Low Stock'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    details = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now)
+    digested_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Notification Event"
+        verbose_name_plural = "Notification Events"
+        indexes = [models.Index(fields=["digested_at", "recipient", "kind"])]
+
+    def __str__(self):
+        return self.subject
+
+
 # ---------------------------------------
 # Supplier
 # ---------------------------------------
@@ -74,6 +258,13 @@ class SupplierPerformanceScore(models.Model):
     rating_category = models.CharField(max_length=50, blank=True)
     last_updated = models.DateTimeField(default=timezone.now)
 
+    # Days late (negative: early) from the supplier's delay histogram
+    lead_time_mean = models.FloatField(null=True, blank=True)
+    lead_time_std = models.FloatField(null=True, blank=True)
+    lead_time_p50 = models.FloatField(null=True, blank=True)
+    lead_time_p90 = models.FloatField(null=True, blank=True)
+    lead_time_p99 = models.FloatField(null=True, blank=True)
+
     class Meta:
         verbose_name = "Supplier Performance Score"
         verbose_name_plural = "Supplier Performance Scores"
@@ -81,17 +272,22 @@ class SupplierPerformanceScore(models.Model):
     def __str__(self):
         return f"Performance - {self.supplier.name}"
 
+    DEFAULT_WEIGHTS = {
+        "timeliness": 0.2,
+        "quantity_accuracy": 0.2,
+        "quality": 0.2,
+        "complaint": 0.15,
+        "consistency": 0.1,
+        "trust_index": 0.1,
+        "risk_index": -0.05,
+    }
+
+    # (minimum final_score, category), highest first; anything lower is "Poor"
+    RATING_BANDS = ((85, "Excellent"), (70, "Good"), (50, "Average"))
+
     def calculate_final_score(self, weights=None):
         if weights is None:
-            weights = {
-                "timeliness": 0.2,
-                "quantity_accuracy": 0.2,
-                "quality": 0.2,
-                "complaint": 0.15,
-                "consistency": 0.1,
-                "trust_index": 0.1,
-                "risk_index": -0.05,
-            }
+            weights = self.DEFAULT_WEIGHTS
 
         score = (
             self.timeliness_score * weights["timeliness"] +
@@ -110,12 +306,9 @@ class SupplierPerformanceScore(models.Model):
         return self.final_score
 
     def get_rating_category(self):
-        if self.final_score >= 85:
-            return "Excellent"
-        elif self.final_score >= 70:
-            return "Good"
-        elif self.final_score >= 50:
-            return "Average"
+        for floor, category in self.RATING_BANDS:
+            if self.final_score >= floor:
+                return category
         return "Poor"
     
     
@@ -157,6 +350,119 @@ class SupplierPerformanceScore(models.Model):
     #     # Recalculate final score
     #     self.calculate_final_score()
 
+# ---------------------------------------
+# Supplier Score Stats (running totals)
+# ---------------------------------------
+class SupplierScoreStats(models.Model):
+    """
+    Running sufficient statistics behind a supplier's performance score.
+    Each delivery, complaint, review or sentiment adds to these counters
+    with F() expressions, so the score is re-derived from one row instead
+    of the supplier's whole history. `score_suppliers` rebuilds them.
+    """
+    supplier = models.OneToOneField(Supplier, on_delete=models.CASCADE, related_name="score_stats")
+
+    deliveries = models.IntegerField(default=0)
+    on_time = models.IntegerField(default=0)
+    late = models.IntegerField(default=0)
+    damaged = models.IntegerField(default=0)
+    partial = models.IntegerField(default=0)
+    ordered = models.FloatField(default=0)
+    delivered = models.FloatField(default=0)
+    delay_sum = models.FloatField(default=0)
+    delay_squares = models.FloatField(default=0)
+
+    complaints = models.IntegerField(default=0)
+    unresolved = models.IntegerField(default=0)
+    open_severity = models.IntegerField(default=0)
+    resolved_severity = models.IntegerField(default=0)
+
+    reviews = models.IntegerField(default=0)
+    communication_sum = models.FloatField(default=0)
+    flexibility_sum = models.FloatField(default=0)
+    price_sum = models.FloatField(default=0)
+    documentation_sum = models.FloatField(default=0)
+
+    sentiments = models.IntegerField(default=0)
+    confidence_sum = models.FloatField(default=0)
+    negative = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Supplier Score Stats"
+        verbose_name_plural = "Supplier Score Stats"
+
+    def __str__(self):
+        return f"Score stats - {self.supplier.name}"
+
+
+# ---------------------------------------
+# Supplier Lead-Time Histogram
+# ---------------------------------------
+class SupplierDelayBin(models.Model):
+    """
+    One bar of a supplier's lead-time deviation histogram: how many
+    deliveries arrived `days` after (negative: before) the expected date.
+    Deviations beyond DELAY_CLIP days share the outermost bars. New
+    deliveries increment their bar with an F() expression, so quantiles
+    are read from a few dozen rows instead of the delivery history.
+    """
+    DELAY_CLIP = 60
+
+    supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE, related_name="delay_bins")
+    days = models.SmallIntegerField()
+    deliveries = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Supplier Delay Bin"
+        verbose_name_plural = "Supplier Delay Bins"
+        constraints = [models.UniqueConstraint(fields=["supplier", "days"], name="unique_supplier_delay_bin")]
+
+    def __str__(self):
+        return f"{self.supplier.name}: {self.days:+d} days x {self.deliveries}"
+
+
+# ---------------------------------------
+# Score Weight Profile
+# ---------------------------------------
+class ScoreWeightProfile(models.Model):
+    """
+    A named set of SupplierPerformanceScore weights. Keys left out of
+    `weights` fall back to SupplierPerformanceScore.DEFAULT_WEIGHTS. The
+    active profile (at most one) is used whenever scores are recomputed.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    description = models.TextField(blank=True)
+    weights = models.JSONField(default=dict)
+    is_active = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Score Weight Profile"
+        verbose_name_plural = "Score Weight Profiles"
+
+    def __str__(self):
+        return f"{self.name}{' (active)' if self.is_active else ''}"
+
+    def clean(self):
+        unknown = set(self.weights) - set(SupplierPerformanceScore.DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValidationError({"weights": f"Unknown weight keys: {', '.join(sorted(unknown))}"})
+        for key, value in self.weights.items():
+            if not isinstance(value, (int, float)):
+                raise ValidationError({"weights": f"Weight '{key}' must be a number"})
+
+    def resolved_weights(self):
+        return {**SupplierPerformanceScore.DEFAULT_WEIGHTS, **self.weights}
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            if self.is_active:
+                ScoreWeightProfile.objects.filter(is_active=True).exclude(pk=self.pk).update(is_active=False)
+            super().save(*args, **kwargs)
+
+
 # ---------------------------------------
 # Supplier Sentiment
 # ---------------------------------------
@@ -371,15 +677,91 @@ class InventoryItem(models.Model):
     last_restocked = models.DateTimeField(null=True, blank=True)
     last_sold = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
+    # quantity_in_stock <= reorder_level, kept current by app.services.low_stock
+    # so dashboards filter on an index instead of comparing columns row by row
+    is_below_reorder = models.BooleanField(default=False, editable=False)
 
     class Meta:
         verbose_name = "Inventory Item"
         verbose_name_plural = "Inventory Items"
+        indexes = [models.Index(fields=["is_below_reorder", "is_active", "quantity_in_stock"])]
 
     def __str__(self):
         return self.name
 
 
+# ---------------------------------------
+# Stock Ledger
+# ---------------------------------------
+class StockMovement(models.Model):
+    """
+    Append-only record of every change to an item's stock. The item's
+    quantity_in_stock is moved by the same amount in the same transaction,
+    with an F() update rather than a read-modify-write in Python.
+    """
+    REASONS = [
+        ("DELIVERY", "Delivery"),
+        ("IMPORT", "CSV Import"),
+        ("ADJUSTMENT", "Adjustment"),
+    ]
+
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="movements")
+    quantity = models.IntegerField(help_text="Units added (negative for units removed)")
+    reason = models.CharField(max_length=20, choices=REASONS, default="DELIVERY")
+    delivery = models.ForeignKey(
+        "Delivery", on_delete=models.SET_NULL, null=True, blank=True, related_name="stock_movements"
+    )
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = "Stock Movement"
+        verbose_name_plural = "Stock Movements"
+        ordering = ["-created_at", "-id"]
+        indexes = [models.Index(fields=["item", "created_at"])]
+
+    def __str__(self):
+        return f"{self.item.sku}: {self.quantity:+d} ({self.get_reason_display()})"
+
+
+# ---------------------------------------
+# Demand Forecast
+# ---------------------------------------
+class DemandForecast(models.Model):
+    """
+    Latest demand forecast for an inventory item, replaced in bulk by
+    `python manage.py forecast_demand`. Daily demand comes from simple
+    exponential smoothing, or from Croston's method when demand is
+    intermittent. Items with no outbound movements are forecast from their
+    receipts instead and marked RECEIPTS; those are never applied as
+    reorder levels.
+    """
+    METHODS = [
+        ("SES", "Exponential Smoothing"),
+        ("CROSTON", "Croston (intermittent)"),
+        ("RECEIPTS", "Receipts only (no outbound history)"),
+        ("NONE", "No demand history"),
+    ]
+
+    item = models.OneToOneField(InventoryItem, on_delete=models.CASCADE, related_name="forecast")
+    method = models.CharField(max_length=10, choices=METHODS)
+    daily_demand = models.FloatField(default=0)
+    demand_std = models.FloatField(default=0)
+    lead_time_days = models.FloatField(default=0)
+    recommended_reorder_level = models.PositiveIntegerField(default=0)
+    days_of_cover = models.FloatField(
+        null=True, blank=True, help_text="Days the current stock lasts at the forecast demand (empty: no demand)"
+    )
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Demand Forecast"
+        verbose_name_plural = "Demand Forecasts"
+        indexes = [models.Index(fields=["days_of_cover"])]
+
+    def __str__(self):
+        return f"{self.item.sku}: {self.daily_demand:.2f}/day ({self.method})"
+
+
 # ---------------------------------------
 # Decision Recommendation
 # ---------------------------------------
@@ -389,6 +771,7 @@ class DecisionRecommendation(models.Model):
         ('performance', 'Performance'),
         ('inventory', 'Inventory'),
         ('sentiment', 'Sentiment'),
+        ('strategy', 'Strategic AI Analysis'),
     ]
 
     report_type = models.CharField(max_length=50, choices=REPORT_TYPE)
@@ -399,6 +782,8 @@ class DecisionRecommendation(models.Model):
     recommended_actions = models.TextField()
     confidence_level = models.FloatField()
     generated_by = models.CharField(max_length=100)
+    # sha256 of the KPI snapshot an AI insight was generated from
+    snapshot_hash = models.CharField(max_length=64, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -409,6 +794,27 @@ class DecisionRecommendation(models.Model):
         return self.title
 
 
+# ---------------------------------------
+# AI Insight Refresh Claim
+# ---------------------------------------
+class AiInsightClaim(models.Model):
+    """
+    One row per KPI snapshot hash whose AI insight is being generated. The
+    unique hash lets a single process win the claim; a claim older than
+    AI_INSIGHTS_RETRY_AFTER belongs to a failed generation and may be
+    taken over.
+    """
+    snapshot_hash = models.CharField(max_length=64, unique=True)
+    claimed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "AI Insight Claim"
+        verbose_name_plural = "AI Insight Claims"
+
+    def __str__(self):
+        return self.snapshot_hash[:12]
+
+
 # ---------------------------------------
 # Benchmark
 # ---------------------------------------
@@ -501,6 +907,82 @@ class MarketIndicator(models.Model):
         return f"{self.indicator_name} - {self.recorded_date}"
 
 
+# ---------------------------------------
+# Order Number Sequence
+# ---------------------------------------
+class OrderSequence(models.Model):
+    """
+    Last order number handed out per year. Numbers are reserved with a
+    single atomic UPDATE, so concurrent saves never pick the same one and
+    bulk inserts can take a whole block at once.
+    """
+    year = models.PositiveIntegerField(unique=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Order Sequence"
+        verbose_name_plural = "Order Sequences"
+
+    def __str__(self):
+        return f"ORD-{self.year}: {self.last_value}"
+
+    @classmethod
+    def _increment(cls, year, count):
+        """Add `count` to the year's counter and return the new value, or None if there is no row yet."""
+        if connection.vendor == "postgresql" or (connection.vendor == "sqlite" and sqlite3.sqlite_version_info >= (3, 35)):
+            # UPDATE ... RETURNING: one round trip
+            table, column = connection.ops.quote_name(cls._meta.db_table), connection.ops.quote_name("last_value")
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {table} SET {column} = {column} + %s WHERE year = %s RETURNING {column}",
+                    [count, year],
+                )
+                row = cursor.fetchone()
+            return row[0] if row else None
+
+        # The row lock taken by the UPDATE is held until the SELECT has read it
+        with transaction.atomic():
+            if not cls.objects.filter(year=year).update(last_value=models.F("last_value") + count):
+                return None
+            return cls.objects.filter(year=year).values_list("last_value", flat=True).get()
+
+    @classmethod
+    def reserve(cls, year, count=1):
+        """Reserve `count` consecutive numbers for `year` and return the first."""
+        last = cls._increment(year, count)
+        if last is None:
+            # First order of the year: continue after any numbers already in use
+            existing = (
+                Order.objects.filter(order_number__startswith=f"ORD-{year}-")
+                .order_by("-order_number").values_list("order_number", flat=True).first()
+            )
+            try:
+                start = int(existing.split("-")[-1]) if existing else 0
+            except ValueError:
+                start = 0
+            try:
+                with transaction.atomic():
+                    last = cls.objects.create(year=year, last_value=start + count).last_value
+            except IntegrityError:
+                # Another process created the year's row first
+                last = cls._increment(year, count)
+        return last - count + 1
+
+
+class OrderManager(models.Manager):
+    def bulk_create(self, objs, *args, **kwargs):
+        """Number and total the orders (one reserved block per year), then insert them."""
+        objs = list(objs)
+        year = timezone.now().year
+        unnumbered = [order for order in objs if not order.order_number]
+        if unnumbered:
+            first = OrderSequence.reserve(year, len(unnumbered))
+            for seq, order in enumerate(unnumbered, start=first):
+                order.order_number = Order.format_number(year, seq)
+        for order in objs:
+            order.total_cost = order.quantity_ordered * order.unit_cost
+        return super().bulk_create(objs, *args, **kwargs)
+
 
 class Order(models.Model):
     ORDER_STATUS = (
@@ -530,28 +1012,22 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
  
+    objects = OrderManager()
+ 
     class Meta:
         verbose_name = "Order"
         verbose_name_plural = "Orders"
         ordering = ["-created_at"]
  
+    @staticmethod
+    def format_number(year, seq):
+        return f"ORD-{year}-{seq:05d}"
+ 
     def save(self, *args, **kwargs):
         # Auto-generate order number on first save
         if not self.order_number:
             year = timezone.now().year
-            last = Order.objects.filter(
-                order_number__startswith=f"ORD-{year}-"
-            ).order_by("-order_number").first()
- 
-            if last:
-                try:
-                    seq = int(last.order_number.split("-")[-1]) + 1
-                except (ValueError, IndexError):
-                    seq = 1
-            else:
-                seq = 1
- 
-            self.order_number = f"ORD-{year}-{seq:05d}"
+            self.order_number = self.format_number(year, OrderSequence.reserve(year))
  
         # Auto-calculate total
         self.total_cost = self.quantity_ordered * self.unit_cost
@@ -6,15 +6,29 @@
 from django.core.mail import send_mail, EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
 from django.utils import timezone
+from datetime import timedelta
 import logging
  
+from .models import NotificationEvent
+ 
 logger = logging.getLogger(__name__)
  
  
 # ── Email subjects & recipients config ──────────────────
 NOTIFICATION_EMAILS = getattr(settings, 'SUPPLYINSIGHT_NOTIFY_EMAILS', [])
  
+# ── Digest config ───────────────────────────────────────
+# Complaints, delivery alerts and low-stock warnings are buffered per
+# recipient and kind, then sent as one digest email per window. Complaints
+# at or above `urgent_severity` skip the buffer and go out immediately.
+NOTIFICATION_DIGEST = {"enabled": True, "window": 900, "urgent_severity": 4}
+NOTIFICATION_DIGEST.update(getattr(settings, 'NOTIFICATION_DIGEST', {}))
+ 
+DIGEST_TITLES = dict(NotificationEvent.KIND_CHOICES)
+ 
  
 def send_notification_email(subject, template_name, context, recipient_list=None):
     """
@@ -60,10 +74,20 @@ def notify_new_supplier(supplier):
 def notify_complaint_logged(complaint):
     """
     Send email when a complaint is logged.
-    Urgency depends on severity.
+    Urgent complaints are sent immediately; the rest go into the digest.
     """
+    subject = f"[Complaint] {complaint.supplier.name} — Severity {complaint.severity_level}"
+    if complaint.severity_level < NOTIFICATION_DIGEST["urgent_severity"] and queue_digest_event(
+        "complaint", subject, {
+            "Supplier": complaint.supplier.name,
+            "Severity": complaint.severity_level,
+            "Description": (complaint.description or "")[:200],
+        },
+    ):
+        return
+ 
     send_notification_email(
-        subject=f"[Complaint] {complaint.supplier.name} — Severity {complaint.severity_level}",
+        subject=subject,
         template_name="emails/complaint_logged.html",
         context={
             "complaint": complaint,
@@ -81,23 +105,43 @@ def notify_delivery_recorded(delivery):
         delivery.delivery_status == 'LATE' or
         delivery.condition_status in ('DAMAGED', 'PARTIAL')
     )
-    if is_issue:
-        send_notification_email(
-            subject=f"[Delivery Alert] {delivery.supplier.name} — {delivery.delivery_status} / {delivery.condition_status}",
-            template_name="emails/delivery_alert.html",
-            context={
-                "delivery": delivery,
-                "timestamp": timezone.now(),
-            }
-        )
+    if not is_issue:
+        return
+ 
+    subject = f"[Delivery Alert] {delivery.supplier.name} — {delivery.delivery_status} / {delivery.condition_status}"
+    if queue_digest_event("delivery", subject, {
+        "Supplier": delivery.supplier.name,
+        "Order": delivery.order_number,
+        "Status": delivery.delivery_status,
+        "Condition": delivery.condition_status,
+    }):
+        return
+ 
+    send_notification_email(
+        subject=subject,
+        template_name="emails/delivery_alert.html",
+        context={
+            "delivery": delivery,
+            "timestamp": timezone.now(),
+        }
+    )
  
  
 def notify_low_stock(inventory_item):
     """
     Triggered when an inventory item falls below reorder level.
     """
+    subject = f"[Low Stock] {inventory_item.name} — {inventory_item.quantity_in_stock} units remaining"
+    if queue_digest_event("low_stock", subject, {
+        "Item": inventory_item.name,
+        "SKU": inventory_item.sku,
+        "In stock": inventory_item.quantity_in_stock,
+        "Reorder level": inventory_item.reorder_level,
+    }):
+        return
+ 
     send_notification_email(
-        subject=f"[Low Stock] {inventory_item.name} — {inventory_item.quantity_in_stock} units remaining",
+        subject=subject,
         template_name="emails/low_stock.html",
         context={
             "item": inventory_item,
@@ -106,6 +150,73 @@ def notify_low_stock(inventory_item):
     )
  
  
+# ── Digests ─────────────────────────────────────────────
+ 
+def queue_digest_event(kind, subject, details, recipient_list=None):
+    """
+    Buffer a notification for the next digest, one row per recipient.
+    Returns False when digests are off or nobody is configured, so the
+    caller can fall back to an immediate email.
+    """
+    if recipient_list is None:
+        recipient_list = NOTIFICATION_EMAILS
+ 
+    if not NOTIFICATION_DIGEST["enabled"] or not recipient_list:
+        return False
+ 
+    now = timezone.now()
+    NotificationEvent.objects.bulk_create([
+        NotificationEvent(kind=kind, recipient=r, subject=subject, details=details, created_at=now)
+        for r in recipient_list
+    ])
+    return True
+ 
+ 
+def flush_digests(force=False):
+    """
+    Render one digest per (recipient, kind) whose oldest buffered event is
+    older than the window, and queue it in the email outbox. `force` sends
+    everything buffered regardless of age. Returns the number of digests.
+    """
+    from .services.email_outbox import queue_html_email
+ 
+    pending = NotificationEvent.objects.filter(digested_at__isnull=True)
+    groups = pending.values("recipient", "kind").annotate(first=Min("created_at"))
+    if not force:
+        groups = groups.filter(first__lte=timezone.now() - timedelta(seconds=NOTIFICATION_DIGEST["window"]))
+ 
+    sent = 0
+    for group in groups:
+        with transaction.atomic():
+            events = list(
+                pending.select_for_update()
+                .filter(recipient=group["recipient"], kind=group["kind"])
+                .order_by("created_at", "id")
+            )
+            if not events:
+                continue
+ 
+            title = DIGEST_TITLES.get(group["kind"], group["kind"])
+            queue_html_email(
+                subject=f"[Digest] {len(events)} × {title}",
+                template_name="emails/digest.html",
+                context={
+                    "title": title,
+                    "events": events,
+                    "window_start": events[0].created_at,
+                    "window_end": events[-1].created_at,
+                    "year": timezone.now().year,
+                },
+                recipient_list=[group["recipient"]],
+            )
+            NotificationEvent.objects.filter(pk__in=[e.pk for e in events]).update(digested_at=timezone.now())
+            sent += 1
+ 
+    if sent:
+        logger.info(f"Queued {sent} notification digests")
+    return sent
+ 
+ 
 # ── Base email HTML template (inline) ───────────────────
 # Save as: templates/emails/base_email.html
  
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from app.models import AiInsightClaim, DecisionRecommendation
+from app.services.llm import OPENROUTER_MODEL, cache_evict, complete, get_backend
+
+logger = logging.getLogger(__name__)
+
+INSIGHT_REPORT_TYPE = "strategy"
+
+# A failed or still-running generation is not retried for this many seconds
+RETRY_AFTER = getattr(settings, "AI_INSIGHTS_RETRY_AFTER", 300)
+
+EMPTY_INSIGHTS = {"summary": "", "risks": [], "opportunities": [], "actions": []}
+
+
+# ─────────────────────────────────────────────
+# MODEL CALLS
+# ─────────────────────────────────────────────
+
+def ai_available() -> bool:
+    return get_backend().available
+
+
+def call_openrouter(system_prompt: str, user_prompt: str, max_tokens: int = 900) -> str:
+    return complete(system_prompt, user_prompt, model=OPENROUTER_MODEL, max_tokens=max_tokens)
+
+
+INSIGHTS_SYSTEM_PROMPT = (
+    "You are an expert supply-chain and restaurant operations analyst.\n"
+    "Return ONLY valid JSON. No markdown, no explanations, no code blocks.\n\n"
+    'Format EXACTLY: {"summary":"text","risks":["...","..."],"opportunities":["...","..."],"actions":["...","...","..."]}'
+)
+INSIGHTS_MAX_TOKENS = 700
+
+PARSE_ERROR_INSIGHTS = {
+    "summary": "AI response could not be structured properly.", "risks": [], "opportunities": [], "actions": [],
+}
+
+
+def _insights_prompt(snapshot: dict) -> str:
+    return f"Here is today's KPI snapshot:\n{json.dumps(snapshot, indent=2)}\n\nProvide a concise strategic analysis."
+
+
+def parse_insights(raw: str):
+    """The summary / risks / opportunities / actions in a model reply, or None if it holds no usable JSON."""
+    if not raw:
+        return None
+    try:
+        text = re.sub(r"^```json\s*|^```|```$", "", raw.strip())
+        match = re.search(r"\{.*\}", text, re.DOTALL)
+        if not match:
+            raise ValueError("No JSON found")
+        parsed = json.loads(match.group(0))
+        return {k: parsed.get(k, [] if k != "summary" else "") for k in ("summary", "risks", "opportunities", "actions")}
+    except Exception as e:
+        logger.error("AI parse error: %s", e)
+        return None
+
+
+def get_ai_insights(snapshot: dict) -> dict:
+    raw = call_openrouter(INSIGHTS_SYSTEM_PROMPT, _insights_prompt(snapshot), max_tokens=INSIGHTS_MAX_TOKENS)
+    parsed = parse_insights(raw)
+    if parsed is None:
+        return dict(PARSE_ERROR_INSIGHTS if raw else EMPTY_INSIGHTS)
+    return parsed
+
+
+# ─────────────────────────────────────────────
+# STORED INSIGHTS (STALE-WHILE-REVALIDATE)
+# ─────────────────────────────────────────────
+
+def snapshot_hash(snapshot: dict) -> str:
+    return hashlib.sha256(json.dumps(snapshot, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def insights_from(recommendation) -> dict:
+    """Unpack the summary / risks / opportunities / actions stored on a row."""
+    if recommendation is None:
+        return dict(EMPTY_INSIGHTS)
+    try:
+        stored = json.loads(recommendation.insights)
+    except ValueError:
+        stored = {}
+    return {
+        "summary":       recommendation.description,
+        "risks":         stored.get("risks", []),
+        "opportunities": stored.get("opportunities", []),
+        "actions":       [a for a in recommendation.recommended_actions.splitlines() if a],
+    }
+
+
+def refresh_insights(snapshot: dict, digest: str = None):
+    """
+    Generate and store insights for `snapshot` unless a row for its hash
+    already exists. Returns the row, or None when the model gave nothing
+    usable back: nothing is stored and a malformed reply is evicted from
+    the response cache, so the next refresh asks again.
+    """
+    digest = digest or snapshot_hash(snapshot)
+    existing = DecisionRecommendation.objects.filter(
+        report_type=INSIGHT_REPORT_TYPE, snapshot_hash=digest,
+    ).order_by("-created_at").first()
+    if existing is not None:
+        return existing
+
+    prompt = _insights_prompt(snapshot)
+    raw = call_openrouter(INSIGHTS_SYSTEM_PROMPT, prompt, max_tokens=INSIGHTS_MAX_TOKENS)
+    ai = parse_insights(raw)
+    if ai is None or not ai["summary"]:
+        if raw:
+            # A malformed reply would otherwise be served from the response cache on every retry
+            cache_evict(INSIGHTS_SYSTEM_PROMPT, prompt, OPENROUTER_MODEL, INSIGHTS_MAX_TOKENS)
+        return None
+
+    return DecisionRecommendation.objects.create(
+        report_type=INSIGHT_REPORT_TYPE,
+        title="Strategic AI Analysis",
+        description=ai["summary"],
+        key_metrics=snapshot,
+        insights=json.dumps({"risks": ai["risks"], "opportunities": ai["opportunities"]}),
+        recommended_actions="\n".join(str(a) for a in ai["actions"]),
+        confidence_level=0,
+        generated_by=f"OpenRouter · {OPENROUTER_MODEL}",
+        snapshot_hash=digest,
+    )
+
+
+def claim_refresh(digest: str) -> bool:
+    """
+    Claim the generation for `digest` across every process sharing the
+    database: the unique hash lets one INSERT win, and a claim older than
+    RETRY_AFTER is taken over by a conditional UPDATE only one caller can
+    match.
+    """
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            AiInsightClaim.objects.create(snapshot_hash=digest, claimed_at=now)
+        return True
+    except IntegrityError:
+        pass
+    cutoff = now - timedelta(seconds=RETRY_AFTER)
+    return AiInsightClaim.objects.filter(snapshot_hash=digest, claimed_at__lt=cutoff).update(claimed_at=now) == 1
+
+
+def _refresh_in_background(snapshot, digest):
+    try:
+        if refresh_insights(snapshot, digest) is not None:
+            # Done: drop this claim and any expired ones. A failed claim is
+            # kept so the hash backs off for RETRY_AFTER seconds.
+            cutoff = timezone.now() - timedelta(seconds=RETRY_AFTER)
+            AiInsightClaim.objects.filter(snapshot_hash=digest).delete()
+            AiInsightClaim.objects.filter(claimed_at__lt=cutoff).delete()
+    except Exception:
+        logger.exception("AI insight refresh failed")
+    finally:
+        connection.close()
+
+
+def schedule_refresh(snapshot: dict, digest: str) -> bool:
+    """
+    Start a background generation for `digest` if this process wins the
+    claim, so one generation per hash is in flight across all workers.
+    """
+    if not claim_refresh(digest):
+        return False
+    threading.Thread(
+        target=_refresh_in_background, args=(snapshot, digest),
+        name="ai-insights-refresh", daemon=True,
+    ).start()
+    return True
+
+
+def latest_insights(snapshot: dict):
+    """
+    Return (latest stored insight row or None, is_stale). The row is served
+    as-is; when its hash differs from the current snapshot a background
+    refresh is scheduled and the page picks it up on a later view.
+    """
+    digest = snapshot_hash(snapshot)
+    latest = (
+        DecisionRecommendation.objects
+        .filter(report_type=INSIGHT_REPORT_TYPE)
+        .order_by("-created_at", "-id")
+        .first()
+    )
+    is_stale = latest is None or latest.snapshot_hash != digest
+    if is_stale and ai_available():
+        schedule_refresh(snapshot, digest)
+    return latest, is_stale
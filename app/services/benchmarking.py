@@ -0,0 +1,174 @@
+import re
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from app.models import Benchmark, Complaint, Delivery, Supplier
+from app.services.supplier_scoring import complaint_aggregates, delivery_aggregates, lead_time_moments
+
+# Percentile tables are rebuilt from Benchmark rows when missing; a run
+# replaces them immediately, so the timeout only bounds memory use
+PERCENTILE_CACHE_TIMEOUT = 24 * 3600
+
+
+def _ratio(part, whole):
+    return np.divide(part, whole, out=np.zeros_like(part), where=whole > 0)
+
+
+# (metric name, higher is better, value from the period's stats arrays)
+METRICS = (
+    ("On-Time Delivery Rate", True, lambda st: 100 * _ratio(st["on_time"], st["deliveries"])),
+    ("Order Fill Rate", True, lambda st: 100 * _ratio(st["delivered"], st["ordered"])),
+    ("Damage Rate %", False, lambda st: 100 * _ratio(st["damaged"] + st["partial"], st["deliveries"])),
+    ("Lead Time Deviation (days)", False, lambda st: _ratio(st["delay_sum"], st["deliveries"])),
+    ("Complaints per 100 Deliveries", False, lambda st: 100 * _ratio(st["complaints"], st["deliveries"])),
+)
+HIGHER_IS_BETTER = {name: higher for name, higher, _ in METRICS}
+
+
+# ─────────────────────────────────────────────
+# EVALUATION PERIODS
+# ─────────────────────────────────────────────
+
+def current_period(today=None):
+    today = today or timezone.localdate()
+    return f"{today.year}-Q{(today.month - 1) // 3 + 1}"
+
+
+def period_bounds(period):
+    """[start, end) dates for "2025", "2025-Q1" or "2025-03"."""
+    match = re.fullmatch(r"(\d{4})(?:-Q([1-4])|-(\d{2}))?", period)
+    if not match:
+        raise ValueError(f"Evaluation period must look like 2025, 2025-Q1 or 2025-03, got {period!r}")
+    year, quarter, month = match.groups()
+    year = int(year)
+    if quarter:
+        first, months = (int(quarter) - 1) * 3 + 1, 3
+    elif month:
+        first, months = int(month), 1
+        if not 1 <= first <= 12:
+            raise ValueError(f"Invalid month in evaluation period {period!r}")
+    else:
+        first, months = 1, 12
+    end_month = first + months
+    end = date(year + (end_month - 1) // 12, (end_month - 1) % 12 + 1, 1)
+    return date(year, first, 1), end
+
+
+# ─────────────────────────────────────────────
+# RANKING
+# ─────────────────────────────────────────────
+
+def percentile_ranks(values, higher_is_better=True):
+    """
+    Percentile rank (0-100) of every value among all of them: the share
+    of values ranked below plus half of those tied, from one sort and two
+    binary searches over it.
+    """
+    ranked = values if higher_is_better else -values
+    ordered = np.sort(ranked)
+    below = np.searchsorted(ordered, ranked, side="left")
+    at_or_below = np.searchsorted(ordered, ranked, side="right")
+    return 100 * (below + at_or_below) / (2 * len(values))
+
+
+def benchmark_scores(values, higher_is_better=True):
+    """0-100 from the standard score: 50 at the industry average, 0/100 at two standard deviations."""
+    std = values.std()
+    z = (values - values.mean()) / std if std else np.zeros_like(values)
+    if not higher_is_better:
+        z = -z
+    return 50 + 25 * np.clip(z, -2, 2)
+
+
+def period_stats(period):
+    """Supplier ids with deliveries in the period, and their stats arrays."""
+    start, end = period_bounds(period)
+    ids = np.array(sorted(Supplier.objects.values_list("id", flat=True)), dtype=np.int64)
+    if not len(ids):
+        return ids, {}
+
+    deliveries = Delivery.objects.filter(actual_delivery_date__gte=start, actual_delivery_date__lt=end)
+    complaints = Complaint.objects.filter(created_at__date__gte=start, created_at__date__lt=end)
+    stats = delivery_aggregates(ids, deliveries)
+    stats.update(lead_time_moments(ids, deliveries))
+    stats.update(complaint_aggregates(ids, complaints))
+
+    active = stats["deliveries"] > 0
+    return ids[active], {field: values[active] for field, values in stats.items()}
+
+
+def run_benchmarks(period, batch_size=1000):
+    """
+    Replace the period's Benchmark rows with fresh ones: every metric for
+    every supplier that delivered in the period, with the industry average,
+    percentile rank and benchmark score computed over all of them at once.
+    Returns the number of rows written.
+    """
+    ids, stats = period_stats(period)
+    rows, table = [], {}
+    for name, higher, metric in METRICS:
+        if not len(ids):
+            break
+        # Ranked at the stored precision so the cached table matches the rows
+        values = metric(stats).round(2)
+        average = float(values.mean())
+        ranks = percentile_ranks(values, higher)
+        scores = benchmark_scores(values, higher)
+        table[name] = np.sort(values).tolist()
+
+        note = f"{len(ids)} suppliers in {period}; {'higher' if higher else 'lower'} is better."
+        rows.extend(
+            Benchmark(
+                supplier_id=int(pk), metric_name=name, metric_value=value,
+                industry_average=round(average, 2), percentile_rank=round(rank, 2),
+                benchmark_score=round(score, 2), evaluation_period=period, notes=note,
+            )
+            for pk, value, rank, score in zip(ids, values.tolist(), ranks.tolist(), scores.tolist())
+        )
+
+    with transaction.atomic():
+        Benchmark.objects.filter(evaluation_period=period).delete()
+        Benchmark.objects.bulk_create(rows, batch_size=batch_size)
+    cache.set(_cache_key(period), table, PERCENTILE_CACHE_TIMEOUT)
+    return len(rows)
+
+
+# ─────────────────────────────────────────────
+# PERCENTILE LOOKUP
+# ─────────────────────────────────────────────
+
+def _cache_key(period):
+    return f"benchmarks:percentiles:{period}"
+
+
+def percentile_table(period):
+    """{metric name: sorted values} for a period, cached between calls."""
+    table = cache.get(_cache_key(period))
+    if table is None:
+        table = {}
+        rows = Benchmark.objects.filter(evaluation_period=period).values_list("metric_name", "metric_value")
+        for name, value in rows.order_by("metric_name", "metric_value"):
+            table.setdefault(name, []).append(value)
+        cache.set(_cache_key(period), table, PERCENTILE_CACHE_TIMEOUT)
+    return table
+
+
+def percentile_of(period, metric_name, value):
+    """
+    Percentile rank a value would get against the period's benchmarked
+    suppliers (same tie rule as run_benchmarks), by binary search over the
+    cached sorted values. None when the period has no data for the metric.
+    """
+    values = percentile_table(period).get(metric_name)
+    if not values:
+        return None
+    below, at_or_below = bisect_left(values, value), bisect_right(values, value)
+    if not HIGHER_IS_BETTER.get(metric_name, True):
+        below, at_or_below = len(values) - at_or_below, len(values) - below
+    # The value joins the population, counting as tied with itself
+    return 100 * (below + at_or_below + 1) / (2 * (len(values) + 1))
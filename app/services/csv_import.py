@@ -0,0 +1,271 @@
+import csv
+import time
+
+from django.db import transaction
+
+from app.models import Delivery, Order, Supplier
+from app.services.kpi_snapshot import mark_dirty
+from app.services.stock import receive_many
+from app.services.supplier_scoring import record_deliveries
+
+ORDER_STATUSES = {code for code, _ in Order.ORDER_STATUS}
+DELIVERY_STATUSES = {code for code, _ in Delivery.DELIVERY_STATUS}
+CONDITION_STATUSES = {code for code, _ in Delivery.CONDITION_STATUS}
+
+REQUIRED_COLUMNS = {
+    "orders": (
+        "supplier_code", "product_name", "product_category", "quantity_ordered", "expected_delivery_date",
+    ),
+    "deliveries": (
+        "supplier_code", "order_number", "invoice_number", "product_category", "quantity_ordered",
+        "quantity_delivered", "expected_delivery_date", "actual_delivery_date", "condition_status",
+    ),
+}
+OPTIONAL_COLUMNS = {
+    "orders": ("order_number", "sku", "unit_cost", "status", "notes"),
+    "deliveries": (
+        "delivery_status", "documentation_complete", "vehicle_registration", "driver_name", "sku", "product_name",
+    ),
+}
+IMPORT_KINDS = tuple(REQUIRED_COLUMNS)
+
+
+class CsvImportError(Exception):
+    """The file as a whole cannot be imported (unknown kind, missing columns)."""
+
+
+# ─────────────────────────────────────────────
+# VALIDATION (one chunk at a time, column-wise)
+# ─────────────────────────────────────────────
+
+class _Checker:
+    """Parses the columns of one pandas chunk, keeping the first error per row."""
+
+    def __init__(self, df, pd):
+        self.df = df
+        self.pd = pd
+        self.errors = pd.Series("", index=df.index)
+
+    def fail(self, mask, message):
+        self.errors[mask & (self.errors == "")] = message
+
+    def text(self, column, max_length, required=False):
+        values = self.df[column].str.strip()
+        if required:
+            self.fail(values == "", f"{column} is required")
+        self.fail(values.str.len() > max_length, f"{column} is longer than {max_length} characters")
+        return values
+
+    def integer(self, column):
+        values = self.pd.to_numeric(self.df[column].str.strip(), errors="coerce")
+        self.fail(values.isna() | (values < 0) | (values % 1 != 0), f"{column} must be a whole number >= 0")
+        return values.fillna(0).astype("int64")
+
+    def number(self, column, default=0):
+        raw = self.df[column].str.strip()
+        values = self.pd.to_numeric(raw.where(raw != "", str(default)), errors="coerce")
+        self.fail(values.isna() | (values < 0), f"{column} must be a number >= 0")
+        return values.fillna(0)
+
+    def date(self, column):
+        values = self.pd.to_datetime(self.df[column].str.strip(), format="%Y-%m-%d", errors="coerce")
+        self.fail(values.isna(), f"{column} must be a YYYY-MM-DD date")
+        return values
+
+    def choice(self, column, choices, default=None):
+        values = self.df[column].str.strip().str.upper()
+        if default is not None:
+            values = values.where(values != "", default)
+        self.fail(~values.isin(choices), f"{column} must be one of {', '.join(sorted(choices))}")
+        return values
+
+    def supplier(self, suppliers):
+        ids = self.df["supplier_code"].str.strip().map(suppliers)
+        self.fail(ids.isna(), "unknown supplier_code")
+        return ids.fillna(0).astype("int64")
+
+
+def _validate_orders(check, suppliers):
+    cols = {
+        "supplier_id": check.supplier(suppliers),
+        "product_name": check.text("product_name", 255, required=True),
+        "product_category": check.text("product_category", 100, required=True),
+        "sku": check.text("sku", 100),
+        "quantity_ordered": check.integer("quantity_ordered"),
+        "unit_cost": check.number("unit_cost"),
+        "expected_delivery_date": check.date("expected_delivery_date"),
+        "status": check.choice("status", ORDER_STATUSES, default="PENDING"),
+        "notes": check.df["notes"].str.strip(),
+        "order_number": check.text("order_number", 30),
+    }
+
+    # ERP order numbers must be new: unique in the file chunk and not already stored
+    numbers = cols["order_number"]
+    given = numbers != ""
+    check.fail(given & numbers.duplicated(keep="first"), "duplicate order_number in file")
+    taken = set(
+        Order.objects.filter(order_number__in=numbers[given].unique().tolist())
+        .values_list("order_number", flat=True)
+    )
+    check.fail(numbers.isin(taken), "order_number already exists")
+    return cols
+
+
+def _validate_deliveries(check, suppliers):
+    df = check.df
+    expected = check.date("expected_delivery_date")
+    actual = check.date("actual_delivery_date")
+    # A blank delivery_status is derived from the dates
+    derived = check.pd.Series("ON_TIME", index=df.index).mask(actual > expected, "LATE").mask(actual < expected, "EARLY")
+    status = df["delivery_status"].str.strip().str.upper()
+    status = status.where(status != "", derived)
+    check.fail(~status.isin(DELIVERY_STATUSES), f"delivery_status must be one of {', '.join(sorted(DELIVERY_STATUSES))}")
+
+    documentation = df["documentation_complete"].str.strip().str.lower()
+    check.fail(~documentation.isin(("", "true", "false", "yes", "no", "1", "0")), "documentation_complete must be true/false")
+
+    return {
+        "supplier_id": check.supplier(suppliers),
+        "order_number": check.text("order_number", 100, required=True),
+        "invoice_number": check.text("invoice_number", 100, required=True),
+        "product_category": check.text("product_category", 255, required=True),
+        "quantity_ordered": check.integer("quantity_ordered"),
+        "quantity_delivered": check.integer("quantity_delivered"),
+        "expected_delivery_date": expected,
+        "actual_delivery_date": actual,
+        "delivery_status": status,
+        "condition_status": check.choice("condition_status", CONDITION_STATUSES),
+        "documentation_complete": ~documentation.isin(("false", "no", "0")),
+        "vehicle_registration": check.text("vehicle_registration", 20),
+        "driver_name": check.text("driver_name", 255),
+        "sku": check.text("sku", 100),
+        "product_name": check.text("product_name", 255),
+    }
+
+
+# ─────────────────────────────────────────────
+# WRITES
+# ─────────────────────────────────────────────
+
+def _records(cols, valid):
+    """Valid rows as dicts of plain Python values."""
+    columns = {}
+    for name, series in cols.items():
+        series = series[valid]
+        if name.endswith("_date"):
+            series = series.dt.date
+        columns[name] = series.tolist()
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def _write_orders(records):
+    Order.objects.bulk_create([
+        Order(
+            order_number=r["order_number"], supplier_id=r["supplier_id"], product_name=r["product_name"],
+            product_category=r["product_category"], sku=r["sku"] or None,
+            quantity_ordered=r["quantity_ordered"], unit_cost=round(r["unit_cost"], 2),
+            expected_delivery_date=r["expected_delivery_date"], status=r["status"], notes=r["notes"] or None,
+        )
+        for r in records
+    ])
+    return 0
+
+
+def _write_deliveries(records):
+    deliveries = Delivery.objects.bulk_create([
+        Delivery(
+            supplier_id=r["supplier_id"], order_number=r["order_number"], invoice_number=r["invoice_number"],
+            product_category=r["product_category"], quantity_ordered=r["quantity_ordered"],
+            quantity_delivered=r["quantity_delivered"], expected_delivery_date=r["expected_delivery_date"],
+            actual_delivery_date=r["actual_delivery_date"], delivery_status=r["delivery_status"],
+            condition_status=r["condition_status"], documentation_complete=r["documentation_complete"],
+            vehicle_registration=r["vehicle_registration"] or None, driver_name=r["driver_name"] or None,
+        )
+        for r in records
+    ])
+    # Score stats, delay histograms and scores of the chunk's suppliers, as record_event would
+    record_deliveries(deliveries)
+    # One set-based stock update and ledger insert for the whole chunk
+    return receive_many([
+        {
+            "supplier_id": r["supplier_id"], "sku": r["sku"], "quantity": r["quantity_delivered"],
+            "name": r["product_name"], "category": r["product_category"], "delivery": delivery,
+        }
+        for r, delivery in zip(records, deliveries)
+    ])
+
+
+VALIDATORS = {"orders": _validate_orders, "deliveries": _validate_deliveries}
+WRITERS = {"orders": _write_orders, "deliveries": _write_deliveries}
+
+
+# ─────────────────────────────────────────────
+# DRIVER
+# ─────────────────────────────────────────────
+
+def import_csv(kind, source, chunk_size=5000, rejects=None, progress=None):
+    """
+    Stream an ERP export of orders or deliveries into the database.
+
+    `source` is a path or text file object. It is read `chunk_size` rows at
+    a time; each chunk is validated column-wise, its good rows written with
+    bulk_create in one transaction, and for deliveries the inventory is
+    restocked set-wise with a stock ledger row per delivery and the
+    suppliers' score stats and scores are brought up to date. Bad rows are
+    written to the `rejects` text file (the original columns plus
+    `error`). `progress(stats)` is called after every chunk. Returns the
+    run statistics.
+    """
+    import pandas as pd
+
+    if kind not in VALIDATORS:
+        raise CsvImportError(f"kind must be one of {IMPORT_KINDS}, got {kind!r}")
+
+    suppliers = dict(Supplier.objects.values_list("supplier_code", "id"))
+    stats = {"kind": kind, "rows": 0, "imported": 0, "rejected": 0, "inventory_items": 0}
+    reject_writer = None
+    start = time.perf_counter()
+
+    reader = pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=chunk_size, skipinitialspace=True)
+    for chunk in reader:
+        chunk.columns = [str(c).strip().lower() for c in chunk.columns]
+        missing = [c for c in REQUIRED_COLUMNS[kind] if c not in chunk.columns]
+        if missing:
+            raise CsvImportError(f"Missing required column(s): {', '.join(missing)}")
+        source_columns = list(chunk.columns)
+        for column in OPTIONAL_COLUMNS[kind]:
+            if column not in chunk.columns:
+                chunk[column] = ""
+
+        check = _Checker(chunk, pd)
+        cols = VALIDATORS[kind](check, suppliers)
+        valid = check.errors == ""
+
+        records = _records(cols, valid)
+        if records:
+            with transaction.atomic():
+                stats["inventory_items"] += WRITERS[kind](records)
+
+        bad = chunk.loc[~valid, source_columns]
+        if rejects is not None and len(bad):
+            if reject_writer is None:
+                reject_writer = csv.writer(rejects)
+                reject_writer.writerow(source_columns + ["error"])
+            reject_writer.writerows(
+                row + [error] for row, error in zip(bad.values.tolist(), check.errors[~valid].tolist())
+            )
+
+        stats["rows"] += len(chunk)
+        stats["imported"] += len(records)
+        stats["rejected"] += len(bad)
+        stats["seconds"] = time.perf_counter() - start
+        stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0
+        if progress:
+            progress(stats)
+
+    stats.setdefault("seconds", time.perf_counter() - start)
+    stats.setdefault("rows_per_sec", 0)
+    if kind == "deliveries" and stats["imported"]:
+        # bulk_create and bulk_update skip the post_save signals that invalidate KPIs
+        mark_dirty("deliveries", "performance")
+    return stats
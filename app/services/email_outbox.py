@@ -0,0 +1,140 @@
+import logging
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from app.models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def _outbox_options():
+    options = {"batch_size": 50, "max_attempts": 5, "backoff": 60, "max_backoff": 3600, "claim_timeout": 600}
+    options.update(getattr(settings, "EMAIL_OUTBOX", {}) or {})
+    return options
+
+
+# ─────────────────────────────────────────────
+# ENQUEUE
+# ─────────────────────────────────────────────
+
+def queue_html_email(subject, template_name, context, recipient_list):
+    """
+    Render an HTML email and store it in the outbox. Call it inside the
+    transaction that writes the record the email is about, so the email is
+    queued if and only if that record is committed.
+    """
+    html_body = render_to_string(template_name, context)
+    # Plain-text fallback (strip tags crudely)
+    text_body = re.sub(r"<[^>]+>", " ", html_body)
+
+    return EmailOutbox.objects.create(
+        subject=subject,
+        from_email=getattr(settings, "DEFAULT_FROM_EMAIL", "noreply@kpifastfood.app"),
+        recipients=[r for r in recipient_list if r],
+        text_body=text_body,
+        html_body=html_body,
+        template_name=template_name,
+    )
+
+
+# ─────────────────────────────────────────────
+# DRAIN
+# ─────────────────────────────────────────────
+
+def _message(row, connection):
+    msg = EmailMultiAlternatives(row.subject, row.text_body, row.from_email, row.recipients, connection=connection)
+    if row.html_body:
+        msg.attach_alternative(row.html_body, "text/html")
+    return msg
+
+
+def _mark_failed_attempt(row, error, options):
+    row.attempts += 1
+    row.last_error = str(error)[:2000]
+    if row.attempts >= options["max_attempts"]:
+        row.status = "failed"
+        logger.error("Email %s gave up after %s attempts: %s", row.pk, row.attempts, error)
+    else:
+        delay = min(options["backoff"] * 2 ** (row.attempts - 1), options["max_backoff"])
+        row.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+    row.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+
+
+def _claim(cutoff, batch_size, options):
+    """
+    Take up to `batch_size` due rows for this worker in a short transaction:
+    their next_attempt_at moves `claim_timeout` seconds ahead, so parallel
+    workers (and later loops of this one) skip them while they are sent. A
+    worker that dies mid-send leaves its rows to be retried after that.
+    """
+    with transaction.atomic():
+        rows = list(
+            EmailOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=cutoff)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if rows:
+            EmailOutbox.objects.filter(pk__in=[row.pk for row in rows]).update(
+                next_attempt_at=timezone.now() + timedelta(seconds=options["claim_timeout"]),
+            )
+    return rows
+
+
+def _send_batch(rows, connection, options):
+    """
+    Send claimed rows one message at a time, recording each outcome as
+    soon as it is known so a later failure never resends a delivered
+    message. After a failure the connection is reopened, since the server
+    may have dropped it; if that fails the rest of the rows stay claimed
+    and are retried after `claim_timeout`.
+    """
+    sent = failed = 0
+    for row in rows:
+        try:
+            connection.send_messages([_message(row, connection)])
+        except Exception as e:
+            logger.warning("Email %s failed: %s", row.pk, e)
+            _mark_failed_attempt(row, e, options)
+            failed += 1
+            connection.close()
+            connection.open()
+            continue
+        EmailOutbox.objects.filter(pk=row.pk).update(status="sent", sent_at=timezone.now(), attempts=F("attempts") + 1)
+        sent += 1
+    return sent, failed
+
+
+def drain_outbox(batch_size=None, connection=None):
+    """
+    Send every due outbox row over one SMTP connection. Rows are claimed
+    `batch_size` at a time in a short transaction and sent outside it, so
+    no database lock is held during SMTP I/O. Failed rows back off
+    exponentially until `max_attempts`. Returns (sent, failed) counts.
+    """
+    options = _outbox_options()
+    batch_size = batch_size or options["batch_size"]
+    connection = connection or get_connection(fail_silently=False)
+    # Rows that fail during this run are rescheduled past the cutoff
+    cutoff = timezone.now()
+
+    sent = failed = 0
+    connection.open()
+    try:
+        while True:
+            rows = _claim(cutoff, batch_size, options)
+            if not rows:
+                break
+            batch_sent, batch_failed = _send_batch(rows, connection, options)
+            sent += batch_sent
+            failed += batch_failed
+    finally:
+        connection.close()
+    return sent, failed
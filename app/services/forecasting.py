@@ -0,0 +1,225 @@
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from app.models import DemandForecast, InventoryItem, StockMovement, Supplier
+from app.services.kpi_snapshot import mark_dirty
+from app.services.low_stock import refresh_low_stock
+from app.services.supplier_scoring import delivery_aggregates, lead_time_moments
+
+# Forecasts from outbound demand; only these may overwrite reorder levels
+DEMAND_METHODS = ("SES", "CROSTON")
+
+# Syntetos-Boylan cut-off: above this average interval between demands
+# (in days) a series is intermittent and forecast with Croston's method
+INTERMITTENT_ADI = 1.32
+
+
+def _options():
+    options = {"history_days": 90, "alpha": 0.2, "lead_time_days": 7, "service_z": 1.65}
+    options.update(getattr(settings, "DEMAND_FORECAST", {}) or {})
+    return options
+
+
+class LedgerDay(TruncDate):
+    """
+    TruncDate, except on SQLite with a UTC time zone, where timestamps are
+    already stored as UTC text and the built-in date() avoids calling a
+    Python function for every ledger row.
+    """
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        if self.get_tzname() == "UTC":
+            sql, params = compiler.compile(self.lhs)
+            return f"date({sql})", params
+        return self.as_sql(compiler, connection, **extra_context)
+
+
+def _positions(ids, values):
+    """Index of each value in the sorted `ids`, and a mask of values found there."""
+    values = np.asarray(values, dtype=np.int64)
+    index = np.minimum(np.searchsorted(ids, values), len(ids) - 1)
+    return index, ids[index] == values
+
+
+# ─────────────────────────────────────────────
+# DEMAND SERIES
+# ─────────────────────────────────────────────
+
+def demand_matrix(item_ids, start, days):
+    """
+    (items, days) array of units consumed per item per day from the
+    `start` date, built from the stock ledger summed per item and day in
+    the database, and a mask of the items with outbound movements.
+    Outbound movements are demand; items that have none fall back to
+    their receipts (deliveries and imports), i.e. what had to be
+    replenished.
+    """
+    shape = (len(item_ids), days)
+    outbound, inbound = np.zeros(shape), np.zeros(shape)
+    rows = list(
+        StockMovement.objects.filter(created_at__gte=timezone.make_aware(datetime.combine(start, time.min)))
+        .annotate(day=LedgerDay("created_at"))
+        .values_list("item_id", "day")
+        .annotate(
+            issued=Sum("quantity", filter=Q(quantity__lt=0)),
+            received=Sum("quantity", filter=Q(quantity__gt=0)),
+        )
+        .order_by()
+    )
+    if rows and len(item_ids):
+        items, day, issued, received = zip(*rows)
+        index, known = _positions(item_ids, items)
+        offset = (np.array(day, dtype="datetime64[D]") - np.datetime64(start, "D")).astype(np.int64)
+        keep = known & (offset >= 0) & (offset < days)
+        cells = (index[keep], offset[keep])
+        np.add.at(outbound, cells, -np.array([v or 0 for v in issued], dtype=float)[keep])
+        np.add.at(inbound, cells, np.array([v or 0 for v in received], dtype=float)[keep])
+    has_outbound = outbound.any(axis=1)
+    return np.where(has_outbound[:, None], outbound, inbound), has_outbound
+
+
+# ─────────────────────────────────────────────
+# FORECASTING (every SKU at once; loops run over days, not items)
+# ─────────────────────────────────────────────
+
+def exponential_smoothing(demand, alpha):
+    """
+    Simple exponential smoothing of every row. Returns the final level
+    (the forecast per day) and the RMSE of the one-step-ahead errors.
+    """
+    level = demand[:, 0].astype(float)
+    squared_error = np.zeros(len(demand))
+    for t in range(1, demand.shape[1]):
+        error = demand[:, t] - level
+        squared_error += error ** 2
+        level += alpha * error
+    return level, np.sqrt(squared_error / max(demand.shape[1] - 1, 1))
+
+
+def croston(demand, alpha):
+    """
+    Croston's method with the Syntetos-Boylan bias correction, for every
+    row: demand sizes and the intervals between demands are smoothed
+    separately, and the forecast per day is their ratio. Rows without
+    any demand forecast 0.
+    """
+    items, days = demand.shape
+    nonzero = demand > 0
+    first = nonzero.argmax(axis=1)
+    size = demand[np.arange(items), first].astype(float)
+    interval = (first + 1).astype(float)
+    since = np.ones(items)
+    for t in range(days):
+        observed = nonzero[:, t]
+        update = observed & (t > first)
+        size[update] += alpha * (demand[update, t] - size[update])
+        interval[update] += alpha * (since[update] - interval[update])
+        since = np.where(observed, 1, since + 1)
+    return np.where(nonzero.any(axis=1), (1 - alpha / 2) * size / interval, 0.0)
+
+
+def forecast(demand, alpha):
+    """
+    Daily demand forecast, its standard deviation and the method per row:
+    Croston for intermittent series, exponential smoothing otherwise.
+    """
+    days = demand.shape[1]
+    demand_days = (demand > 0).sum(axis=1)
+    intermittent = days / np.maximum(demand_days, 1) > INTERMITTENT_ADI
+
+    level, rmse = exponential_smoothing(demand, alpha)
+    rate = np.where(intermittent, croston(demand, alpha), np.maximum(level, 0))
+    std = np.where(intermittent, demand.std(axis=1), rmse)
+    methods = np.select([demand_days == 0, intermittent], ["NONE", "CROSTON"], default="SES")
+    return rate, std, methods
+
+
+def reorder_points(rate, std, lead_time, service_z):
+    """Demand over the lead time plus safety stock for the service level."""
+    return np.ceil(rate * lead_time + service_z * std * np.sqrt(lead_time)).astype(np.int64)
+
+
+def supplier_lead_times(supplier_ids, base_days):
+    """Base lead time plus each supplier's average lateness (early deliveries do not shorten it)."""
+    ids = np.array(sorted(Supplier.objects.values_list("id", flat=True)), dtype=np.int64)
+    lead_time = np.full(len(supplier_ids), float(base_days))
+    if not len(ids):
+        return lead_time
+    deliveries = delivery_aggregates(ids)["deliveries"]
+    delay = np.divide(
+        lead_time_moments(ids)["delay_sum"], deliveries, out=np.zeros(len(ids)), where=deliveries > 0,
+    )
+    index, known = _positions(ids, supplier_ids)
+    lead_time[known] += np.maximum(delay[index[known]], 0)
+    return lead_time
+
+
+# ─────────────────────────────────────────────
+# JOB
+# ─────────────────────────────────────────────
+
+def run_forecasts(apply=False, history_days=None, batch_size=5000, today=None):
+    """
+    Forecast every SKU from the last `history_days` (default:
+    DEMAND_FORECAST["history_days"]) of the stock ledger and replace all
+    DemandForecast rows with the recommended reorder points and days of
+    cover. With `apply`, the recommendations also become the items'
+    reorder levels (and low-stock flags are refreshed), except for items
+    forecast from receipts alone or with no history. Returns the number
+    of items forecast.
+    """
+    options = _options()
+    now = timezone.now()
+    today = today or timezone.localdate()
+    days = history_days or options["history_days"]
+    start = today - timedelta(days=days - 1)
+
+    rows = list(InventoryItem.objects.order_by("id").values_list("id", "supplier_id", "quantity_in_stock"))
+    if not rows:
+        DemandForecast.objects.all().delete()
+        return 0
+    ids, suppliers, stock = (np.array(column, dtype=np.int64) for column in zip(*rows))
+
+    demand, has_outbound = demand_matrix(ids, start, days)
+    rate, std, methods = forecast(demand, options["alpha"])
+    # Receipts say how much was restocked, not how much was used
+    methods = np.where(has_outbound | (methods == "NONE"), methods, "RECEIPTS")
+    lead_time = supplier_lead_times(suppliers, options["lead_time_days"])
+    reorder = reorder_points(rate, std, lead_time, options["service_z"])
+    cover = np.divide(stock, rate, out=np.full(len(ids), np.nan), where=rate > 0)
+
+    forecasts = [
+        DemandForecast(
+            item_id=pk, method=method, daily_demand=round(r, 3), demand_std=round(s, 3),
+            lead_time_days=round(lt, 2), recommended_reorder_level=point,
+            days_of_cover=None if np.isnan(c) else round(c, 1), computed_at=now,
+        )
+        for pk, method, r, s, lt, point, c in zip(
+            ids.tolist(), methods.tolist(), rate.tolist(), std.tolist(),
+            lead_time.tolist(), reorder.tolist(), cover.tolist(),
+        )
+    ]
+    with transaction.atomic():
+        DemandForecast.objects.all().delete()
+        DemandForecast.objects.bulk_create(forecasts, batch_size=batch_size)
+        if apply:
+            # Items without outbound demand history keep their hand-entered level
+            InventoryItem.objects.bulk_update(
+                [
+                    InventoryItem(id=pk, reorder_level=point)
+                    for pk, point, method in zip(ids.tolist(), reorder.tolist(), methods.tolist())
+                    if method in DEMAND_METHODS
+                ],
+                ["reorder_level"], batch_size=batch_size,
+            )
+            refresh_low_stock()
+    if apply:
+        # bulk_update skips the post_save signals
+        mark_dirty("inventory")
+    return len(forecasts)
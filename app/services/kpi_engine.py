@@ -0,0 +1,143 @@
+from django.db.models import Avg, Count, DecimalField, ExpressionWrapper, F, Q, Sum
+
+from app.models import (
+    Supplier, SupplierPerformanceScore, SupplierSentiment, Delivery,
+    Complaint, InventoryItem, Customer, Review, SentimentAnalysis,
+    EngagementMetric, MarketTrend,
+)
+
+HIGH_RISK_INDEX = 70
+HIGH_SEVERITY_LEVEL = 4
+
+
+def _pct(part, whole):
+    return (part / whole * 100) if whole else 0
+
+
+# ─────────────────────────────────────────────
+# ONE AGGREGATE QUERY PER TABLE
+# ─────────────────────────────────────────────
+# Each function issues exactly one SELECT using conditional aggregation
+# (Count(filter=Q(...))) and returns a flat dict. Averages are None on an
+# empty table; counts are always integers.
+
+def supplier_kpis():
+    return Supplier.objects.aggregate(
+        total=Count("id"),
+        active=Count("id", filter=Q(is_active=True)),
+        inactive=Count("id", filter=Q(is_active=False)),
+    )
+
+
+def performance_kpis():
+    return SupplierPerformanceScore.objects.aggregate(
+        total=Count("id"),
+        avg_final_score=Avg("final_score"),
+        avg_risk_index=Avg("risk_index"),
+        avg_trust_index=Avg("trust_index"),
+        high_risk=Count("id", filter=Q(risk_index__gte=HIGH_RISK_INDEX)),
+        excellent=Count("id", filter=Q(rating_category="Excellent")),
+        good=Count("id", filter=Q(rating_category="Good")),
+        average=Count("id", filter=Q(rating_category="Average")),
+        poor=Count("id", filter=Q(rating_category="Poor")),
+    )
+
+
+def supplier_sentiment_kpis():
+    return SupplierSentiment.objects.aggregate(
+        total=Count("id"),
+        positive=Count("id", filter=Q(sentiment_label="Positive")),
+        neutral=Count("id", filter=Q(sentiment_label="Neutral")),
+        negative=Count("id", filter=Q(sentiment_label="Negative")),
+    )
+
+
+def delivery_kpis():
+    kpis = Delivery.objects.aggregate(
+        total=Count("id"),
+        on_time=Count("id", filter=Q(delivery_status="ON_TIME")),
+        late=Count("id", filter=Q(delivery_status="LATE")),
+        early=Count("id", filter=Q(delivery_status="EARLY")),
+        damaged=Count("id", filter=Q(condition_status="DAMAGED")),
+        partial=Count("id", filter=Q(condition_status="PARTIAL")),
+        documentation_issues=Count("id", filter=Q(documentation_complete=False)),
+    )
+    kpis["on_time_rate"] = _pct(kpis["on_time"], kpis["total"])
+    kpis["damaged_rate"] = _pct(kpis["damaged"], kpis["total"])
+    return kpis
+
+
+def complaint_kpis():
+    return Complaint.objects.aggregate(
+        total=Count("id"),
+        unresolved=Count("id", filter=Q(resolved=False)),
+        high_severity=Count("id", filter=Q(severity_level__gte=HIGH_SEVERITY_LEVEL)),
+    )
+
+
+def inventory_kpis():
+    # Maintained by app.services.low_stock on every stock change
+    low_stock = Q(is_below_reorder=True)
+    kpis = InventoryItem.objects.aggregate(
+        total=Count("id"),
+        active=Count("id", filter=Q(is_active=True)),
+        inactive=Count("id", filter=Q(is_active=False)),
+        low_stock=Count("id", filter=low_stock),
+        low_stock_active=Count("id", filter=low_stock & Q(is_active=True)),
+        total_stock=Sum("quantity_in_stock"),
+        inventory_value=Sum(ExpressionWrapper(
+            F("quantity_in_stock") * F("unit_cost"),
+            output_field=DecimalField(max_digits=20, decimal_places=2),
+        )),
+        avg_selling_price=Avg("selling_price"),
+    )
+    kpis["total_stock"] = kpis["total_stock"] or 0
+    kpis["inventory_value"] = kpis["inventory_value"] or 0
+    return kpis
+
+
+def customer_kpis():
+    return Customer.objects.aggregate(
+        total=Count("id"),
+        avg_ltv=Avg("lifetime_value"),
+        avg_churn=Avg("churn_probability"),
+        avg_engagement=Avg("engagement_score"),
+        churn_low=Count("id", filter=Q(churn_probability__lt=0.3)),
+        churn_medium=Count("id", filter=Q(churn_probability__gte=0.3, churn_probability__lt=0.7)),
+        churn_high=Count("id", filter=Q(churn_probability__gte=0.7)),
+    )
+
+
+def review_kpis():
+    return Review.objects.aggregate(
+        total=Count("id"),
+        avg_weighted_score=Avg("overall_weighted_score"),
+        avg_nps=Avg("nps_score"),
+    )
+
+
+def sentiment_kpis():
+    kpis = SentimentAnalysis.objects.aggregate(
+        total=Count("id"),
+        positive=Count("id", filter=Q(sentiment_label="Positive")),
+    )
+    kpis["positive_rate"] = _pct(kpis["positive"], kpis["total"])
+    return kpis
+
+
+def engagement_kpis():
+    return EngagementMetric.objects.aggregate(
+        total=Count("id"),
+        total_page_views=Sum("page_views"),
+        total_clicks=Sum("clicks"),
+        total_messages=Sum("messages_sent"),
+        avg_loyalty_index=Avg("loyalty_index"),
+    )
+
+
+def market_kpis():
+    return MarketTrend.objects.aggregate(
+        total=Count("id"),
+        avg_growth=Avg("overall_growth_rate"),
+        avg_risk=Avg("risk_level"),
+    )
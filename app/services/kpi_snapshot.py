@@ -0,0 +1,73 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from app.models import KpiSnapshot
+from app.services import kpi_engine
+
+# Metric group -> kpi_engine function that computes it
+KPI_GROUPS = {
+    "suppliers":          kpi_engine.supplier_kpis,
+    "performance":        kpi_engine.performance_kpis,
+    "supplier_sentiment": kpi_engine.supplier_sentiment_kpis,
+    "deliveries":         kpi_engine.delivery_kpis,
+    "complaints":         kpi_engine.complaint_kpis,
+    "inventory":          kpi_engine.inventory_kpis,
+    "customers":          kpi_engine.customer_kpis,
+    "reviews":            kpi_engine.review_kpis,
+    "sentiments":         kpi_engine.sentiment_kpis,
+    "engagement":         kpi_engine.engagement_kpis,
+    "market":             kpi_engine.market_kpis,
+}
+
+# Safety net for writes that bypass signals (queryset.update, bulk_create)
+MAX_AGE = timedelta(seconds=getattr(settings, "KPI_SNAPSHOT_MAX_AGE", 900))
+
+
+def _jsonable(data):
+    return {k: float(v) if isinstance(v, Decimal) else v for k, v in data.items()}
+
+
+def _compute(group, row):
+    data = _jsonable(KPI_GROUPS[group]())
+    now = timezone.now()
+    if row is None:
+        try:
+            with transaction.atomic():
+                KpiSnapshot.objects.create(group=group, data=data, is_dirty=False, computed_at=now)
+        except IntegrityError:
+            # Another worker created it first; its copy is just as fresh
+            pass
+    else:
+        # Only mark clean if nothing invalidated the group while we computed
+        KpiSnapshot.objects.filter(pk=row.pk, version=row.version).update(
+            data=data, is_dirty=False, computed_at=now,
+        )
+    return data
+
+
+def get_kpis(*groups):
+    """
+    Return {group: kpi dict} for the requested groups, read from the
+    materialized snapshot in one query and recomputing only dirty or stale
+    groups.
+    """
+    rows = {row.group: row for row in KpiSnapshot.objects.filter(group__in=groups)}
+    stale_before = timezone.now() - MAX_AGE
+
+    result = {}
+    for group in groups:
+        row = rows.get(group)
+        if row is not None and not row.is_dirty and row.computed_at >= stale_before:
+            result[group] = row.data
+        else:
+            result[group] = _compute(group, row)
+    return result
+
+
+def mark_dirty(*groups):
+    KpiSnapshot.objects.filter(group__in=groups).update(is_dirty=True, version=F("version") + 1)
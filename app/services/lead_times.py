@@ -0,0 +1,125 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from app.models import SupplierDelayBin
+
+# numpy is imported inside the functions that use it; see supplier_scoring
+
+DELAY_CLIP = SupplierDelayBin.DELAY_CLIP
+DELAY_BINS = 2 * DELAY_CLIP + 1
+QUANTILES = (50, 90, 99)
+
+# SupplierPerformanceScore columns filled from a supplier's histogram
+DISTRIBUTION_FIELDS = ("lead_time_mean", "lead_time_std", *(f"lead_time_p{q}" for q in QUANTILES))
+
+
+def delay_bins(delays):
+    """Histogram column of each delay (days late; negative when early)."""
+    import numpy as np
+    return np.clip(np.asarray(delays, dtype=np.int64), -DELAY_CLIP, DELAY_CLIP) + DELAY_CLIP
+
+
+def distribution(histograms):
+    """
+    Mean, standard deviation and QUANTILES of days late for every row of
+    a (suppliers, DELAY_BINS) count array, as DISTRIBUTION_FIELDS arrays.
+    A quantile is the first bar whose running count reaches that share of
+    the deliveries. Rows without deliveries are NaN.
+    """
+    import numpy as np
+    days = np.arange(-DELAY_CLIP, DELAY_CLIP + 1, dtype=float)
+    total = histograms.sum(axis=1)
+    has_deliveries = total > 0
+    safe_total = np.where(has_deliveries, total, 1)
+    mean = histograms @ days / safe_total
+    variance = np.maximum(histograms @ days ** 2 / safe_total - mean ** 2, 0)
+
+    result = {"lead_time_mean": mean, "lead_time_std": np.sqrt(variance)}
+    cumulative = histograms.cumsum(axis=1)
+    for q in QUANTILES:
+        result[f"lead_time_p{q}"] = days[(cumulative >= q / 100 * total[:, None]).argmax(axis=1)]
+    return {field: np.where(has_deliveries, values, np.nan) for field, values in result.items()}
+
+
+# ─────────────────────────────────────────────
+# STORED HISTOGRAMS
+# ─────────────────────────────────────────────
+
+def stored_histograms(ids):
+    """(len(ids), DELAY_BINS) counts for the sorted supplier ids `ids`, from their stored bars."""
+    import numpy as np
+    ids = np.asarray(ids, dtype=np.int64)
+    histograms = np.zeros((len(ids), DELAY_BINS))
+    rows = list(SupplierDelayBin.objects.filter(supplier_id__in=ids.tolist()).values_list("supplier_id", "days", "deliveries"))
+    if rows:
+        supplier_ids, days, counts = (np.array(column) for column in zip(*rows))
+        np.add.at(histograms, (np.searchsorted(ids, supplier_ids), delay_bins(days)), counts)
+    return histograms
+
+
+def record_delays(supplier_ids, delays):
+    """
+    Count new deliveries (parallel sequences of supplier id and days late)
+    in the stored histograms: one F() UPDATE per bar touched, creating
+    bars that do not exist yet.
+    """
+    counts = Counter(zip((int(pk) for pk in supplier_ids), (int(d) - DELAY_CLIP for d in delay_bins(delays))))
+    for (supplier_id, days), deliveries in counts.items():
+        bar = SupplierDelayBin.objects.filter(supplier_id=supplier_id, days=days)
+        if bar.update(deliveries=F("deliveries") + deliveries):
+            continue
+        try:
+            with transaction.atomic():
+                SupplierDelayBin.objects.create(supplier_id=supplier_id, days=days, deliveries=deliveries)
+        except IntegrityError:
+            # Another delivery created the bar first
+            bar.update(deliveries=F("deliveries") + deliveries)
+
+
+def replace_histograms(ids, histograms, batch_size=1000):
+    """
+    Replace the stored bars of the suppliers in `ids` with the non-empty
+    cells of `histograms` (rows aligned with `ids`). Bars of suppliers
+    added since `ids` was read are kept.
+    """
+    import numpy as np
+    rows, columns = np.nonzero(histograms)
+    id_list = np.asarray(ids).tolist()
+    for start in range(0, len(id_list), batch_size):
+        SupplierDelayBin.objects.filter(supplier_id__in=id_list[start:start + batch_size]).delete()
+    SupplierDelayBin.objects.bulk_create(
+        [
+            SupplierDelayBin(supplier_id=supplier_id, days=column - DELAY_CLIP, deliveries=count)
+            for supplier_id, column, count in zip(
+                np.asarray(ids)[rows].tolist(), columns.tolist(), histograms[rows, columns].astype(np.int64).tolist(),
+            )
+        ],
+        batch_size=batch_size,
+    )
+
+
+def lead_time_summary():
+    """
+    Every supplier with deliveries and its lead-time distribution, worst
+    p90 first, read from the histogram bars in one query.
+    """
+    import numpy as np
+    rows = list(SupplierDelayBin.objects.values_list("supplier_id", "supplier__name", "days", "deliveries"))
+    if not rows:
+        return []
+    supplier_ids, names, days, counts = zip(*rows)
+    ids, index = np.unique(np.array(supplier_ids, dtype=np.int64), return_inverse=True)
+    histograms = np.zeros((len(ids), DELAY_BINS))
+    np.add.at(histograms, (index, delay_bins(days)), counts)
+
+    name_of = dict(zip(supplier_ids, names))
+    stats = {field: values.round(2).tolist() for field, values in distribution(histograms).items()}
+    summary = [
+        {"supplier_id": pk, "supplier": name_of[pk], "deliveries": int(total),
+         **{field: values[i] for field, values in stats.items()}}
+        for i, (pk, total) in enumerate(zip(ids.tolist(), histograms.sum(axis=1).tolist()))
+    ]
+    summary.sort(key=lambda row: (-row["lead_time_p90"], row["supplier"]))
+    return summary
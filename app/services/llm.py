@@ -0,0 +1,342 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from app.models import LlmResponse
+
+logger = logging.getLogger(__name__)
+
+OPENROUTER_API_KEY = getattr(settings, "OPENROUTER_API_KEY", "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")
+OPENROUTER_URL     = getattr(settings, "OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
+OPENROUTER_MODEL   = getattr(settings, "OPENROUTER_MODEL", "openai/gpt-4o")
+
+
+def _http_options():
+    options = {
+        "connect_timeout": 5, "read_timeout": 30,
+        "retries": 2, "backoff": 0.5, "pool_size": 10,
+        "failure_threshold": 5, "reset_timeout": 30,
+    }
+    options.update(getattr(settings, "LLM_HTTP", {}) or {})
+    return options
+
+
+# ─────────────────────────────────────────────
+# POOLED SESSION
+# ─────────────────────────────────────────────
+
+def build_session(retries=2, backoff=0.5, pool_size=10):
+    """
+    A requests.Session that keeps connections alive and retries connection
+    errors and 429/5xx replies with exponential backoff. Read timeouts are
+    not retried: a slow upstream should trip the circuit breaker, not hold
+    the worker for several more timeouts.
+    """
+    # requests/urllib3 cost ~50ms to import; only pay it when a call is made
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries, connect=retries, read=0, status=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            options = _http_options()
+            _session = build_session(options["retries"], options["backoff"], options["pool_size"])
+        return _session
+
+
+# ─────────────────────────────────────────────
+# CIRCUIT BREAKER
+# ─────────────────────────────────────────────
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Fails fast after `failure_threshold` consecutive errors. While open,
+    calls raise CircuitOpenError without touching the network; after
+    `reset_timeout` seconds one trial call is let through (half-open) and
+    its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def status(self):
+        return {"state": self.state, "failures": self.failures, "failure_threshold": self.failure_threshold}
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == self.OPEN or (state == self.HALF_OPEN and self._trial_running):
+                raise CircuitOpenError(f"circuit open after {self.failures} consecutive failures")
+            if state == self.HALF_OPEN:
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+    def call(self, func, *args, **kwargs):
+        self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(url):
+    """The shared breaker for an endpoint URL, so every worker thread sees the same state."""
+    with _breakers_lock:
+        if url not in _breakers:
+            options = _http_options()
+            _breakers[url] = CircuitBreaker(options["failure_threshold"], options["reset_timeout"])
+        return _breakers[url]
+
+
+def circuit_status():
+    """{url: breaker status} for every endpoint called since start-up."""
+    with _breakers_lock:
+        return {url: breaker.status() for url, breaker in _breakers.items()}
+
+
+# ─────────────────────────────────────────────
+# BACKENDS
+# ─────────────────────────────────────────────
+
+class LlmBackend:
+    """
+    Something that turns a (system, user) prompt into completion text.
+    `complete` raises on transport or API errors; callers decide how to
+    degrade.
+    """
+
+    name = "base"
+    available = True
+
+    def complete(self, system_prompt, user_prompt, model, max_tokens):
+        raise NotImplementedError
+
+
+class ChatCompletionsBackend(LlmBackend):
+    """
+    Any OpenAI-compatible /chat/completions endpoint: OpenRouter itself, or
+    the local stub started with `python manage.py llm_stub_server`.
+    """
+
+    name = "http"
+
+    def __init__(self, url=OPENROUTER_URL, api_key=OPENROUTER_API_KEY, timeout=None,
+                 session=None, breaker=None):
+        options = _http_options()
+        self.url = url
+        self.api_key = api_key
+        self.timeout = timeout or (options["connect_timeout"], options["read_timeout"])
+        self.session = session or get_session()
+        self.breaker = breaker or get_breaker(url)
+        self.available = bool(api_key)
+
+    def complete(self, system_prompt, user_prompt, model, max_tokens):
+        return self.breaker.call(self._post, system_prompt, user_prompt, model, max_tokens)
+
+    def _post(self, system_prompt, user_prompt, model, max_tokens):
+        resp = self.session.post(
+            self.url,
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type":  "application/json",
+                "HTTP-Referer":  "https://kpifastfood.app",
+                "X-Title":       "KPI Fastfood Analytics",
+            },
+            json={
+                "model": model, "max_tokens": max_tokens,
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user",   "content": user_prompt},
+                ],
+            },
+            timeout=self.timeout,
+        )
+        resp.raise_for_status()
+        return resp.json()["choices"][0]["message"]["content"].strip()
+
+
+class FixtureBackend(LlmBackend):
+    """
+    Canned replies with no network. `path` is a JSON file mapping prompt
+    keys (see `prompt_key`) to replies; prompts not in it get `reply`.
+    `latency` (seconds) simulates a slow model.
+    """
+
+    name = "fixture"
+
+    def __init__(self, path=None, reply="", latency=0):
+        self.replies = {}
+        if path:
+            with open(path, encoding="utf-8") as fh:
+                self.replies = json.load(fh)
+        self.reply = reply
+        self.latency = latency
+
+    def complete(self, system_prompt, user_prompt, model, max_tokens):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.replies.get(prompt_key(system_prompt, user_prompt, model, max_tokens), self.reply)
+
+
+BACKENDS = {
+    "openrouter": ChatCompletionsBackend,
+    "http":       ChatCompletionsBackend,
+    "fixture":    FixtureBackend,
+}
+
+
+def get_backend():
+    """Build the backend named in settings.LLM_BACKEND (default: OpenRouter)."""
+    options = dict(getattr(settings, "LLM_BACKEND", {}) or {})
+    name = options.pop("backend", "openrouter")
+    if name not in BACKENDS:
+        raise ValueError(f"LLM_BACKEND must be one of {tuple(BACKENDS)}, got {name!r}")
+    return BACKENDS[name](**options)
+
+
+# ─────────────────────────────────────────────
+# RESPONSE CACHE
+# ─────────────────────────────────────────────
+
+def _cache_options():
+    options = {"enabled": True, "ttl": 86400, "max_entries": 500}
+    options.update(getattr(settings, "LLM_CACHE", {}) or {})
+    return options
+
+
+def prompt_key(system_prompt, user_prompt, model, max_tokens):
+    payload = json.dumps([system_prompt, user_prompt, model, max_tokens])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def cache_get(key):
+    """Return the cached reply for `key`, or None if missing or past its TTL."""
+    options = _cache_options()
+    fresh_after = timezone.now() - timedelta(seconds=options["ttl"])
+    entry = LlmResponse.objects.filter(key=key, created_at__gte=fresh_after).only("id", "response").first()
+    if entry is None:
+        return None
+    LlmResponse.objects.filter(pk=entry.pk).update(last_used_at=timezone.now(), hits=F("hits") + 1)
+    return entry.response
+
+
+def cache_evict(system_prompt, user_prompt, model=OPENROUTER_MODEL, max_tokens=900):
+    """Drop the cached reply to a prompt, e.g. one that turned out to be unusable."""
+    LlmResponse.objects.filter(key=prompt_key(system_prompt, user_prompt, model, max_tokens)).delete()
+
+
+def cache_put(key, model, response):
+    """Store a reply, then drop expired rows and the least recently used overflow."""
+    options = _cache_options()
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            LlmResponse.objects.update_or_create(
+                key=key, defaults={"model": model, "response": response, "created_at": now, "last_used_at": now},
+            )
+    except IntegrityError:
+        # Another worker stored the same prompt first
+        return
+
+    LlmResponse.objects.filter(created_at__lt=now - timedelta(seconds=options["ttl"])).delete()
+    overflow = LlmResponse.objects.order_by("-last_used_at", "-id").values_list("id", flat=True)[options["max_entries"]:]
+    overflow_ids = list(overflow)
+    if overflow_ids:
+        LlmResponse.objects.filter(id__in=overflow_ids).delete()
+
+
+def complete(system_prompt, user_prompt, model=OPENROUTER_MODEL, max_tokens=900, use_cache=True):
+    """
+    Completion text for the prompt, served from the response cache when an
+    identical (system, user, model, max_tokens) prompt was answered within
+    the TTL. Errors are logged and return "" (nothing is cached).
+    """
+    backend = get_backend()
+    if not backend.available:
+        return ""
+
+    use_cache = use_cache and _cache_options()["enabled"]
+    key = prompt_key(system_prompt, user_prompt, model, max_tokens)
+    if use_cache:
+        cached = cache_get(key)
+        if cached is not None:
+            return cached
+
+    try:
+        text = backend.complete(system_prompt, user_prompt, model, max_tokens)
+    except CircuitOpenError as e:
+        logger.warning("LLM skipped (%s): %s", backend.name, e)
+        return ""
+    except Exception as e:
+        logger.error("LLM ERROR (%s): %s", backend.name, e)
+        return ""
+
+    if text and use_cache:
+        cache_put(key, model, text)
+    return text
@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models import F, Q
+
+from app.models import InventoryItem
+from app.notifications import notify_low_stock
+
+BELOW_REORDER = Q(quantity_in_stock__lte=F("reorder_level"))
+
+
+def refresh_low_stock(item_ids=None, notify=True):
+    """
+    Bring InventoryItem.is_below_reorder up to date for `item_ids` (all
+    items when None) and send notify_low_stock for every item that has
+    just crossed into the low state. Items are only alerted on the
+    transition: the rows are locked before the flag flips, so a concurrent
+    refresh sees the flag already set. Returns (entered, left) counts.
+    """
+    items = InventoryItem.objects.all() if item_ids is None else InventoryItem.objects.filter(id__in=item_ids)
+    with transaction.atomic():
+        entering = list(items.filter(BELOW_REORDER, is_below_reorder=False).select_for_update())
+        if entering:
+            InventoryItem.objects.filter(id__in=[item.pk for item in entering]).update(is_below_reorder=True)
+        left = items.filter(~BELOW_REORDER, is_below_reorder=True).update(is_below_reorder=False)
+
+        if notify:
+            for item in entering:
+                item.is_below_reorder = True
+                notify_low_stock(item)
+    return len(entering), left
+
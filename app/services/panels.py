@@ -0,0 +1,149 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+
+from app.models import (
+    Supplier, SupplierPerformanceScore, SupplierSentiment, Delivery,
+    Complaint, InventoryItem, Review, FastFoodBrand, MarketTrend,
+    MarketIndicator, CompetitorMarketData, DecisionRecommendation,
+)
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# ---------------------------------------
+# Keyset-paginated dashboard panel
+# ---------------------------------------
+class Panel:
+    """
+    A dashboard table served as JSON pages. Rows are ordered by
+    (`order_field`, id) and paged with a keyset cursor holding the last
+    row's values, so every page costs one indexed range query no matter how
+    deep the reader scrolls. `filters` restricts the rows, e.g. to an
+    indexed flag.
+    """
+
+    def __init__(self, model, fields, order_field="id", descending=True, filters=None):
+        self.model = model
+        self.fields = fields
+        self.order_field = order_field
+        self.descending = descending
+        self.filters = filters or {}
+
+    def _ordering(self):
+        sign = "-" if self.descending else ""
+        if self.order_field == "id":
+            return [f"{sign}id"]
+        return [f"{sign}{self.order_field}", f"{sign}id"]
+
+    def _after(self, cursor):
+        value, last_id = cursor
+        op = "lt" if self.descending else "gt"
+        if self.order_field == "id":
+            return Q(**{f"id__{op}": last_id})
+        return (
+            Q(**{f"{self.order_field}__{op}": value})
+            | Q(**{self.order_field: value, f"id__{op}": last_id})
+        )
+
+    def page(self, cursor=None, limit=DEFAULT_PAGE_SIZE):
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        qs = self.model.objects.filter(**self.filters).order_by(*self._ordering())
+        if cursor:
+            qs = qs.filter(self._after(decode_cursor(cursor)))
+
+        key_fields = ["id"] if self.order_field == "id" else ["id", self.order_field]
+        rows = list(qs.values(*dict.fromkeys([*key_fields, *self.fields]))[:limit + 1])
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last[self.order_field], last["id"])
+        return {"results": rows, "next_cursor": next_cursor}
+
+
+def encode_cursor(value, last_id):
+    return base64.urlsafe_b64encode(json.dumps([value, last_id]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return value, int(last_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise InvalidCursor(cursor)
+
+
+# ─────────────────────────────────────────────
+# PANELS SHOWN ON THE MAIN DASHBOARD
+# ─────────────────────────────────────────────
+
+PANELS = {
+    "suppliers": Panel(
+        Supplier,
+        ("supplier_code", "name", "company_name", "location", "is_active"),
+        order_field="name", descending=False,
+    ),
+    "supplier_scores": Panel(
+        SupplierPerformanceScore,
+        ("supplier__name", "supplier__company_name", "final_score", "rating_category"),
+        order_field="final_score",
+    ),
+    "sentiments": Panel(
+        SupplierSentiment,
+        ("supplier__name", "source_type", "sentiment_label", "confidence_score", "created_at"),
+    ),
+    "deliveries": Panel(
+        Delivery,
+        ("supplier__name", "order_number", "product_category", "quantity_ordered",
+         "quantity_delivered", "delivery_status", "condition_status", "actual_delivery_date"),
+    ),
+    "complaints": Panel(
+        Complaint,
+        ("supplier__name", "description", "severity_level", "resolved", "created_at"),
+    ),
+    "inventory": Panel(
+        InventoryItem,
+        ("sku", "name", "category", "quantity_in_stock", "reorder_level", "selling_price", "is_active"),
+        order_field="sku", descending=False,
+    ),
+    "low_stock": Panel(
+        InventoryItem,
+        ("sku", "name", "supplier__name", "quantity_in_stock", "reorder_level"),
+        order_field="quantity_in_stock", descending=False,
+        filters={"is_below_reorder": True, "is_active": True},
+    ),
+    "reviews": Panel(
+        Review,
+        ("brand__name", "brand__branch", "customer__full_name", "overall_weighted_score", "nps_score", "created_at"),
+    ),
+    "brands": Panel(
+        FastFoodBrand,
+        ("name", "branch", "location"),
+        order_field="name", descending=False,
+    ),
+    "trends": Panel(
+        MarketTrend,
+        ("trend_title", "industry", "market_region", "overall_growth_rate", "risk_level", "start_period", "end_period"),
+    ),
+    "indicators": Panel(
+        MarketIndicator,
+        ("trend__trend_title", "indicator_name", "indicator_category", "value", "unit", "recorded_date"),
+    ),
+    "competitors": Panel(
+        CompetitorMarketData,
+        ("brand_name", "market_share_percentage", "average_price", "brand_growth_rate", "recorded_date"),
+    ),
+    "decisions": Panel(
+        DecisionRecommendation,
+        ("report_type", "title", "description", "confidence_level", "generated_by", "created_at"),
+    ),
+}
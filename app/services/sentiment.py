@@ -0,0 +1,251 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# VADER's lexicon takes ~100ms to load, so each process builds it once, lazily
+_analyzer = None
+
+
+def _vader():
+    global _analyzer
+    if _analyzer is None:
+        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+        _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+
+def _compound_scores(texts):
+    """VADER compound score per text. Top-level so process-pool workers can run it."""
+    analyzer = _vader()
+    return [analyzer.polarity_scores(text)["compound"] for text in texts]
+
+
+def normalize(text):
+    """Strip and collapse whitespace. Case and punctuation are kept: VADER scores them."""
+    return " ".join((text or "").split())
+
+
+def text_key(normalized):
+    return hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+
+
+# ---------------------------------------
+# Local transformer scorer (bert_score)
+# ---------------------------------------
+def _label_signs(id2label):
+    """
+    +1 for positive labels, -1 for negative and 0 for neutral ones, in
+    class-index order. Generic names such as LABEL_0 say nothing about
+    polarity, so a model without both a positive and a negative label is
+    rejected rather than scored as all-neutral.
+    """
+    signs = []
+    for _, label in sorted(id2label.items()):
+        name = str(label).lower()
+        signs.append(1.0 if "pos" in name else -1.0 if "neg" in name else 0.0 if "neu" in name else None)
+    if None in signs or 1.0 not in signs or -1.0 not in signs:
+        raise ValueError(f"model labels {sorted(id2label.values())} must name positive and negative classes")
+    return signs
+
+
+class TransformerScorer:
+    """
+    CPU-only sequence-classification model loaded from a local directory
+    (no downloads). Texts are scored in batches sorted by length so each
+    batch is padded only to its own longest text, truncated at
+    `max_length` tokens. Scores are P(positive) - P(negative), in [-1, 1]
+    like VADER's compound score.
+
+    torch and transformers are imported and the model loaded on first use,
+    once per process. If either is missing, `model_path` does not exist,
+    the model fails to load, or its labels (config.id2label) do not name a
+    positive and a negative class, `available` is False and callers keep
+    the VADER-only scores. Loading is not retried.
+    """
+
+    def __init__(self, model_path, max_length=256, batch_size=32, threads=None):
+        self.model_path = model_path
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.threads = threads or os.cpu_count() or 1
+        self._model = None
+        self._tokenizer = None
+        self._label_signs = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is not None or self._failed:
+                return
+            if not self.model_path or not os.path.isdir(self.model_path):
+                logger.info("No transformer model at %r; using VADER only", self.model_path)
+                self._failed = True
+                return
+            try:
+                import torch
+                from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+                torch.set_num_threads(self.threads)
+                tokenizer = AutoTokenizer.from_pretrained(self.model_path, local_files_only=True)
+                model = AutoModelForSequenceClassification.from_pretrained(self.model_path, local_files_only=True)
+                model.eval()
+                signs = _label_signs(model.config.id2label)
+            except Exception as e:
+                # ImportError, OSError from a missing or corrupt checkpoint, unusable labels, ...
+                logger.warning("Transformer sentiment disabled (%s); using VADER only", e)
+                self._failed = True
+                return
+            self._tokenizer, self._label_signs, self._model = tokenizer, signs, model
+
+    @property
+    def available(self):
+        self._load()
+        return self._model is not None
+
+    def score(self, texts):
+        if not self.available:
+            return [0.0] * len(texts)
+
+        import torch
+
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        scores = [0.0] * len(texts)
+        signs = torch.tensor(self._label_signs)
+        with torch.inference_mode():
+            for start in range(0, len(order), self.batch_size):
+                idx = order[start:start + self.batch_size]
+                batch = self._tokenizer(
+                    [texts[i] for i in idx], padding="longest", truncation=True,
+                    max_length=self.max_length, return_tensors="pt",
+                )
+                probs = self._model(**batch).logits.softmax(dim=-1)
+                for i, value in zip(idx, (probs * signs).sum(dim=-1).tolist()):
+                    scores[i] = value
+        return scores
+
+
+# ---------------------------------------
+# Sentiment scoring service
+# ---------------------------------------
+class SentimentService:
+    """
+    Scores texts as (vader_score, bert_score) tuples, the shape
+    analyze_sentiment has always returned (bert_score is a 0.0 placeholder).
+
+    Results are kept in an LRU cache keyed by a hash of the normalized
+    text, so repeated boilerplate ("Delivered on time", "Damaged packaging")
+    is scored once. Batches with at least `pool_threshold` uncached texts
+    are spread over a process pool when `workers` > 1. With a
+    `transformer` scorer available, bert_score comes from it instead of
+    the 0.0 placeholder.
+    """
+
+    def __init__(self, cache_size=10000, workers=1, pool_threshold=5000, executor=None, transformer=None):
+        self.cache_size = cache_size
+        self.workers = workers
+        self.pool_threshold = pool_threshold
+        # Long-running callers can pass a ProcessPoolExecutor to reuse
+        # across batches instead of starting a pool per batch
+        self.executor = executor
+        self.transformer = transformer
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ── Cache ─────────────────────────────────────────────────────────
+    def _get(self, key):
+        with self._lock:
+            score = self._cache.get(key)
+            if score is not None:
+                self._cache.move_to_end(key)
+            return score
+
+    def _put_many(self, items):
+        with self._lock:
+            for key, score in items:
+                self._cache[key] = score
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def cache_info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache), "max_size": self.cache_size}
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+        self.hits = self.misses = 0
+
+    # ── Scoring ───────────────────────────────────────────────────────
+    def _compute(self, texts, workers):
+        if workers > 1 and len(texts) >= self.pool_threshold:
+            chunk = -(-len(texts) // (workers * 4))
+            chunks = [texts[i:i + chunk] for i in range(0, len(texts), chunk)]
+            if self.executor is not None:
+                return [score for part in self.executor.map(_compound_scores, chunks) for score in part]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                return [score for part in pool.map(_compound_scores, chunks) for score in part]
+        return _compound_scores(texts)
+
+    def score_many(self, texts, workers=None):
+        """Score every text, in order. Duplicates and cached texts are scored once."""
+        workers = self.workers if workers is None else workers
+        keys = []
+        scores = {}
+        todo = {}
+        for text in texts:
+            normalized = normalize(text)
+            if not normalized:
+                keys.append(None)
+                continue
+            key = text_key(normalized)
+            keys.append(key)
+            if key in scores or key in todo:
+                continue
+            cached = self._get(key)
+            if cached is None:
+                todo[key] = normalized
+            else:
+                scores[key] = cached
+
+        self.hits += len(scores)
+        self.misses += len(todo)
+        if todo:
+            texts = list(todo.values())
+            compound = self._compute(texts, workers)
+            # The transformer runs in this process; torch parallelises internally
+            bert = self.transformer.score(texts) if self.transformer else [0.0] * len(texts)
+            computed = list(zip(todo, zip(compound, bert)))
+            self._put_many(computed)
+            scores.update(computed)
+
+        return [scores[key] if key is not None else (0.0, 0.0) for key in keys]
+
+    def score(self, text):
+        return self.score_many([text])[0]
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_sentiment_service():
+    """Process-wide service configured from settings.SENTIMENT_SERVICE."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            transformer = getattr(settings, "SENTIMENT_TRANSFORMER", {}) or {}
+            _service = SentimentService(
+                transformer=TransformerScorer(**transformer) if transformer.get("model_path") else None,
+                **getattr(settings, "SENTIMENT_SERVICE", {}),
+            )
+        return _service
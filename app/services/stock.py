@@ -0,0 +1,108 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from app.models import InventoryItem, StockMovement
+from app.services.kpi_snapshot import mark_dirty
+from app.services.low_stock import refresh_low_stock
+
+# Defaults for items first created by a delivery; staff fill in prices later
+NEW_ITEM_DEFAULTS = {
+    "reorder_level": 0, "unit_cost": 0, "selling_price": 0, "warehouse_location": "Default Warehouse",
+}
+
+
+def _new_item(supplier_id, sku, name, category, quantity, now):
+    return InventoryItem(
+        supplier_id=supplier_id, sku=sku, name=name, category=(category or "")[:100],
+        quantity_in_stock=quantity, last_restocked=now, **NEW_ITEM_DEFAULTS,
+    )
+
+
+# ─────────────────────────────────────────────
+# SINGLE MOVEMENT
+# ─────────────────────────────────────────────
+
+def receive(supplier_id, sku, quantity, name, category, delivery=None, reason="DELIVERY"):
+    """
+    Add `quantity` units of `sku` to stock and record the movement. An
+    existing item is moved with one F() UPDATE, so concurrent deliveries
+    never overwrite each other; an unknown SKU creates the item. Returns
+    the StockMovement.
+    """
+    now = timezone.now()
+    items = InventoryItem.objects.filter(sku=sku)
+    with transaction.atomic():
+        # UPDATE first: it takes the row lock before anything is read
+        moved = items.update(quantity_in_stock=F("quantity_in_stock") + quantity, last_restocked=now)
+        if not moved:
+            try:
+                with transaction.atomic():
+                    _new_item(supplier_id, sku, name, category, quantity, now).save()
+            except IntegrityError:
+                # Another delivery created the item first
+                moved = items.update(quantity_in_stock=F("quantity_in_stock") + quantity, last_restocked=now)
+        item_id = items.values_list("id", flat=True).get()
+        if moved:
+            # queryset.update() skips the post_save signals
+            mark_dirty("inventory")
+            refresh_low_stock([item_id])
+        return StockMovement.objects.create(
+            item_id=item_id, quantity=quantity, reason=reason, delivery=delivery, created_at=now,
+        )
+
+
+# ─────────────────────────────────────────────
+# BATCH OF MOVEMENTS
+# ─────────────────────────────────────────────
+
+def receive_many(entries, reason="IMPORT"):
+    """
+    Apply many receipts at once. `entries` are dicts with supplier_id,
+    sku, quantity, name, category and optionally delivery. Existing items
+    are moved by one UPDATE with a CASE per SKU, new SKUs that have a name
+    are bulk-created, and one ledger row per entry is bulk-inserted.
+    Entries for unknown SKUs without a name are skipped. Call inside a
+    transaction. Returns the number of items touched.
+    """
+    delivered = defaultdict(int)
+    first = {}
+    for entry in entries:
+        if entry["sku"]:
+            delivered[entry["sku"]] += entry["quantity"]
+            first.setdefault(entry["sku"], entry)
+    if not delivered:
+        return 0
+
+    now = timezone.now()
+    item_ids = dict(InventoryItem.objects.filter(sku__in=list(delivered)).values_list("sku", "id"))
+    if item_ids:
+        InventoryItem.objects.filter(id__in=item_ids.values()).update(
+            quantity_in_stock=F("quantity_in_stock") + Case(
+                *(When(id=pk, then=Value(delivered[sku])) for sku, pk in item_ids.items()),
+                default=Value(0), output_field=IntegerField(),
+            ),
+            last_restocked=now,
+        )
+    existing = len(item_ids)
+
+    new_items = InventoryItem.objects.bulk_create([
+        _new_item(entry["supplier_id"], sku, entry["name"], entry["category"], delivered[sku], now)
+        for sku, entry in first.items()
+        if sku not in item_ids and entry["name"]
+    ])
+    item_ids.update((item.sku, item.pk) for item in new_items)
+
+    StockMovement.objects.bulk_create([
+        StockMovement(
+            item_id=item_ids[entry["sku"]], quantity=entry["quantity"], reason=reason,
+            delivery=entry.get("delivery"), created_at=now,
+        )
+        for entry in entries
+        if entry["sku"] in item_ids
+    ])
+    refresh_low_stock(list(item_ids.values()))
+    mark_dirty("inventory")
+    return existing + len(new_items)
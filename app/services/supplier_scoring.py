@@ -0,0 +1,579 @@
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from app.models import (
+    Complaint, Delivery, ScoreWeightProfile, Supplier, SupplierPerformanceScore, SupplierReview,
+    SupplierScoreStats, SupplierSentiment,
+)
+from app.services.kpi_snapshot import mark_dirty
+from app.services.lead_times import (
+    DELAY_BINS, DISTRIBUTION_FIELDS, delay_bins, distribution, record_delays, replace_histograms, stored_histograms,
+)
+
+# numpy costs ~100ms to import and this module is loaded with the admin and
+# views, so it is imported inside the functions that use it
+
+# Sub-score used when a supplier has no data for it yet, so new suppliers
+# start mid-table instead of at the bottom
+NEUTRAL_SCORE = 50.0
+
+# Resolved complaints weigh half as much as open ones
+RESOLVED_COMPLAINT_WEIGHT = 0.5
+
+# Sentiment at or below this compound score counts as negative (VADER's threshold)
+NEGATIVE_SENTIMENT = -0.05
+
+# SupplierReview scores are out of 10 (see templates/supplier_review.html)
+REVIEW_SCALE = 10
+
+STAT_FIELDS = (
+    "deliveries", "on_time", "late", "damaged", "partial", "ordered", "delivered", "delay_sum", "delay_squares",
+    "complaints", "unresolved", "open_severity", "resolved_severity",
+    "reviews", "communication_sum", "flexibility_sum", "price_sum", "documentation_sum",
+    "sentiments", "confidence_sum", "negative",
+)
+
+# Weight key -> SupplierPerformanceScore column it multiplies
+WEIGHT_COLUMNS = (
+    ("timeliness", "timeliness_score"),
+    ("quantity_accuracy", "quantity_accuracy_score"),
+    ("quality", "quality_score"),
+    ("complaint", "complaint_score"),
+    ("consistency", "consistency_score"),
+    ("trust_index", "trust_index"),
+    ("risk_index", "risk_index"),
+)
+
+SCORE_FIELDS = (
+    "timeliness_score", "quantity_accuracy_score", "quality_score", "complaint_score",
+    "consistency_score", "risk_index", "trust_index", "final_score", "rating_category",
+    *DISTRIBUTION_FIELDS, "last_updated",
+)
+
+
+# ─────────────────────────────────────────────
+# GROUPED AGGREGATES
+# ─────────────────────────────────────────────
+# One GROUP BY supplier query per table (plus one streamed pass over
+# delivery dates for the lead-time variance). Each fills float arrays,
+# named like the SupplierScoreStats fields, aligned with `ids`, the sorted
+# supplier primary keys.
+
+def _positions(ids, supplier_ids):
+    """Index of each supplier id in `ids`, and a mask dropping ids added since it was read."""
+    import numpy as np
+    supplier_ids = np.asarray(supplier_ids, dtype=np.int64)
+    index = np.minimum(np.searchsorted(ids, supplier_ids), len(ids) - 1)
+    return index, ids[index] == supplier_ids
+
+
+def _columns(ids, rows, fields):
+    import numpy as np
+    columns = {field: np.zeros(len(ids)) for field in fields}
+    if rows:
+        index, known = _positions(ids, [row["supplier_id"] for row in rows])
+        for field in fields:
+            columns[field][index[known]] = np.array([row[field] or 0 for row in rows], dtype=float)[known]
+    return columns
+
+
+def delivery_aggregates(ids, deliveries=None):
+    deliveries = Delivery.objects.all() if deliveries is None else deliveries
+    rows = list(
+        deliveries.values("supplier_id").annotate(
+            deliveries=Count("id"),
+            on_time=Count("id", filter=Q(delivery_status__in=("ON_TIME", "EARLY"))),
+            late=Count("id", filter=Q(delivery_status="LATE")),
+            damaged=Count("id", filter=Q(condition_status="DAMAGED")),
+            partial=Count("id", filter=Q(condition_status="PARTIAL")),
+            ordered=Sum("quantity_ordered"),
+            delivered=Sum("quantity_delivered"),
+        )
+    )
+    return _columns(ids, rows, ("deliveries", "on_time", "late", "damaged", "partial", "ordered", "delivered"))
+
+
+def lead_time_moments(ids, deliveries=None, chunk_size=20000, histograms=None):
+    """
+    Per-supplier sum and sum of squares of (actual - expected) delivery
+    days. Each delivery is also counted in `histograms`, a
+    (len(ids), DELAY_BINS) array, when one is given.
+    """
+    import numpy as np
+    deliveries = Delivery.objects.all() if deliveries is None else deliveries
+    moments = {"delay_sum": np.zeros(len(ids)), "delay_squares": np.zeros(len(ids))}
+    rows = deliveries.order_by().values_list("supplier_id", "expected_delivery_date", "actual_delivery_date")
+    chunk = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            _add_moments(ids, chunk, moments, histograms)
+            chunk = []
+    if chunk:
+        _add_moments(ids, chunk, moments, histograms)
+    return moments
+
+
+def _add_moments(ids, chunk, moments, histograms=None):
+    import numpy as np
+    supplier_ids, expected, actual = zip(*chunk)
+    index, known = _positions(ids, supplier_ids)
+    delay = (np.array(actual, dtype="datetime64[D]") - np.array(expected, dtype="datetime64[D]")).astype(float)
+    moments["delay_sum"] += np.bincount(index[known], weights=delay[known], minlength=len(ids))
+    moments["delay_squares"] += np.bincount(index[known], weights=delay[known] ** 2, minlength=len(ids))
+    if histograms is not None:
+        cells = index[known] * DELAY_BINS + delay_bins(delay[known])
+        histograms += np.bincount(cells, minlength=histograms.size).reshape(histograms.shape)
+
+
+def complaint_aggregates(ids, complaints=None):
+    complaints = Complaint.objects.all() if complaints is None else complaints
+    rows = list(
+        complaints.values("supplier_id").annotate(
+            complaints=Count("id"),
+            unresolved=Count("id", filter=Q(resolved=False)),
+            open_severity=Sum("severity_level", filter=Q(resolved=False)),
+            resolved_severity=Sum("severity_level", filter=Q(resolved=True)),
+        )
+    )
+    return _columns(ids, rows, ("complaints", "unresolved", "open_severity", "resolved_severity"))
+
+
+def review_aggregates(ids, reviews=None):
+    reviews = SupplierReview.objects.all() if reviews is None else reviews
+    rows = list(
+        reviews.values("supplier_id").annotate(
+            reviews=Count("id"),
+            communication_sum=Sum("communication_score"),
+            flexibility_sum=Sum("flexibility_score"),
+            price_sum=Sum("price_competitiveness_score"),
+            documentation_sum=Sum("documentation_score"),
+        )
+    )
+    return _columns(ids, rows, ("reviews", "communication_sum", "flexibility_sum", "price_sum", "documentation_sum"))
+
+
+def sentiment_aggregates(ids, sentiments=None):
+    sentiments = SupplierSentiment.objects.all() if sentiments is None else sentiments
+    rows = list(
+        sentiments.values("supplier_id").annotate(
+            sentiments=Count("id"),
+            confidence_sum=Sum("confidence_score"),
+            negative=Count("id", filter=Q(confidence_score__lte=NEGATIVE_SENTIMENT)),
+        )
+    )
+    return _columns(ids, rows, ("sentiments", "confidence_sum", "negative"))
+
+
+def gather_stats(ids, histograms=None, filtered=False):
+    """
+    Every SupplierScoreStats field, recomputed from raw rows, as arrays
+    aligned with `ids`. The delay histograms are filled in on the same
+    pass over delivery dates when `histograms` is given. With `filtered`
+    only the rows of the suppliers in `ids` are read.
+    """
+    def rows(model):
+        return model.objects.filter(supplier_id__in=ids.tolist()) if filtered else None
+
+    stats = {}
+    stats.update(delivery_aggregates(ids, rows(Delivery)))
+    stats.update(complaint_aggregates(ids, rows(Complaint)))
+    stats.update(review_aggregates(ids, rows(SupplierReview)))
+    stats.update(sentiment_aggregates(ids, rows(SupplierSentiment)))
+    stats.update(lead_time_moments(ids, rows(Delivery), histograms=histograms))
+    return stats
+
+
+# ─────────────────────────────────────────────
+# SCORING
+# ─────────────────────────────────────────────
+
+def _ratio(part, whole):
+    import numpy as np
+    return np.divide(part, whole, out=np.zeros_like(part), where=whole > 0)
+
+
+def compute_scores(stats, weights=None):
+    """
+    Sub-scores, risk/trust indexes and final scores (all 0-100) as arrays,
+    from a dict of STAT_FIELDS arrays (see gather_stats / stats_arrays).
+
+      timeliness         on-time or early share of deliveries
+      quantity_accuracy  1 - |1 - delivered/ordered|, so shortfalls and
+                         over-deliveries both cost
+      quality            damaged deliveries count fully, partial ones half
+      complaint          100 / (1 + severity per delivery), open complaints
+                         at full severity and resolved ones at half
+      consistency        100 / (1 + std dev of delivery delay in days)
+      trust_index        mean review score (out of REVIEW_SCALE) averaged
+                         with mean text sentiment, both scaled to 0-100
+      risk_index         mean of late, damaged/partial, open-complaint and
+                         negative-sentiment shares
+
+    Suppliers with no rows for a sub-score get NEUTRAL_SCORE for it.
+    """
+    import numpy as np
+    weights = weights or SupplierPerformanceScore.DEFAULT_WEIGHTS
+    deliveries = stats["deliveries"]
+    has_deliveries = deliveries > 0
+
+    timeliness = 100 * _ratio(stats["on_time"], deliveries)
+    quantity_accuracy = 100 * np.clip(1 - np.abs(1 - _ratio(stats["delivered"], stats["ordered"])), 0, 1)
+    quality = 100 * np.clip(1 - _ratio(stats["damaged"] + 0.5 * stats["partial"], deliveries), 0, 1)
+
+    mean_delay = _ratio(stats["delay_sum"], deliveries)
+    variance = np.maximum(_ratio(stats["delay_squares"], deliveries) - mean_delay ** 2, 0)
+    consistency = 100 / (1 + np.sqrt(variance))
+
+    timeliness, quality, consistency = (
+        np.where(has_deliveries, score, NEUTRAL_SCORE) for score in (timeliness, quality, consistency)
+    )
+    quantity_accuracy = np.where(stats["ordered"] > 0, quantity_accuracy, NEUTRAL_SCORE)
+
+    severity = stats["open_severity"] + RESOLVED_COMPLAINT_WEIGHT * stats["resolved_severity"]
+    complaint = 100 / (1 + _ratio(severity, np.maximum(deliveries, 1)))
+
+    review_sum = stats["communication_sum"] + stats["flexibility_sum"] + stats["price_sum"] + stats["documentation_sum"]
+    review_mean = 100 / REVIEW_SCALE * _ratio(review_sum, 4 * stats["reviews"])
+    sentiment_mean = 50 * (_ratio(stats["confidence_sum"], stats["sentiments"]) + 1)
+    has_reviews, has_sentiments = stats["reviews"] > 0, stats["sentiments"] > 0
+    trust_sources = has_reviews.astype(float) + has_sentiments
+    trust_total = np.where(has_reviews, review_mean, 0) + np.where(has_sentiments, sentiment_mean, 0)
+    trust = np.where(trust_sources > 0, _ratio(trust_total, trust_sources), NEUTRAL_SCORE)
+
+    risk = 100 * np.mean(np.stack([
+        _ratio(stats["late"], deliveries),
+        _ratio(stats["damaged"] + stats["partial"], deliveries),
+        _ratio(stats["unresolved"], stats["complaints"]),
+        _ratio(stats["negative"], stats["sentiments"]),
+    ]), axis=0)
+
+    scores = {
+        "timeliness_score": timeliness,
+        "quantity_accuracy_score": quantity_accuracy,
+        "quality_score": quality,
+        "complaint_score": complaint,
+        "consistency_score": consistency,
+        "trust_index": trust,
+        "risk_index": risk,
+    }
+    matrix = np.column_stack([scores[column] for _, column in WEIGHT_COLUMNS])
+    scores["final_score"] = final_scores(matrix, weights)
+    return scores
+
+
+def weight_vector(weights):
+    import numpy as np
+    return np.array([weights[key] for key, _ in WEIGHT_COLUMNS], dtype=float)
+
+
+def final_scores(matrix, weights):
+    """Weighted final scores for a (suppliers x WEIGHT_COLUMNS) sub-score matrix, clipped to 0-100."""
+    import numpy as np
+    return np.clip(matrix @ weight_vector(weights), 0, 100)
+
+
+def rating_categories(final):
+    import numpy as np
+    bands = SupplierPerformanceScore.RATING_BANDS
+    return np.select([final >= floor for floor, _ in bands], [label for _, label in bands], default="Poor")
+
+
+# ─────────────────────────────────────────────
+# WEIGHT PROFILES
+# ─────────────────────────────────────────────
+
+def active_weights():
+    """Weights of the active ScoreWeightProfile, or the model defaults."""
+    profile = ScoreWeightProfile.objects.filter(is_active=True).first()
+    return profile.resolved_weights() if profile else SupplierPerformanceScore.DEFAULT_WEIGHTS
+
+
+def _ranks(scores, supplier_ids):
+    """1-based rank by score, highest first; ties go to the lower supplier id."""
+    import numpy as np
+    order = np.lexsort((supplier_ids, -scores))
+    ranks = np.empty(len(scores), dtype=np.int64)
+    ranks[order] = np.arange(1, len(scores) + 1)
+    return ranks
+
+
+def what_if(weights, limit=None):
+    """
+    Re-rank every scored supplier under candidate `weights` (missing keys
+    default to the model's) without writing anything: one query for the
+    stored sub-scores, one matrix-vector product for the new finals.
+    Returns rows ordered by new rank, plus how many suppliers moved.
+    """
+    import numpy as np
+    weights = {**SupplierPerformanceScore.DEFAULT_WEIGHTS, **weights}
+    rows = list(
+        SupplierPerformanceScore.objects.values_list(
+            "supplier_id", "supplier__name", "final_score", *(column for _, column in WEIGHT_COLUMNS),
+        )
+    )
+    if not rows:
+        return {"suppliers": [], "moved": 0, "weights": weights}
+
+    supplier_ids, names, current, *columns = zip(*rows)
+    supplier_ids = np.array(supplier_ids, dtype=np.int64)
+    current = np.array(current, dtype=float)
+    proposed = final_scores(np.array(columns, dtype=float).T, weights)
+
+    old_ranks = _ranks(current, supplier_ids)
+    new_ranks = _ranks(proposed, supplier_ids)
+    categories = rating_categories(proposed)
+
+    order = np.argsort(new_ranks)[:limit]
+    suppliers = [
+        {
+            "supplier_id": int(supplier_ids[i]),
+            "supplier": names[i],
+            "current_score": round(float(current[i]), 2),
+            "what_if_score": round(float(proposed[i]), 2),
+            "current_rank": int(old_ranks[i]),
+            "what_if_rank": int(new_ranks[i]),
+            "rank_change": int(old_ranks[i] - new_ranks[i]),
+            "rating_category": str(categories[i]),
+        }
+        for i in order
+    ]
+    return {"suppliers": suppliers, "moved": int((old_ranks != new_ranks).sum()), "weights": weights}
+
+
+# ─────────────────────────────────────────────
+# PERSIST
+# ─────────────────────────────────────────────
+
+def _column(values):
+    """Rounded values as a list, with NaN (no data) as None."""
+    return [None if value != value else value for value in values.round(2).tolist()]
+
+
+def _apply_scores(rows, scores, categories, position):
+    now = timezone.now()
+    columns = {field: _column(values) for field, values in scores.items()}
+    for row in rows:
+        i = position[row.supplier_id]
+        for field, values in columns.items():
+            setattr(row, field, values[i])
+        row.rating_category = str(categories[i])
+        row.last_updated = now
+
+
+def _missing_rows(model, related_name, batch_size):
+    unscored = Supplier.objects.filter(**{f"{related_name}__isnull": True}).values_list("id", flat=True)
+    model.objects.bulk_create(
+        [model(supplier_id=pk) for pk in unscored], ignore_conflicts=True, batch_size=batch_size,
+    )
+
+
+def score_all_suppliers(weights=None, batch_size=1000):
+    """
+    Recompute every supplier's SupplierScoreStats, delay histogram and
+    SupplierPerformanceScore from raw delivery, complaint, review and
+    sentiment rows and save them in bulk. `weights` default to the active
+    weight profile. Missing rows are created first. Returns the number of
+    suppliers scored.
+
+    The stats rows stay locked from before the raw rows are read until the
+    rebuilt values are written, so record_event increments committed in
+    between wait for the rebuild instead of being overwritten by it.
+    """
+    import numpy as np
+    ids = np.array(sorted(Supplier.objects.values_list("id", flat=True)), dtype=np.int64)
+    if not len(ids):
+        return 0
+
+    _missing_rows(SupplierScoreStats, "score_stats", batch_size)
+    _missing_rows(SupplierPerformanceScore, "supplierperformancescore", batch_size)
+    position = {int(pk): i for i, pk in enumerate(ids)}
+
+    with transaction.atomic():
+        # Suppliers added since `ids` was read are left for the next run
+        stat_rows = [
+            row for row in SupplierScoreStats.objects.select_for_update().only("id", "supplier_id")
+            if row.supplier_id in position
+        ]
+        histograms = np.zeros((len(ids), DELAY_BINS))
+        stats = gather_stats(ids, histograms)
+        scores = compute_scores(stats, weights or active_weights())
+        categories = rating_categories(scores["final_score"])
+        scores.update(distribution(histograms))
+
+        rows = [row for row in SupplierPerformanceScore.objects.only("id", "supplier_id") if row.supplier_id in position]
+        columns = {field: values.tolist() for field, values in stats.items()}
+        for row in stat_rows:
+            for field, values in columns.items():
+                setattr(row, field, values[position[row.supplier_id]])
+        _apply_scores(rows, scores, categories, position)
+
+        SupplierScoreStats.objects.bulk_update(stat_rows, STAT_FIELDS, batch_size=batch_size)
+        SupplierPerformanceScore.objects.bulk_update(rows, SCORE_FIELDS, batch_size=batch_size)
+        replace_histograms(ids, histograms, batch_size=batch_size)
+    # bulk_update skips the post_save signal that invalidates KPIs
+    mark_dirty("performance")
+    return len(rows)
+
+
+# ─────────────────────────────────────────────
+# INCREMENTAL UPDATES
+# ─────────────────────────────────────────────
+# Each *_increments helper turns one new row into {stat field: amount};
+# record_event adds them to the supplier's stats row with F() expressions
+# and re-derives the score from that row alone. Both are called after the
+# new rows are saved, in the same transaction.
+
+def _as_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def delivery_increments(delivery):
+    delay = (_as_date(delivery.actual_delivery_date) - _as_date(delivery.expected_delivery_date)).days
+    return {
+        "deliveries": 1,
+        "on_time": int(delivery.delivery_status in ("ON_TIME", "EARLY")),
+        "late": int(delivery.delivery_status == "LATE"),
+        "damaged": int(delivery.condition_status == "DAMAGED"),
+        "partial": int(delivery.condition_status == "PARTIAL"),
+        "ordered": float(delivery.quantity_ordered or 0),
+        "delivered": float(delivery.quantity_delivered or 0),
+        "delay_sum": delay,
+        "delay_squares": delay ** 2,
+    }
+
+
+def complaint_increments(complaint):
+    severity = complaint.severity_level or 0
+    return {
+        "complaints": 1,
+        "unresolved": int(not complaint.resolved),
+        "open_severity": 0 if complaint.resolved else severity,
+        "resolved_severity": severity if complaint.resolved else 0,
+    }
+
+
+def complaint_edit_increments(old, new):
+    """Swap an edited complaint's old severity / resolved totals for its new ones (same supplier)."""
+    before, after = complaint_increments(old), complaint_increments(new)
+    return {field: after[field] - before[field] for field in after if after[field] != before[field]}
+
+
+def complaint_removal_increments(complaint):
+    return {field: -amount for field, amount in complaint_increments(complaint).items()}
+
+
+def review_increments(review):
+    return {
+        "reviews": 1,
+        "communication_sum": review.communication_score or 0,
+        "flexibility_sum": review.flexibility_score or 0,
+        "price_sum": review.price_competitiveness_score or 0,
+        "documentation_sum": review.documentation_score or 0,
+    }
+
+
+def sentiment_increments(sentiment):
+    confidence = float(sentiment.confidence_score or 0)
+    return {"sentiments": 1, "confidence_sum": confidence, "negative": int(confidence <= NEGATIVE_SENTIMENT)}
+
+
+def stats_arrays(stats_rows):
+    import numpy as np
+    return {field: np.array([getattr(row, field) for row in stats_rows], dtype=float) for field in STAT_FIELDS}
+
+
+def _sum_increments(increments):
+    totals = {}
+    for increment in increments:
+        for field, amount in increment.items():
+            totals[field] = totals.get(field, 0) + amount
+    return totals
+
+
+def add_to_stats(supplier_id, totals):
+    """
+    Add `totals` to the supplier's stats row with F() expressions. A
+    supplier without a stats row yet (none is written until its first
+    event or score_suppliers run) gets one built from its raw rows
+    instead; those already include the new rows being counted.
+    """
+    import numpy as np
+    stats = SupplierScoreStats.objects.filter(supplier_id=supplier_id)
+    changes = {field: F(field) + amount for field, amount in totals.items()}
+    if stats.update(**changes):
+        return
+    seed = gather_stats(np.array([supplier_id], dtype=np.int64), filtered=True)
+    try:
+        with transaction.atomic():
+            SupplierScoreStats.objects.create(
+                supplier_id=supplier_id, **{field: float(values[0]) for field, values in seed.items()},
+            )
+    except IntegrityError:
+        # Built concurrently by another event, from rows that could not see ours
+        stats.update(**changes)
+
+
+def record_event(supplier_id, *increments, weights=None):
+    """
+    Add one or more increment dicts to the supplier's running stats and
+    update its SupplierPerformanceScore from them. A constant number of
+    queries however much history the supplier has. Returns the score row.
+    """
+    totals = _sum_increments(increments)
+    # A delivery increment covers one delivery, so its delay_sum is that delivery's delay
+    delays = [increment["delay_sum"] for increment in increments if increment.get("deliveries") == 1]
+
+    with transaction.atomic():
+        add_to_stats(supplier_id, totals)
+        stats = SupplierScoreStats.objects.get(supplier_id=supplier_id)
+
+        scores = compute_scores(stats_arrays([stats]), weights or active_weights())
+        values = {field: round(float(array[0]), 2) for field, array in scores.items()}
+        values["rating_category"] = str(rating_categories(scores["final_score"])[0])
+        values["last_updated"] = timezone.now()
+        if delays:
+            record_delays([supplier_id] * len(delays), delays)
+            lead_times = distribution(stored_histograms([supplier_id]))
+            values.update((field, _column(array)[0]) for field, array in lead_times.items())
+        score, _ = SupplierPerformanceScore.objects.update_or_create(supplier_id=supplier_id, defaults=values)
+    return score
+
+
+def record_deliveries(deliveries, weights=None, batch_size=1000):
+    """
+    record_event for a batch of saved deliveries (a bulk import): stats
+    and delay histograms are updated per supplier, then the scores of the
+    suppliers touched are re-derived together. Returns how many suppliers
+    were rescored.
+    """
+    by_supplier = {}
+    for delivery in deliveries:
+        by_supplier.setdefault(delivery.supplier_id, []).append(delivery_increments(delivery))
+    if not by_supplier:
+        return 0
+    ids = sorted(by_supplier)
+
+    with transaction.atomic():
+        for supplier_id in ids:
+            add_to_stats(supplier_id, _sum_increments(by_supplier[supplier_id]))
+        record_delays(
+            [pk for pk in ids for _ in by_supplier[pk]],
+            [increment["delay_sum"] for pk in ids for increment in by_supplier[pk]],
+        )
+
+        stat_rows = list(SupplierScoreStats.objects.filter(supplier_id__in=ids).order_by("supplier_id"))
+        scores = compute_scores(stats_arrays(stat_rows), weights or active_weights())
+        categories = rating_categories(scores["final_score"])
+        scores.update(distribution(stored_histograms(ids)))
+
+        SupplierPerformanceScore.objects.bulk_create(
+            [SupplierPerformanceScore(supplier_id=pk) for pk in ids], ignore_conflicts=True, batch_size=batch_size,
+        )
+        rows = list(SupplierPerformanceScore.objects.filter(supplier_id__in=ids))
+        _apply_scores(rows, scores, categories, {pk: i for i, pk in enumerate(ids)})
+        SupplierPerformanceScore.objects.bulk_update(rows, SCORE_FIELDS, batch_size=batch_size)
+    return len(ids)
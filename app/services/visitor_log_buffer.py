@@ -0,0 +1,160 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+from app.models import VisitorLog
+from app.services.visitor_rollups import record_visits
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------
+# Buffered Visitor Log Writer
+# ---------------------------------------
+class VisitorLogBuffer:
+    """
+    Bounded in-process queue of unsaved VisitorLog rows.
+
+    A daemon thread drains the queue and writes rows with bulk_create once
+    `batch_size` rows are waiting or `flush_interval` seconds have passed.
+    When the queue is full, `overflow="drop"` discards the visit and
+    `overflow="block"` waits up to `block_timeout` seconds for room first.
+    """
+
+    OVERFLOW_POLICIES = ("drop", "block")
+
+    def __init__(self, max_size=10000, batch_size=500, flush_interval=2.0,
+                 overflow="drop", block_timeout=0.05):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {self.OVERFLOW_POLICIES}, got {overflow!r}")
+
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+
+        self.written = 0
+        self.dropped = 0
+
+        self._queue = queue.Queue(maxsize=max_size)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._atexit_registered = False
+
+    # ── Lifecycle ─────────────────────────────────────────────────────
+    def start(self):
+        """Start the flusher thread (no-op if it is already running)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="visitor-log-flusher", daemon=True
+            )
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def stop(self, timeout=10.0):
+        """Stop the flusher thread and write everything still queued."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        # Anything left (thread never started, or join timed out)
+        self.flush()
+
+    # ── Producer side ─────────────────────────────────────────────────
+    def put(self, entry):
+        """Queue an unsaved VisitorLog. Returns False if the visit was dropped."""
+        if self._thread is None or not self._thread.is_alive():
+            # Started lazily so forked workers each get their own thread
+            self.start()
+        try:
+            if self.overflow == "block":
+                self._queue.put(entry, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    # ── Consumer side ─────────────────────────────────────────────────
+    def flush(self):
+        """Synchronously write every queued row from the calling thread."""
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return
+            self._write(batch)
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        pending = []
+        deadline = time.monotonic() + self.flush_interval
+        try:
+            while not self._stop.is_set():
+                try:
+                    pending.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0.01)))
+                except queue.Empty:
+                    pass
+                pending.extend(self._drain(self.batch_size - len(pending)))
+
+                if len(pending) >= self.batch_size or time.monotonic() >= deadline:
+                    self._write(pending)
+                    pending = []
+                    deadline = time.monotonic() + self.flush_interval
+
+            self._write(pending)
+            self.flush()
+        finally:
+            connection.close()
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            close_old_connections()
+            with transaction.atomic():
+                VisitorLog.objects.bulk_create(batch, batch_size=self.batch_size)
+                record_visits(batch)
+            with self._lock:
+                self.written += len(batch)
+        except Exception:
+            # Never let a logging failure kill the flusher thread
+            logger.exception("Failed to write %d buffered visitor log rows", len(batch))
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_visitor_log_buffer():
+    """Process-wide buffer configured from settings.VISITOR_LOG_BUFFER."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = VisitorLogBuffer(**getattr(settings, "VISITOR_LOG_BUFFER", {}))
+    return _buffer
@@ -0,0 +1,172 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from app.models import VisitorDailyRollup, VisitorHourlyRollup, VisitorIpDailyRollup, VisitorLog
+
+PAGE_KEY_FIELDS = ("bucket_start", "path", "location")
+VISITOR_KEY_FIELDS = ("bucket_start", "ip_address")
+
+
+def _hour_start(dt):
+    return timezone.localtime(dt).replace(minute=0, second=0, microsecond=0)
+
+
+def _day_start(dt):
+    return timezone.localtime(dt).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _page_key(bucket_start, entry):
+    return (bucket_start, entry.path, entry.location or "Unknown")
+
+
+def _visitor_key(day_start, entry):
+    return (day_start, entry.ip_address or "")
+
+
+# ─────────────────────────────────────────────
+# INCREMENTAL MAINTENANCE
+# ─────────────────────────────────────────────
+
+def _increment(model, key_fields, counts):
+    """
+    Upsert `views += n` for every rollup key in `counts` in three queries
+    however many keys there are: insert the missing keys, read back the
+    ids, then one UPDATE with a CASE per row.
+    """
+    model.objects.bulk_create(
+        [model(**dict(zip(key_fields, key)), views=0) for key in counts],
+        ignore_conflicts=True,
+    )
+    candidates = model.objects.filter(**{
+        f"{field}__in": {key[i] for key in counts} for i, field in enumerate(key_fields)
+    }).values_list("id", *key_fields)
+    ids = {tuple(key): pk for pk, *key in candidates if tuple(key) in counts}
+    model.objects.filter(id__in=ids.values()).update(views=F("views") + Case(
+        *(When(id=pk, then=Value(counts[key])) for key, pk in ids.items()),
+        default=Value(0), output_field=IntegerField(),
+    ))
+
+
+def record_visits(entries):
+    """Fold a batch of VisitorLog rows into the hourly, daily and per-IP rollups."""
+    hourly, daily, visitors = Counter(), Counter(), Counter()
+    for entry in entries:
+        day = _day_start(entry.visited_at)
+        hourly[_page_key(_hour_start(entry.visited_at), entry)] += 1
+        daily[_page_key(day, entry)] += 1
+        visitors[_visitor_key(day, entry)] += 1
+
+    if not hourly:
+        return
+    with transaction.atomic():
+        _increment(VisitorHourlyRollup, PAGE_KEY_FIELDS, hourly)
+        _increment(VisitorDailyRollup, PAGE_KEY_FIELDS, daily)
+        _increment(VisitorIpDailyRollup, VISITOR_KEY_FIELDS, visitors)
+
+
+# ─────────────────────────────────────────────
+# BACKFILL
+# ─────────────────────────────────────────────
+
+def rebuild_rollups(since=None, batch_size=2000):
+    """
+    Recompute the rollup tables from raw VisitorLog rows visited on or
+    after `since` (rounded down to midnight); everything when `since` is
+    None. Returns the number of (hourly, daily, per-IP) rows written.
+    """
+    logs = VisitorLog.objects.all()
+    if since is not None:
+        since = _day_start(since)
+        logs = logs.filter(visited_at__gte=since)
+
+    written = []
+    for model, trunc, key_fields in (
+        (VisitorHourlyRollup, TruncHour, PAGE_KEY_FIELDS),
+        (VisitorDailyRollup, TruncDay, PAGE_KEY_FIELDS),
+        (VisitorIpDailyRollup, TruncDay, VISITOR_KEY_FIELDS),
+    ):
+        with transaction.atomic():
+            stale = model.objects.all()
+            if since is not None:
+                stale = stale.filter(bucket_start__gte=since)
+            stale.delete()
+
+            rows = (
+                logs.order_by()
+                .annotate(bucket=trunc("visited_at"))
+                .values("bucket", *key_fields[1:])
+                .annotate(views=Count("id"))
+            )
+            batch, total = [], 0
+            for row in rows.iterator(chunk_size=batch_size):
+                row["bucket_start"] = row.pop("bucket")
+                if "location" in row:
+                    row["location"] = row["location"] or "Unknown"
+                if "ip_address" in row:
+                    row["ip_address"] = row["ip_address"] or ""
+                batch.append(model(**row))
+                if len(batch) >= batch_size:
+                    model.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+            model.objects.bulk_create(batch)
+            written.append(total + len(batch))
+    return tuple(written)
+
+
+# ─────────────────────────────────────────────
+# READ SIDE
+# ─────────────────────────────────────────────
+
+def _rollup_sources(since):
+    """
+    Rollup querysets that together cover [since, now]: daily rows for whole
+    days, hourly rows for the partial first day.
+    """
+    if since is None:
+        return [VisitorDailyRollup.objects.all()]
+
+    first_hour = _hour_start(since)
+    next_day = _day_start(since) + timedelta(days=1)
+    return [
+        VisitorHourlyRollup.objects.filter(bucket_start__gte=first_hour, bucket_start__lt=next_day),
+        VisitorDailyRollup.objects.filter(bucket_start__gte=next_day),
+    ]
+
+
+def visitor_summary(since=None, top_pages=10, top_locations=5):
+    """
+    Page views, distinct IPs, bounce IPs (exactly one view), top pages and
+    top locations since `since` (all time when None), read from rollups.
+    Visitors are counted over whole days from the day `since` falls in;
+    both counts are one aggregate in SQL over the per-IP rollup.
+    """
+    views_by_path = Counter()
+    views_by_location = Counter()
+
+    for qs in _rollup_sources(since):
+        qs = qs.order_by()
+        for row in qs.values("path").annotate(v=Sum("views")):
+            views_by_path[row["path"]] += row["v"]
+        for row in qs.values("location").annotate(v=Sum("views")):
+            views_by_location[row["location"]] += row["v"]
+
+    ips = VisitorIpDailyRollup.objects.all()
+    if since is not None:
+        ips = ips.filter(bucket_start__gte=_day_start(since))
+    visitors = ips.order_by().values("ip_address").annotate(v=Sum("views")).aggregate(
+        unique=Count("ip_address"), bounces=Count("ip_address", filter=Q(v=1)),
+    )
+
+    return {
+        "page_views": sum(views_by_path.values()),
+        "unique_visitors": visitors["unique"],
+        "bounce_ips": visitors["bounces"],
+        "top_pages": [{"path": p, "visits": v} for p, v in views_by_path.most_common(top_pages)],
+        "top_locations": [{"location": l, "count": c} for l, c in views_by_location.most_common(top_locations)],
+    }
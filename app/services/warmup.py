@@ -0,0 +1,54 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    """
+    Load the dependencies that are otherwise imported on first use (VADER's
+    lexicon, the local transformer model when one is configured, and the
+    pooled LLM session), so the first request a worker serves does not pay
+    for them. Returns {step: seconds}.
+
+    Call it from a web server's worker start-up hook, e.g. in gunicorn.conf.py:
+
+        def post_worker_init(worker):
+            from app.services.warmup import warm_up
+            warm_up()
+
+    or set WARM_UP_ON_START = True to run it in a background thread when
+    Django starts.
+    """
+    from app.services.llm import get_session
+    from app.services.sentiment import _vader, get_sentiment_service
+
+    timings = {}
+
+    def step(name, func):
+        start = time.perf_counter()
+        try:
+            func()
+        except Exception:
+            logger.exception("Warm-up step %s failed", name)
+        timings[name] = time.perf_counter() - start
+
+    step("vader", _vader)
+    service = get_sentiment_service()
+    if service.transformer is not None:
+        step("transformer", lambda: service.transformer.available)
+    step("llm_session", get_session)
+
+    logger.info("Warm-up done: %s", ", ".join(f"{name} {secs * 1000:.0f}ms" for name, secs in timings.items()))
+    return timings
+
+
+def warm_up_in_background():
+    if not getattr(settings, "WARM_UP_ON_START", False):
+        return None
+    thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
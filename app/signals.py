@@ -0,0 +1,50 @@
+from django.db.models.signals import post_delete, post_save
+
+from .models import (
+    Supplier, SupplierPerformanceScore, SupplierSentiment, Delivery,
+    Complaint, InventoryItem, Customer, Review, SentimentAnalysis,
+    EngagementMetric, MarketTrend,
+)
+from .services.kpi_snapshot import mark_dirty
+from .services.low_stock import refresh_low_stock
+
+
+# ---------------------------------------
+# KPI snapshot invalidation
+# ---------------------------------------
+# Model -> KPI snapshot groups computed from its table
+KPI_DEPENDENCIES = {
+    Supplier:                 ("suppliers",),
+    SupplierPerformanceScore: ("performance",),
+    SupplierSentiment:        ("supplier_sentiment",),
+    Delivery:                 ("deliveries",),
+    Complaint:                ("complaints",),
+    InventoryItem:            ("inventory",),
+    Customer:                 ("customers",),
+    Review:                   ("reviews",),
+    SentimentAnalysis:        ("sentiments",),
+    EngagementMetric:         ("engagement",),
+    MarketTrend:              ("market",),
+}
+
+
+def _invalidate_kpis(sender, **kwargs):
+    mark_dirty(*KPI_DEPENDENCIES[sender])
+
+
+for _model in KPI_DEPENDENCIES:
+    post_save.connect(_invalidate_kpis, sender=_model, dispatch_uid=f"kpi_save_{_model.__name__}")
+    post_delete.connect(_invalidate_kpis, sender=_model, dispatch_uid=f"kpi_delete_{_model.__name__}")
+
+
+# ---------------------------------------
+# Low-stock flag and alerts
+# ---------------------------------------
+def _refresh_low_stock(sender, instance, **kwargs):
+    # Saves from the admin or the seeder can change stock or the reorder level
+    refresh_low_stock([instance.pk])
+    # Keep the instance in step so saving it again does not reset the flag
+    instance.is_below_reorder = instance.quantity_in_stock <= instance.reorder_level
+
+
+post_save.connect(_refresh_low_stock, sender=InventoryItem, dispatch_uid="low_stock_save")
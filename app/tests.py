@@ -1,3 +1,1504 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core import mail
+from django.core.management import call_command
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.db import connection, transaction
+from django.db.models.query import QuerySet
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import notifications, views
+from .admin import ComplaintAdmin
+from .models import (
+    AiInsightClaim, Benchmark, Complaint, CustomerProfile, DecisionRecommendation, Delivery, EmailOutbox, EngagementMetric,
+    FastFoodBrand, InventoryItem, KpiSnapshot, VisitorDailyRollup, VisitorHourlyRollup, VisitorIpDailyRollup, VisitorLog, LlmResponse, NotificationEvent, Order, OrderSequence,
+    Review, ScoreWeightProfile, SentimentAnalysis, StockMovement, Supplier, SupplierDelayBin, SupplierPerformanceScore,
+    SupplierReview, SupplierScoreStats, SupplierSentiment,
+)
+from .services import (
+    ai_insights, benchmarking, csv_import, email_outbox, forecasting, lead_times, llm, low_stock, panels, stock,
+    supplier_scoring, visitor_log_buffer, visitor_rollups,
+)
+from .services import sentiment
+from .services.sentiment import SentimentService, TransformerScorer
+from .services.supplier_scoring import complaint_increments, delivery_increments, record_event
+from .services.visitor_log_buffer import VisitorLogBuffer
+from .services.warmup import warm_up
+from .services.kpi_snapshot import get_kpis
+from .services.panels import PANELS
+
+
+def _render_stub(request, template_name, context=None, *args, **kwargs):
+    return HttpResponse(template_name)
+
+
+@mock.patch("app.views.render", _render_stub)
+class KpiQueryCountTests(TestCase):
+    """
+    Dashboard KPIs come from app.services.kpi_engine, one aggregate per table,
+    materialized in KpiSnapshot. Template rendering is stubbed so only the
+    queries needed to build the context are counted; querysets handed to the
+    template stay lazy. Each view is called once first so the snapshot is
+    warm.
+    """
+
+    def setUp(self):
+        self.request = RequestFactory().get("/")
+
+    def test_admin_dashboard(self):
+        # 4 page rollup queries + 1 visitor aggregate + 1 KPI snapshot read
+        views.admin_dashboard(self.request)
+        with self.assertNumQueries(6):
+            views.admin_dashboard(self.request)
+
+    def test_dashboard(self):
+        # 2 page rollup queries + 1 visitor aggregate + 1 KPI snapshot read + 5 single-table
+        # counts + 4 chart breakdowns
+        views.dashboard(self.request)
+        with self.assertNumQueries(13):
+            views.dashboard(self.request)
+
+    def test_supplierdashboard(self):
+        # KPI snapshot read + best / riskiest supplier + most complained-about + delay histograms
+        views.supplierdashboard(self.request)
+        with self.assertNumQueries(5):
+            views.supplierdashboard(self.request)
+
+    def test_inventory(self):
+        views.inventory(self.request)
+        with self.assertNumQueries(1):
+            views.inventory(self.request)
+
+    def test_build_data_snapshot(self):
+        # KPI snapshot read + top suppliers by review count
+        views.build_data_snapshot()
+        with self.assertNumQueries(2):
+            views.build_data_snapshot()
+
+    def test_cold_snapshot_is_one_aggregate_per_table(self):
+        # snapshot read, then per group: one aggregate + INSERT in a savepoint
+        with self.assertNumQueries(1 + 4 * 4):
+            get_kpis("suppliers", "deliveries", "complaints", "performance")
+
+
+class VisitorRollupTests(TestCase):
+    def setUp(self):
+        day = timezone.make_aware(datetime(2025, 3, 3, 9, 15))
+        visits = [
+            (day, "/", "Harare", "10.0.0.1"),
+            (day, "/", "Harare", "10.0.0.1"),
+            (day + timedelta(hours=1), "/suppliers/", "Harare", "10.0.0.2"),
+            (day + timedelta(days=1), "/", "", "10.0.0.1"),
+            (day + timedelta(days=1), "/", "Bulawayo", None),
+        ]
+        self.logs = VisitorLog.objects.bulk_create([
+            VisitorLog(visited_at=at, path=path, method="GET", location=location, ip_address=ip)
+            for at, path, location, ip in visits
+        ])
+
+    def _tables(self):
+        return [
+            sorted(model.objects.values_list(*fields, "views"))
+            for model, fields in (
+                (VisitorHourlyRollup, visitor_rollups.PAGE_KEY_FIELDS),
+                (VisitorDailyRollup, visitor_rollups.PAGE_KEY_FIELDS),
+                (VisitorIpDailyRollup, visitor_rollups.VISITOR_KEY_FIELDS),
+            )
+        ]
+
+    def test_incremental_batches_match_backfill(self):
+        # savepoint + per table: insert missing keys, read ids, one CASE update
+        with self.assertNumQueries(2 + 3 * 3):
+            visitor_rollups.record_visits(self.logs[:3])
+        visitor_rollups.record_visits(self.logs[3:])
+        incremental = self._tables()
+        self.assertEqual(
+            incremental[2][:2],
+            [(timezone.make_aware(datetime(2025, 3, 3)), "10.0.0.1", 2),
+             (timezone.make_aware(datetime(2025, 3, 3)), "10.0.0.2", 1)],
+        )
+
+        self.assertEqual(visitor_rollups.rebuild_rollups(), (4, 4, 4))
+        self.assertEqual(self._tables(), incremental)
+
+    def test_summary_counts_visitors_in_sql(self):
+        visitor_rollups.rebuild_rollups()
+        summary = visitor_rollups.visitor_summary()
+        self.assertEqual((summary["page_views"], summary["unique_visitors"], summary["bounce_ips"]), (5, 3, 2))
+        self.assertEqual(summary["top_pages"][0], {"path": "/", "visits": 4})
+        self.assertEqual(summary["top_locations"][0], {"location": "Harare", "count": 3})
+
+        # from the second day on, 10.0.0.1 has a single view
+        summary = visitor_rollups.visitor_summary(since=timezone.make_aware(datetime(2025, 3, 4, 12)))
+        self.assertEqual((summary["unique_visitors"], summary["bounce_ips"]), (2, 2))
+
+
+class VisitorLogBufferTests(TestCase):
+    """
+    The flusher thread and atexit hook are stubbed so queued rows are
+    written from the test thread, inside the test transaction; the thread
+    test only records batches and never touches the database.
+    """
+
+    def _buffer(self, **options):
+        buffer = VisitorLogBuffer(**options)
+        for patcher in (mock.patch.object(buffer, "_run"), mock.patch("app.services.visitor_log_buffer.atexit")):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return buffer
+
+    def _entry(self, path="/"):
+        return VisitorLog(path=path, method="GET", location="Harare", ip_address="10.0.0.1", visited_at=timezone.now())
+
+    def test_unknown_overflow_policy_is_rejected(self):
+        with self.assertRaises(ValueError):
+            VisitorLogBuffer(overflow="spill")
+
+    def test_drop_overflow_discards_visits_when_full(self):
+        buffer = self._buffer(max_size=2)
+        self.assertEqual([buffer.put(self._entry()) for _ in range(3)], [True, True, False])
+        self.assertEqual((buffer.qsize(), buffer.dropped), (2, 1))
+
+    def test_block_overflow_waits_for_room(self):
+        buffer = self._buffer(max_size=1, overflow="block", block_timeout=0.05)
+        buffer.put(self._entry())
+
+        started = time.monotonic()
+        self.assertFalse(buffer.put(self._entry()))
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertEqual(buffer.dropped, 1)
+
+        # room freed while the producer waits: the visit is kept
+        buffer.block_timeout = 5
+        consumer = threading.Timer(0.05, buffer._queue.get_nowait)
+        consumer.start()
+        self.assertTrue(buffer.put(self._entry("/later/")))
+        consumer.join()
+        self.assertEqual((buffer.qsize(), buffer.dropped), (1, 1))
+
+    def test_flush_writes_batches_and_rollups(self):
+        buffer = self._buffer(batch_size=2)
+        for _ in range(5):
+            buffer.put(self._entry())
+
+        with mock.patch.object(buffer, "_write", wraps=buffer._write) as write:
+            buffer.flush()
+        self.assertEqual([len(call.args[0]) for call in write.call_args_list], [2, 2, 1])
+        self.assertEqual((VisitorLog.objects.count(), buffer.written, buffer.qsize()), (5, 5, 0))
+        self.assertEqual(VisitorDailyRollup.objects.get().views, 5)
+
+    def test_stop_is_registered_at_exit_and_flushes(self):
+        buffer = self._buffer()
+        buffer.put(self._entry())
+        buffer.put(self._entry())
+        register = visitor_log_buffer.atexit.register
+        register.assert_called_once_with(buffer.stop)
+
+        # what the interpreter runs on shutdown
+        register.call_args.args[0]()
+        self.assertEqual((VisitorLog.objects.count(), buffer.qsize()), (2, 0))
+
+    def test_flusher_thread_writes_full_batches_then_on_interval(self):
+        buffer = VisitorLogBuffer(batch_size=3, flush_interval=0.2)
+        batches = []
+        buffer._write = lambda batch: batch and batches.append(len(batch))
+
+        def wait_for(count):
+            deadline = time.monotonic() + 5
+            while len(batches) < count and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        # a full batch is written before the interval elapses
+        with mock.patch("app.services.visitor_log_buffer.atexit.register"):
+            for _ in range(3):
+                buffer.put(self._entry())
+        wait_for(1)
+        self.assertEqual(batches, [3])
+
+        # a partial batch waits for the interval
+        buffer.put(self._entry())
+        wait_for(2)
+        self.assertEqual(batches, [3, 1])
+
+        buffer.put(self._entry())
+        buffer.stop()
+        self.assertEqual(batches, [3, 1, 1])
+        self.assertFalse(buffer._thread.is_alive())
+
+
+class EngagementCalendarTests(TestCase):
+    def setUp(self):
+        customer = CustomerProfile.objects.create(full_name="Tester", age_range="18-25", location="Harare")
+        brand = FastFoodBrand.objects.create(name="Chicken Inn")
+        scores = dict.fromkeys((
+            "taste", "freshness", "portion_size", "presentation", "menu_variety", "food_value",
+            "staff_friendliness", "professionalism", "order_accuracy", "waiting_time",
+            "problem_resolution", "cleanliness", "ambience", "seating", "hygiene",
+            "affordability", "pricing_fairness", "promotions", "brand_reputation",
+            "food_trust", "nps_score",
+        ), 5)
+        self.review = Review.objects.create(customer=customer, brand=brand, full_experience="Fine", **scores)
+        self.metrics = [self._metric(date(2025, 3, day)) for day in (3, 3, 10)]
+
+    def _metric(self, day):
+        metric = EngagementMetric.objects.create(customer=self.review.customer, review=self.review)
+        # recorded_month is auto_now_add, so it is set afterwards
+        EngagementMetric.objects.filter(pk=metric.pk).update(recorded_month=day)
+        return metric
+
+    def _get(self, **headers):
+        request = RequestFactory().get("/", {"start": "2025-03-01T00:00:00", "end": "2025-04-01"}, **headers)
+        return views.engagement_calendar(request)
+
+    def test_feed_counts_engagements_per_day(self):
+        response = self._get()
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), [
+            {"title": "2 Engagements", "start": "2025-03-03", "allDay": True},
+            {"title": "1 Engagement", "start": "2025-03-10", "allDay": True},
+        ])
+
+    def test_unchanged_window_is_not_modified(self):
+        etag = self._get()["ETag"]
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # moving an existing row to another day changes the feed and its ETag
+        EngagementMetric.objects.filter(pk=self.metrics[0].pk).update(recorded_month=date(2025, 3, 10))
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_window_is_clamped(self):
+        def window(**params):
+            return views._calendar_window(RequestFactory().get("/", params))
+
+        self.assertEqual(window(start="2025-03-01", end="2030-01-01"), (date(2025, 3, 1), date(2026, 3, 2)))
+        self.assertEqual(window(start="2025-03-01", end="2025-02-01"), (date(2025, 3, 1), date(2025, 4, 1)))
+        self.assertEqual(window(start="junk")[0], timezone.localdate().replace(day=1))
+
+
+class DashboardPanelTests(TestCase):
+    def setUp(self):
+        # duplicate names so pages break inside runs of equal sort keys
+        self.suppliers = [
+            Supplier.objects.create(
+                supplier_code=f"SUP-P{i}", name=name, company_name="Panel Ltd",
+                contact_person="Tester", phone="000", location="Harare",
+            )
+            for i, name in enumerate(["Beta", "Alpha", "Beta", "Gamma", "Beta"])
+        ]
+
+    def _walk(self, panel, limit):
+        pages, cursor = [], None
+        while True:
+            page = panel.page(cursor=cursor, limit=limit)
+            pages.append([row["id"] for row in page["results"]])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return pages
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(panels.decode_cursor(panels.encode_cursor("Beta", 7)), ("Beta", 7))
+        self.assertEqual(panels.decode_cursor(panels.encode_cursor(None, 7)), (None, 7))
+
+    def test_malformed_cursors_are_rejected(self):
+        def encoded(value):
+            return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+        for cursor in ("abc", "junk", encoded({"id": 1}), encoded([1]), encoded(["Beta", "x"]), encoded(["Beta", None])):
+            with self.subTest(cursor=cursor), self.assertRaises(panels.InvalidCursor):
+                PANELS["suppliers"].page(cursor=cursor)
+
+    def test_pages_split_ties_without_gaps_or_repeats(self):
+        by_name = list(Supplier.objects.order_by("name", "id").values_list("id", flat=True))
+        pages = self._walk(PANELS["suppliers"], limit=2)
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), by_name)
+
+        newest_first = [supplier.pk for supplier in reversed(self.suppliers)]
+        self.assertEqual(sum(self._walk(panels.Panel(Supplier, ("name",)), limit=2), []), newest_first)
+
+    def test_last_full_page_has_no_cursor(self):
+        self.assertEqual([len(page) for page in self._walk(PANELS["suppliers"], limit=5)], [5])
+        self.assertEqual(len(PANELS["suppliers"].page(limit=0)["results"]), 1)
+
+    def test_view(self):
+        def get(panel, **params):
+            response = views.dashboard_panel(RequestFactory().get("/", params), panel)
+            return response.status_code, json.loads(response.content)
+
+        status, page = get("suppliers", limit="3")
+        self.assertEqual((status, len(page["results"])), (200, 3))
+        status, page = get("suppliers", limit="3", cursor=page["next_cursor"])
+        self.assertEqual((status, len(page["results"]), page["next_cursor"]), (200, 2, None))
+
+        self.assertEqual(get("nope")[0], 404)
+        self.assertEqual(get("suppliers", cursor="junk")[0], 400)
+        self.assertEqual(get("suppliers", limit="many")[0], 400)
+
+
+class KpiSnapshotInvalidationTests(TestCase):
+    def setUp(self):
+        self.supplier = Supplier.objects.create(
+            supplier_code="SUP-T01", name="Test Supplier", company_name="Test Ltd",
+            contact_person="Tester", phone="000", location="Harare",
+        )
+
+    def _deliver(self, status):
+        return Delivery.objects.create(
+            supplier=self.supplier, order_number="ORD-T", invoice_number="INV-T",
+            product_category="Dairy", quantity_ordered=10, quantity_delivered=10,
+            expected_delivery_date=date(2026, 1, 1), actual_delivery_date=date(2026, 1, 1),
+            delivery_status=status, condition_status="GOOD",
+        )
+
+    def test_save_marks_only_its_group_dirty(self):
+        get_kpis("deliveries", "complaints")
+        self._deliver("ON_TIME")
+
+        dirty = set(KpiSnapshot.objects.filter(is_dirty=True).values_list("group", flat=True))
+        self.assertEqual(dirty, {"deliveries"})
+
+        # snapshot read + recompute deliveries + mark clean
+        with self.assertNumQueries(3):
+            kpis = get_kpis("deliveries", "complaints")
+        self.assertEqual(kpis["deliveries"]["on_time"], 1)
+
+    def test_delete_marks_group_dirty(self):
+        delivery = self._deliver("LATE")
+        self.assertEqual(get_kpis("deliveries")["deliveries"]["late"], 1)
+        delivery.delete()
+        self.assertEqual(get_kpis("deliveries")["deliveries"]["late"], 0)
+
+
+AI_REPLY = '{"summary": "Steady", "risks": ["Late deliveries"], "opportunities": [], "actions": ["Call supplier", "Reorder"]}'
+
+
+@mock.patch("app.services.ai_insights.ai_available", return_value=True)
+class AiInsightCacheTests(TestCase):
+    def setUp(self):
+        self.snapshot = {"supplier_total": 3, "on_time_rate": 91.5}
+
+    @mock.patch("app.services.ai_insights.call_openrouter", return_value=AI_REPLY)
+    def test_refresh_stores_one_row_per_snapshot_hash(self, call, available):
+        first = ai_insights.refresh_insights(self.snapshot)
+        again = ai_insights.refresh_insights(dict(self.snapshot))
+
+        self.assertEqual(first.pk, again.pk)
+        self.assertEqual(call.call_count, 1)
+        self.assertEqual(ai_insights.insights_from(first), {
+            "summary": "Steady", "risks": ["Late deliveries"],
+            "opportunities": [], "actions": ["Call supplier", "Reorder"],
+        })
+
+    @mock.patch("app.services.ai_insights.call_openrouter", return_value="")
+    def test_empty_reply_is_not_stored(self, call, available):
+        self.assertIsNone(ai_insights.refresh_insights(self.snapshot))
+        self.assertFalse(DecisionRecommendation.objects.exists())
+
+    @override_settings(
+        LLM_BACKEND={"backend": "fixture", "reply": "Sorry, I cannot help with that."},
+        LLM_CACHE={"enabled": True, "ttl": 3600, "max_entries": 10},
+    )
+    def test_malformed_reply_is_not_stored_or_cached(self, available):
+        self.assertEqual(ai_insights.get_ai_insights(self.snapshot), ai_insights.PARSE_ERROR_INSIGHTS)
+        self.assertEqual(LlmResponse.objects.count(), 1)
+
+        self.assertIsNone(ai_insights.refresh_insights(self.snapshot))
+        self.assertFalse(DecisionRecommendation.objects.exists())
+        # evicted, so the next refresh asks the model again
+        self.assertFalse(LlmResponse.objects.exists())
+
+    @mock.patch("app.services.ai_insights.threading.Thread")
+    @mock.patch("app.services.ai_insights.call_openrouter", return_value=AI_REPLY)
+    def test_serves_stored_row_and_revalidates_only_on_hash_change(self, call, thread, available):
+        stored = ai_insights.refresh_insights(self.snapshot)
+
+        latest, stale = ai_insights.latest_insights(self.snapshot)
+        self.assertEqual((latest, stale), (stored, False))
+        thread.assert_not_called()
+
+        changed = {**self.snapshot, "on_time_rate": 80.0}
+        for _ in range(2):
+            latest, stale = ai_insights.latest_insights(changed)
+            self.assertEqual((latest, stale), (stored, True))
+        # one refresh in flight per hash, never an inline model call
+        thread.assert_called_once()
+        self.assertEqual(call.call_count, 1)
+
+    @mock.patch("app.services.ai_insights.threading.Thread")
+    def test_claim_is_shared_across_workers(self, thread, available):
+        digest = ai_insights.snapshot_hash(self.snapshot)
+        # another worker's generation is in flight
+        claim = AiInsightClaim.objects.create(snapshot_hash=digest)
+        self.assertFalse(ai_insights.schedule_refresh(self.snapshot, digest))
+
+        # it failed RETRY_AFTER seconds ago: exactly one taker
+        expired = timezone.now() - timedelta(seconds=ai_insights.RETRY_AFTER + 1)
+        AiInsightClaim.objects.filter(pk=claim.pk).update(claimed_at=expired)
+        self.assertTrue(ai_insights.schedule_refresh(self.snapshot, digest))
+        self.assertFalse(ai_insights.schedule_refresh(self.snapshot, digest))
+        thread.assert_called_once()
+
+    @mock.patch("app.services.ai_insights.connection")
+    def test_successful_refresh_releases_claims(self, connection, available):
+        digest = ai_insights.snapshot_hash(self.snapshot)
+        expired = timezone.now() - timedelta(seconds=ai_insights.RETRY_AFTER + 1)
+        AiInsightClaim.objects.create(snapshot_hash="old", claimed_at=expired)
+        AiInsightClaim.objects.create(snapshot_hash="other")
+        self.assertTrue(ai_insights.claim_refresh(digest))
+
+        with mock.patch("app.services.ai_insights.call_openrouter", return_value=""):
+            ai_insights._refresh_in_background(self.snapshot, digest)
+        # a failed generation keeps its claim to back off
+        self.assertEqual(AiInsightClaim.objects.count(), 3)
+
+        with mock.patch("app.services.ai_insights.call_openrouter", return_value=AI_REPLY):
+            ai_insights._refresh_in_background(self.snapshot, digest)
+        self.assertEqual(list(AiInsightClaim.objects.values_list("snapshot_hash", flat=True)), ["other"])
+
+
+@override_settings(
+    LLM_BACKEND={"backend": "fixture", "reply": AI_REPLY},
+    LLM_CACHE={"enabled": True, "ttl": 3600, "max_entries": 2},
+)
+class LlmResponseCacheTests(TestCase):
+    def test_identical_prompt_is_served_from_cache(self):
+        with mock.patch.object(llm.FixtureBackend, "complete", return_value=AI_REPLY) as backend:
+            self.assertEqual(llm.complete("sys", "user"), AI_REPLY)
+            self.assertEqual(llm.complete("sys", "user"), AI_REPLY)
+            llm.complete("sys", "user", max_tokens=100)
+        self.assertEqual(backend.call_count, 2)
+        self.assertEqual(LlmResponse.objects.get(key=llm.prompt_key("sys", "user", llm.OPENROUTER_MODEL, 900)).hits, 1)
+
+    def test_expired_entry_is_refetched(self):
+        llm.complete("sys", "user")
+        LlmResponse.objects.update(created_at=timezone.now() - timedelta(hours=2))
+        with mock.patch.object(llm.FixtureBackend, "complete", return_value="fresh") as backend:
+            self.assertEqual(llm.complete("sys", "user"), "fresh")
+        backend.assert_called_once()
+
+    def test_least_recently_used_entry_is_evicted(self):
+        llm.complete("sys", "a")
+        llm.complete("sys", "b")
+        LlmResponse.objects.update(last_used_at=timezone.now() - timedelta(minutes=5))
+        llm.complete("sys", "a")  # hit: "a" is now the most recently used
+        llm.complete("sys", "c")
+
+        kept = {llm.prompt_key("sys", u, llm.OPENROUTER_MODEL, 900) for u in ("a", "c")}
+        self.assertEqual(set(LlmResponse.objects.values_list("key", flat=True)), kept)
+
+
+class FakeLlmServer:
+    """Local chat-completions endpoint that can be made slow or failing."""
+
+    def __init__(self):
+        self.delay = 0
+        self.fail_next = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with fake._lock:
+                    fake.hits += 1
+                    failing = fake.fail_next > 0
+                    fake.fail_next -= failing
+                try:
+                    time.sleep(fake.delay)
+                    body = json.dumps({"choices": [{"message": {"content": "ok"}}]}).encode()
+                    self.send_response(503 if failing else 200)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except OSError:
+                    pass  # client gave up
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v1/chat/completions"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class LlmHttpResilienceTests(SimpleTestCase):
+    def setUp(self):
+        self.fake = FakeLlmServer()
+        self.addCleanup(self.fake.close)
+
+    def _backend(self, retries=0, threshold=3, reset_timeout=60):
+        return llm.ChatCompletionsBackend(
+            url=self.fake.url, api_key="test", timeout=(1, 0.3),
+            session=llm.build_session(retries=retries, backoff=0),
+            breaker=llm.CircuitBreaker(failure_threshold=threshold, reset_timeout=reset_timeout),
+        )
+
+    def _call(self, backend):
+        try:
+            return backend.complete("sys", "user", "model", 10)
+        except Exception as e:
+            return type(e)
+
+    def test_degraded_endpoint_stops_piling_up_workers(self):
+        self.fake.delay = 2
+        backend = self._backend(threshold=3)
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            outcomes = list(pool.map(lambda _: self._call(backend), range(20)))
+        elapsed = time.monotonic() - start
+
+        # Workers freed by the first failures may try again until the
+        # threshold is reached; every call after that fails fast
+        self.assertLessEqual(self.fake.hits, 4 + 3 - 1)
+        self.assertEqual(outcomes.count(llm.CircuitOpenError), 20 - self.fake.hits)
+        self.assertLess(elapsed, 1.5)  # 20 calls x 0.3s timeout / 4 workers would be 1.5s
+        self.assertEqual(backend.breaker.state, llm.CircuitBreaker.OPEN)
+
+    def test_half_open_trial_closes_circuit(self):
+        self.fake.delay = 1
+        backend = self._backend(threshold=1, reset_timeout=0.05)
+        self._call(backend)
+        self.assertEqual(backend.breaker.state, llm.CircuitBreaker.OPEN)
+
+        self.fake.delay = 0
+        time.sleep(0.06)
+        self.assertEqual(backend.breaker.state, llm.CircuitBreaker.HALF_OPEN)
+        self.assertEqual(self._call(backend), "ok")
+        self.assertEqual(backend.breaker.status()["state"], llm.CircuitBreaker.CLOSED)
+
+    def test_transient_5xx_is_retried_on_the_pooled_session(self):
+        self.fake.fail_next = 1
+        backend = self._backend(retries=2)
+        self.assertEqual(self._call(backend), "ok")
+        self.assertEqual(self.fake.hits, 2)
+        self.assertEqual(backend.breaker.failures, 0)
+
+
+class FlakyConnection:
+    """locmem-like connection whose sends fail for chosen recipients."""
+
+    def __init__(self, bad_recipients=()):
+        self.bad_recipients = set(bad_recipients)
+        self.sent, self.calls, self.opened = [], 0, 0
+
+    def open(self):
+        self.opened += 1
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        self.calls += 1
+        if any(self.bad_recipients & set(m.to) for m in messages):
+            raise ConnectionError("550 mailbox unavailable")
+        self.sent.extend(messages)
+        return len(messages)
+
+
+class DroppingConnection(FlakyConnection):
+    """Delivers `keep` messages, then the server goes away and reconnecting fails."""
+
+    def __init__(self, keep):
+        super().__init__()
+        self.keep = keep
+        self.atomic_depths = []
+
+    def open(self):
+        super().open()
+        if self.opened > 1:
+            raise ConnectionRefusedError("connection refused")
+
+    def send_messages(self, messages):
+        self.atomic_depths.append(len(connection.atomic_blocks))
+        if len(self.sent) == self.keep:
+            raise ConnectionResetError("server disconnected")
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_OUTBOX={"batch_size": 2, "max_attempts": 2, "backoff": 60, "max_backoff": 3600})
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        self.supplier = Supplier.objects.create(
+            supplier_code="SUP-M01", name="Mail Supplier", company_name="Mail Ltd",
+            contact_person="Tester", phone="111", location="Harare", email="supplier@example.com",
+        )
+
+    def _queue(self, to):
+        return email_outbox.queue_html_email(
+            "Hello", "email.html", {"supplier": self.supplier, "timestamp": timezone.now()}, [to],
+        )
+
+    def test_complaint_post_queues_email_instead_of_sending(self):
+        request = RequestFactory().post("/", {"supplier": self.supplier.pk, "description": "Late again"})
+        with mock.patch("app.views.messages"):
+            views.record_complaint(request)
+
+        self.assertEqual(Complaint.objects.count(), 1)
+        self.assertEqual(mail.outbox, [])
+        queued = EmailOutbox.objects.get()
+        self.assertEqual(queued.status, "pending")
+        self.assertIn("supplier@example.com", queued.recipients)
+
+    def test_rolled_back_record_leaves_no_email(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self._queue("a@example.com")
+                raise RuntimeError
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_drain_batches_over_one_connection(self):
+        for i in range(5):
+            self._queue(f"user{i}@example.com")
+
+        self.assertEqual(email_outbox.drain_outbox(), (5, 0))
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertFalse(EmailOutbox.objects.exclude(status="sent").exists())
+
+        connection = FlakyConnection()
+        self._queue("late@example.com")
+        email_outbox.drain_outbox(connection=connection)
+        self.assertEqual((connection.opened, connection.calls), (1, 1))
+
+    def test_failed_message_backs_off_then_gives_up(self):
+        good, bad = self._queue("ok@example.com"), self._queue("bad@example.com")
+        connection = FlakyConnection(bad_recipients={"bad@example.com"})
+
+        with self.assertLogs("app.services.email_outbox", "WARNING"):
+            self.assertEqual(email_outbox.drain_outbox(connection=connection), (1, 1))
+            good.refresh_from_db()
+            bad.refresh_from_db()
+            self.assertEqual(good.status, "sent")
+            self.assertEqual((bad.status, bad.attempts), ("pending", 1))
+            self.assertGreater(bad.next_attempt_at, timezone.now() + timedelta(seconds=55))
+
+            # not due yet, so nothing is retried
+            self.assertEqual(email_outbox.drain_outbox(connection=connection), (0, 0))
+
+            EmailOutbox.objects.filter(pk=bad.pk).update(next_attempt_at=timezone.now())
+            self.assertEqual(email_outbox.drain_outbox(connection=connection), (0, 1))
+            bad.refresh_from_db()
+            self.assertEqual((bad.status, bad.attempts), ("failed", 2))
+            self.assertIn("550", bad.last_error)
+        # each message is sent once, however its batch went
+        self.assertEqual([m.to for m in connection.sent], [["ok@example.com"]])
+
+    def test_dropped_connection_keeps_delivered_rows_sent(self):
+        first, second, third = (self._queue(f"user{i}@example.com") for i in range(3))
+        dropping = DroppingConnection(keep=1)
+        depth = len(connection.atomic_blocks)
+
+        with self.assertLogs("app.services.email_outbox", "WARNING"), self.assertRaises(ConnectionRefusedError):
+            email_outbox.drain_outbox(connection=dropping)
+        # no transaction is open while talking to the server
+        self.assertEqual(dropping.atomic_depths, [depth, depth])
+
+        for row in (first, second, third):
+            row.refresh_from_db()
+        self.assertEqual((first.status, first.attempts), ("sent", 1))
+        self.assertEqual((second.status, second.attempts), ("pending", 1))
+        # the next batch was never claimed, so the next run sends it; nothing is resent
+        self.assertEqual((third.status, third.attempts), ("pending", 0))
+        self.assertEqual(email_outbox.drain_outbox(), (1, 0))
+        self.assertEqual([m.to for m in mail.outbox], [["user2@example.com"]])
+
+    def test_claimed_rows_are_skipped_until_the_claim_expires(self):
+        row = self._queue("a@example.com")
+        self.assertEqual(email_outbox._claim(timezone.now(), 10, email_outbox._outbox_options()), [row])
+        self.assertEqual(email_outbox.drain_outbox(), (0, 0))
+
+        EmailOutbox.objects.filter(pk=row.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(email_outbox.drain_outbox(), (1, 0))
+
+
+@mock.patch.object(notifications, "NOTIFICATION_EMAILS", ["ops@example.com", "buyer@example.com"])
+@mock.patch.dict(notifications.NOTIFICATION_DIGEST, {"enabled": True, "window": 900, "urgent_severity": 4})
+class NotificationDigestTests(TestCase):
+    def setUp(self):
+        self.supplier = Supplier.objects.create(
+            supplier_code="SUP-N01", name="Digest Supplier", company_name="Digest Ltd",
+            contact_person="Tester", phone="222", location="Harare",
+        )
+
+    def _low_stock_sweep(self, n):
+        for i in range(n):
+            notifications.notify_low_stock(InventoryItem(
+                supplier=self.supplier, sku=f"SKU-{i}", name=f"Item {i}",
+                quantity_in_stock=1, reorder_level=10,
+            ))
+
+    @mock.patch.object(notifications, "send_notification_email")
+    def test_burst_becomes_one_digest_per_recipient(self, send_now):
+        self._low_stock_sweep(100)
+        send_now.assert_not_called()
+
+        # window still open
+        self.assertEqual(notifications.flush_digests(), 0)
+
+        NotificationEvent.objects.update(created_at=timezone.now() - timedelta(seconds=901))
+        with mock.patch("app.services.email_outbox.render_to_string", return_value="<p>digest</p>") as render:
+            self.assertEqual(notifications.flush_digests(), 2)
+        self.assertEqual(render.call_count, 2)
+
+        digests = EmailOutbox.objects.order_by("recipients")
+        self.assertEqual([d.recipients for d in digests], [["buyer@example.com"], ["ops@example.com"]])
+        self.assertEqual(digests[0].subject, "[Digest] 100 × Low Stock")
+        self.assertFalse(NotificationEvent.objects.filter(digested_at__isnull=True).exists())
+
+    def test_digest_template_lists_every_event(self):
+        self._low_stock_sweep(3)
+        notifications.flush_digests(force=True)
+        html = EmailOutbox.objects.first().html_body
+        for i in range(3):
+            self.assertIn(f"[Low Stock] Item {i}", html)
+
+    @mock.patch.object(notifications, "send_notification_email")
+    def test_urgent_complaint_bypasses_digest(self, send_now):
+        notifications.notify_complaint_logged(Complaint(supplier=self.supplier, description="x", severity_level=2))
+        send_now.assert_not_called()
+
+        notifications.notify_complaint_logged(Complaint(supplier=self.supplier, description="x", severity_level=5))
+        send_now.assert_called_once()
+        self.assertEqual(NotificationEvent.objects.filter(kind="complaint").count(), 2)
+
+
+class SentimentServiceTests(SimpleTestCase):
+    def test_batch_matches_single_text_scores(self):
+        texts = ["Great service!", "Late and damaged.", "", "Great   service! "]
+        scores = SentimentService().score_many(texts)
+
+        # Same numbers as VADER run directly on each text, with no bert score
+        vader = SentimentIntensityAnalyzer()
+        self.assertEqual(scores, [(vader.polarity_scores(t)["compound"], 0.0) for t in texts])
+        self.assertGreater(scores[0][0], 0)
+        self.assertLess(scores[1][0], 0)
+        self.assertEqual(scores[2], (0.0, 0.0))
+
+    def test_repeated_text_is_scored_once(self):
+        service = SentimentService(cache_size=2)
+        with mock.patch("app.services.sentiment._compound_scores", side_effect=lambda t: [0.5] * len(t)) as compute:
+            service.score_many(["Delivered on time."] * 50 + ["Delivered  on time. "])
+            service.score("Delivered on time.")
+        compute.assert_called_once_with(["Delivered on time."])
+        self.assertEqual(service.cache_info()["misses"], 1)
+
+    def test_missing_transformer_model_falls_back_to_vader(self):
+        transformer = TransformerScorer("/nonexistent/model")
+        self.assertFalse(transformer.available)
+        service = SentimentService(transformer=transformer)
+        self.assertEqual(service.score("Great service!"), SentimentService().score("Great service!"))
+
+    def _fake_transformers(self, id2label=None, error=None):
+        transformers = mock.Mock()
+        if error:
+            transformers.AutoTokenizer.from_pretrained.side_effect = error
+        transformers.AutoModelForSequenceClassification.from_pretrained.return_value.config.id2label = id2label
+        return mock.patch.dict(sys.modules, {"torch": mock.Mock(), "transformers": transformers})
+
+    def test_broken_transformer_model_falls_back_to_vader_once(self):
+        with TemporaryDirectory() as model_path, self._fake_transformers(error=OSError("corrupt weights")) as modules:
+            transformer = TransformerScorer(model_path)
+            with self.assertLogs("app.services.sentiment", "WARNING"):
+                self.assertFalse(transformer.available)
+            self.assertFalse(transformer.available)
+            self.assertEqual(SentimentService(transformer=transformer).score("Great!")[1], 0.0)
+            modules["transformers"].AutoTokenizer.from_pretrained.assert_called_once()
+
+    def test_transformer_labels_must_name_polarity(self):
+        self.assertEqual(
+            sentiment._label_signs({0: "negative", 1: "neutral", 2: "positive"}), [-1.0, 0.0, 1.0],
+        )
+        for labels in ({0: "LABEL_0", 1: "LABEL_1"}, {0: "NEGATIVE", 1: "LABEL_1"}):
+            with self.assertRaises(ValueError):
+                sentiment._label_signs(labels)
+
+        with TemporaryDirectory() as model_path, self._fake_transformers({0: "LABEL_0", 1: "LABEL_1"}):
+            with self.assertLogs("app.services.sentiment", "WARNING"):
+                self.assertFalse(TransformerScorer(model_path).available)
+
+    def test_transformer_fills_bert_score_once_per_distinct_text(self):
+        transformer = mock.Mock()
+        transformer.score.side_effect = lambda texts: [0.25] * len(texts)
+        scores = SentimentService(transformer=transformer).score_many(["Great!", "Great!", "Awful."])
+
+        transformer.score.assert_called_once_with(["Great!", "Awful."])
+        self.assertEqual([bert for _, bert in scores], [0.25, 0.25, 0.25])
+
+    def test_cache_evicts_least_recently_used(self):
+        service = SentimentService(cache_size=2)
+        service.score_many(["a good day", "a bad day"])
+        service.score("a good day")
+        service.score("a fine day")
+        with mock.patch("app.services.sentiment._compound_scores", return_value=[0.0]) as compute:
+            service.score("a good day")
+            compute.assert_not_called()
+            service.score("a bad day")
+            compute.assert_called_once()
+
+
+class RescoreSentimentCommandTests(TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.checkpoint = Path(tmp.name) / "checkpoint.json"
+
+        customer = CustomerProfile.objects.create(full_name="Tester", age_range="18-25", location="Harare")
+        brand = FastFoodBrand.objects.create(name="Chicken Inn")
+        scores = dict.fromkeys((
+            "taste", "freshness", "portion_size", "presentation", "menu_variety", "food_value",
+            "staff_friendliness", "professionalism", "order_accuracy", "waiting_time",
+            "problem_resolution", "cleanliness", "ambience", "seating", "hygiene",
+            "affordability", "pricing_fairness", "promotions", "brand_reputation",
+            "food_trust", "nps_score",
+        ), 5)
+        self.reviews = [
+            Review.objects.create(customer=customer, brand=brand, full_experience=text, **scores)
+            for text in ("Loved it, great food!", "Cold and awful.", "Great food, loved it!")
+        ]
+        self.supplier = Supplier.objects.create(
+            supplier_code="SUP-S01", name="Score Supplier", company_name="Score Ltd",
+            contact_person="Tester", phone="333", location="Harare",
+        )
+
+    def _rescore(self, *args):
+        call_command("rescore_sentiment", "--batch-size", "2", "--checkpoint", str(self.checkpoint), *args, stdout=mock.Mock())
+
+    def test_backfills_reviews_and_complaints(self):
+        SentimentAnalysis.objects.create(
+            review=self.reviews[1], vader_score=0.9, bert_score=0.9, final_sentiment_score=0.9, sentiment_label="Positive",
+        )
+        complaint = Complaint.objects.create(supplier=self.supplier, description="Terrible, late again")
+
+        self._rescore()
+
+        labels = dict(SentimentAnalysis.objects.values_list("review_id", "sentiment_label"))
+        self.assertEqual(labels, {
+            self.reviews[0].pk: "Positive", self.reviews[1].pk: "Negative", self.reviews[2].pk: "Positive",
+        })
+        sentiment = SupplierSentiment.objects.get(source_type="COMPLAINT", source_id=complaint.pk)
+        self.assertEqual(sentiment.sentiment_label, "Negative")
+        self.assertFalse(self.checkpoint.exists())
+
+        # a second run creates nothing new
+        self._rescore("--only", "complaints")
+        self.assertEqual(SupplierSentiment.objects.count(), 1)
+
+    def test_resumes_after_checkpoint(self):
+        self.checkpoint.write_text(json.dumps({"reviews": self.reviews[1].pk, "since": None}))
+        self._rescore("--only", "reviews")
+        self.assertEqual(
+            list(SentimentAnalysis.objects.values_list("review_id", flat=True)), [self.reviews[2].pk],
+        )
+
+
+class LazyImportTests(SimpleTestCase):
+    def test_url_conf_does_not_load_heavy_dependencies(self):
+        code = (
+            "import sys, django; django.setup(); import app.urls; "
+            "print(','.join(m for m in ('vaderSentiment', 'torch', 'transformers', 'requests') if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=settings.BASE_DIR, capture_output=True, text=True,
+            env=dict(os.environ, DJANGO_SETTINGS_MODULE="supplyinsights.settings"),
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "")
+
+    def test_warm_up_loads_vader(self):
+        with mock.patch("app.services.llm.get_session") as get_session:
+            timings = warm_up()
+        self.assertIn("vader", timings)
+        get_session.assert_called_once()
+
+
+class SupplierScoringTests(TestCase):
+    def setUp(self):
+        self.suppliers = [
+            Supplier.objects.create(
+                supplier_code=f"SUP-V{i}", name=f"Vector {i}", company_name=f"Vector {i} Ltd",
+                contact_person="Tester", phone=str(i), location="Harare",
+            )
+            for i in range(3)
+        ]
+        today = date.today()
+        good, bad, _ = self.suppliers
+        for delay in (0, 0, -1, 0):
+            self._delivery(good, today, delay, 100, 100, "GOOD")
+        for delay, delivered, condition in ((3, 80, "DAMAGED"), (0, 100, "GOOD"), (6, 90, "PARTIAL")):
+            self._delivery(bad, today, delay, 100, delivered, condition)
+        Complaint.objects.create(supplier=bad, description="Late again", severity_level=4)
+        SupplierReview.objects.create(
+            supplier=good, communication_score=9, flexibility_score=8,
+            price_competitiveness_score=7, documentation_score=10,
+        )
+
+    def _delivery(self, supplier, today, delay, ordered, delivered, condition):
+        return Delivery.objects.create(
+            supplier=supplier, order_number="ORD", invoice_number="INV", product_category="Meat",
+            quantity_ordered=ordered, quantity_delivered=delivered,
+            expected_delivery_date=today, actual_delivery_date=today + timedelta(days=delay),
+            delivery_status="LATE" if delay > 0 else "ON_TIME", condition_status=condition,
+        )
+
+    def _what_if(self, **params):
+        request = RequestFactory().get("/", params)
+        request.user = get_user_model()(username="analyst")
+        return views.supplier_score_what_if(request)
+
+    def test_scores_every_supplier_in_a_few_queries(self):
+        with self.assertNumQueries(20):
+            self.assertEqual(supplier_scoring.score_all_suppliers(), 3)
+
+        good, bad, new = (
+            SupplierPerformanceScore.objects.get(supplier=s) for s in self.suppliers
+        )
+        self.assertEqual(good.timeliness_score, 100)
+        self.assertEqual(good.quantity_accuracy_score, 100)
+        self.assertEqual(good.complaint_score, 100)
+        self.assertEqual(good.trust_index, 85)
+        self.assertAlmostEqual(bad.timeliness_score, 33.33)
+        self.assertEqual(bad.quantity_accuracy_score, 90)
+        self.assertEqual(bad.quality_score, 50)
+        self.assertAlmostEqual(bad.complaint_score, 100 / (1 + 4 / 3), places=2)
+        self.assertAlmostEqual(bad.consistency_score, round(100 / (1 + np.std([3, 0, 6])), 2))
+        self.assertGreater(good.final_score, bad.final_score)
+        self.assertGreater(bad.risk_index, good.risk_index)
+        # no data: neutral sub-scores rather than zeros
+        self.assertEqual(new.timeliness_score, supplier_scoring.NEUTRAL_SCORE)
+        self.assertEqual(new.rating_category, SupplierPerformanceScore(final_score=new.final_score).get_rating_category())
+
+    def test_perfect_review_and_sentiment_give_full_trust(self):
+        new = self.suppliers[2]
+        SupplierReview.objects.create(
+            supplier=new, communication_score=10, flexibility_score=10,
+            price_competitiveness_score=10, documentation_score=10,
+        )
+        SupplierSentiment.objects.create(
+            supplier=new, source_type="REVIEW", source_id=1, text="Superb", sentiment_label="Positive",
+            confidence_score=1.0,
+        )
+        supplier_scoring.score_all_suppliers()
+        self.assertEqual(SupplierPerformanceScore.objects.get(supplier=new).trust_index, 100)
+
+    def test_lead_time_distribution(self):
+        supplier_scoring.score_all_suppliers()
+        good, bad, new = (SupplierPerformanceScore.objects.get(supplier=s) for s in self.suppliers)
+        self.assertEqual(
+            list(SupplierDelayBin.objects.filter(supplier=bad.supplier).order_by("days").values_list("days", "deliveries")),
+            [(0, 1), (3, 1), (6, 1)],
+        )
+        self.assertEqual(bad.lead_time_mean, 3)
+        self.assertAlmostEqual(bad.lead_time_std, round(np.std([3, 0, 6]), 2))
+        self.assertEqual((bad.lead_time_p50, bad.lead_time_p90, bad.lead_time_p99), (3, 6, 6))
+        self.assertEqual((good.lead_time_p50, good.lead_time_p90), (0, 0))
+        self.assertIsNone(new.lead_time_p90)
+
+        # Far-off delays land in the end bars
+        self._delivery(new.supplier, date.today(), 400, 1, 1, "GOOD")
+        supplier_scoring.score_all_suppliers()
+        self.assertEqual(SupplierPerformanceScore.objects.get(pk=new.pk).lead_time_p50, lead_times.DELAY_CLIP)
+
+        # A rebuild only replaces the bars of the suppliers it covers
+        lead_times.replace_histograms(np.array([good.supplier_id]), np.zeros((1, lead_times.DELAY_BINS)))
+        self.assertFalse(SupplierDelayBin.objects.filter(supplier_id=good.supplier_id).exists())
+        self.assertEqual(SupplierDelayBin.objects.filter(supplier_id=bad.supplier_id).count(), 3)
+        supplier_scoring.score_all_suppliers()
+
+        summary = lead_times.lead_time_summary()
+        self.assertEqual([row["supplier"] for row in summary], [new.supplier.name, bad.supplier.name, good.supplier.name])
+        self.assertEqual(summary[1]["deliveries"], 3)
+
+    def test_incremental_events_match_full_recompute(self):
+        supplier_scoring.score_all_suppliers()
+        bad = self.suppliers[1]
+        complaint = Complaint.objects.create(supplier=bad, description="Short again", severity_level=2, resolved=True)
+        delivery = self._delivery(bad, date.today(), 1, 50, 50, "GOOD")
+
+        with self.assertNumQueries(15):
+            record_event(bad.pk, complaint_increments(complaint), delivery_increments(delivery))
+        incremental = SupplierPerformanceScore.objects.get(supplier=bad)
+
+        supplier_scoring.score_all_suppliers()
+        full = SupplierPerformanceScore.objects.get(supplier=bad)
+        for field in supplier_scoring.SCORE_FIELDS[:-1]:
+            self.assertEqual(getattr(incremental, field), getattr(full, field), field)
+
+    def test_first_event_builds_missing_stats_from_history(self):
+        # No stats rows yet, as right after they were introduced
+        bad = self.suppliers[1]
+        delivery = self._delivery(bad, date.today(), 0, 50, 50, "GOOD")
+        record_event(bad.pk, delivery_increments(delivery))
+        incremental = SupplierPerformanceScore.objects.get(supplier=bad)
+        self.assertEqual(bad.score_stats.deliveries, 4)
+
+        supplier_scoring.score_all_suppliers()
+        full = SupplierPerformanceScore.objects.get(supplier=bad)
+        for field in supplier_scoring.SCORE_FIELDS[:-1]:
+            if field not in lead_times.DISTRIBUTION_FIELDS:
+                self.assertEqual(getattr(incremental, field), getattr(full, field), field)
+
+    def test_admin_complaint_edits_keep_stats_in_step(self):
+        supplier_scoring.score_all_suppliers()
+        bad, new = self.suppliers[1], self.suppliers[2]
+        complaint_admin = ComplaintAdmin(Complaint, admin.site)
+        fields = ("supplier_id", "complaints", "unresolved", "open_severity", "resolved_severity")
+
+        def stats():
+            return sorted(SupplierScoreStats.objects.values_list(*fields))
+
+        for changes in ({"severity_level": 2}, {"severity_level": 5, "resolved": True}, {"supplier": new}):
+            complaint = Complaint.objects.get(description="Late again")
+            for field, value in changes.items():
+                setattr(complaint, field, value)
+            complaint_admin.save_model(RequestFactory().post("/"), complaint, None, change=True)
+            incremental = stats()
+            supplier_scoring.score_all_suppliers()
+            self.assertEqual(incremental, stats(), changes)
+        self.assertEqual(SupplierScoreStats.objects.get(supplier=new).resolved_severity, 5)
+        self.assertEqual(SupplierScoreStats.objects.get(supplier=bad).complaints, 0)
+
+    def test_what_if_reranks_without_writing(self):
+        supplier_scoring.score_all_suppliers()
+        stored = list(SupplierPerformanceScore.objects.values_list("supplier_id", "final_score"))
+
+        # Only trust counts; the two suppliers tied on 50 are ordered by id
+        weights = {key: 0 for key in SupplierPerformanceScore.DEFAULT_WEIGHTS}
+        weights["trust_index"] = 1
+        ScoreWeightProfile.objects.create(name="Trust only", weights=weights)
+        with self.assertNumQueries(2):
+            response = self._what_if(profile="Trust only")
+        result = json.loads(response.content)
+
+        self.assertEqual([row["supplier_id"] for row in result["suppliers"]], [s.pk for s in self.suppliers])
+        self.assertEqual([row["what_if_score"] for row in result["suppliers"]], [85, 50, 50])
+        self.assertEqual(result["moved"], 2)
+        self.assertEqual(list(SupplierPerformanceScore.objects.values_list("supplier_id", "final_score")), stored)
+
+        for bad in ("lots", "nan", "inf", "-0.5"):
+            self.assertEqual(self._what_if(timeliness=bad).status_code, 400, bad)
+
+    def test_what_if_requires_login(self):
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        self.assertEqual(views.supplier_score_what_if(request).status_code, 302)
+
+    def test_active_profile_drives_scoring(self):
+        ScoreWeightProfile.objects.create(name="Old", weights={"timeliness": 1}, is_active=True)
+        profile = ScoreWeightProfile.objects.create(name="Timeliness", weights={
+            key: 1 if key == "timeliness" else 0 for key in SupplierPerformanceScore.DEFAULT_WEIGHTS
+        }, is_active=True)
+        self.assertEqual(list(ScoreWeightProfile.objects.filter(is_active=True)), [profile])
+
+        supplier_scoring.score_all_suppliers()
+        for score in SupplierPerformanceScore.objects.all():
+            self.assertEqual(score.final_score, score.timeliness_score)
+
+    def test_matches_model_final_score(self):
+        supplier_scoring.score_all_suppliers()
+        for score in SupplierPerformanceScore.objects.all():
+            engine_score = score.final_score
+            self.assertAlmostEqual(score.calculate_final_score(), engine_score, places=1)
+
+
+class BenchmarkingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        expected = date(2025, 2, 10)
+        for i, on_time in enumerate((4, 3, 3, 0)):
+            supplier = Supplier.objects.create(
+                supplier_code=f"SUP-B{i}", name=f"Bench {i}", company_name=f"Bench {i} Ltd",
+                contact_person="Tester", phone=str(i), location="Harare",
+            )
+            for n in range(4):
+                late = n >= on_time
+                Delivery.objects.create(
+                    supplier=supplier, order_number="ORD", invoice_number="INV", product_category="Meat",
+                    quantity_ordered=10, quantity_delivered=10, expected_delivery_date=expected,
+                    actual_delivery_date=expected + timedelta(days=2 if late else 0),
+                    delivery_status="LATE" if late else "ON_TIME", condition_status="GOOD",
+                )
+        # outside the period
+        Delivery.objects.filter(supplier__supplier_code="SUP-B3").update(actual_delivery_date=date(2025, 6, 1))
+
+    def test_ranks_suppliers_for_a_period(self):
+        self.assertEqual(benchmarking.run_benchmarks("2025-Q1"), 3 * len(benchmarking.METRICS))
+
+        on_time = dict(
+            Benchmark.objects.filter(evaluation_period="2025-Q1", metric_name="On-Time Delivery Rate")
+            .values_list("supplier__supplier_code", "percentile_rank")
+        )
+        self.assertEqual(on_time, {"SUP-B0": 83.33, "SUP-B1": 33.33, "SUP-B2": 33.33})
+        row = Benchmark.objects.get(supplier__supplier_code="SUP-B0", metric_name="Lead Time Deviation (days)")
+        self.assertEqual(row.metric_value, 0)
+        self.assertAlmostEqual(row.industry_average, round(1 / 3, 2))
+        self.assertGreater(row.benchmark_score, 50)
+
+    def test_percentile_lookup_uses_cached_table(self):
+        benchmarking.run_benchmarks("2025-Q1")
+        with self.assertNumQueries(0):
+            self.assertEqual(benchmarking.percentile_of("2025-Q1", "On-Time Delivery Rate", 100), 75)
+            # lower is better: no deviation beats the two late suppliers and ties the punctual one
+            self.assertEqual(benchmarking.percentile_of("2025-Q1", "Lead Time Deviation (days)", 0), 100 * 6 / 8)
+
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(benchmarking.percentile_of("2025-Q1", "On-Time Delivery Rate", 100), 75)
+        self.assertIsNone(benchmarking.percentile_of("2024", "On-Time Delivery Rate", 100))
+
+
+# The threaded tests need a database that waits on row locks; the in-memory
+# SQLite test database fails concurrent writers instead. Opt in with
+# RUN_THREADED_DB_TESTS=1 when testing against PostgreSQL.
+RUN_THREADED_DB_TESTS = bool(os.environ.get("RUN_THREADED_DB_TESTS"))
+
+
+class OrderNumberTests(TransactionTestCase):
+    def setUp(self):
+        self.supplier = Supplier.objects.create(
+            supplier_code="SUP-O1", name="Order Supplier", company_name="Order Ltd",
+            contact_person="Tester", phone="1", location="Harare",
+        )
+        self.year = timezone.now().year
+
+    def _order(self, **kwargs):
+        return Order(
+            supplier=self.supplier, product_name="Buns", product_category="Bakery",
+            quantity_ordered=10, unit_cost=2, expected_delivery_date=date.today(), **kwargs,
+        )
+
+    def test_continues_after_existing_numbers_and_reserves_blocks(self):
+        Order.objects.bulk_create([self._order(order_number=f"ORD-{self.year}-00041")])
+        order = self._order()
+        order.save()
+        self.assertEqual(order.order_number, f"ORD-{self.year}-00042")
+
+        bulk = Order.objects.bulk_create([self._order() for _ in range(3)])
+        self.assertEqual([o.order_number for o in bulk], [f"ORD-{self.year}-{n:05d}" for n in (43, 44, 45)])
+        self.assertEqual(bulk[0].total_cost, 20)
+
+        # one UPDATE ... RETURNING and the INSERT
+        with self.assertNumQueries(2):
+            self._order().save()
+        self.assertEqual(OrderSequence.objects.get(year=self.year).last_value, 46)
+
+    @skipUnless(RUN_THREADED_DB_TESTS, "set RUN_THREADED_DB_TESTS=1 on a database that waits on row locks")
+    def test_concurrent_saves_get_distinct_numbers(self):
+        def create(_):
+            try:
+                order = self._order()
+                order.save()
+                return order.order_number
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            numbers = list(pool.map(create, range(20)))
+        self.assertEqual(len(set(numbers)), 20)
+        self.assertEqual(Order.objects.count(), 20)
+
+    def test_year_row_created_by_another_process_is_retried(self):
+        increment = OrderSequence._increment
+
+        def racing_increment(year, count):
+            if not OrderSequence.objects.filter(year=year).exists():
+                # another process creates the year's row between our UPDATE and INSERT
+                OrderSequence.objects.create(year=year, last_value=5)
+                return None
+            return increment(year, count)
+
+        with mock.patch.object(OrderSequence, "_increment", side_effect=racing_increment) as patched:
+            self.assertEqual(OrderSequence.reserve(self.year, 2), 6)
+        self.assertEqual(patched.call_count, 2)
+        self.assertEqual(OrderSequence.objects.get(year=self.year).last_value, 7)
+
+    @mock.patch("app.models.sqlite3.sqlite_version_info", (3, 34, 0))
+    def test_update_then_read_without_returning(self):
+        OrderSequence.objects.create(year=self.year, last_value=9)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(OrderSequence.reserve(self.year, 3), 10)
+        statements = [q["sql"].split()[0] for q in queries if not q["sql"].startswith(("BEGIN", "SAVEPOINT", "RELEASE"))]
+        self.assertEqual(statements[:2], ["UPDATE", "SELECT"])
+        self.assertEqual(OrderSequence.objects.get(year=self.year).last_value, 12)
+
+
+class CsvImportTests(TestCase):
+    HEADER = (
+        "supplier_code,order_number,invoice_number,product_category,quantity_ordered,quantity_delivered,"
+        "expected_delivery_date,actual_delivery_date,condition_status,sku,product_name\n"
+    )
+
+    def setUp(self):
+        self.supplier = Supplier.objects.create(
+            supplier_code="SUP-C1", name="Csv Supplier", company_name="Csv Ltd",
+            contact_person="Tester", phone="1", location="Harare",
+        )
+        self.item = InventoryItem.objects.create(
+            supplier=self.supplier, sku="BUN-1", name="Buns", category="Bakery", quantity_in_stock=5,
+            reorder_level=2, unit_cost=1, selling_price=2, warehouse_location="Main",
+        )
+
+    def test_imports_deliveries_in_chunks_and_rejects_bad_rows(self):
+        rows = self.HEADER + (
+            "SUP-C1,ORD-1,INV-1,Bakery,10,10,2025-03-01,2025-03-03,GOOD,BUN-1,\n"
+            "SUP-XX,ORD-2,INV-2,Bakery,10,10,2025-03-01,2025-03-01,GOOD,BUN-1,\n"
+            "SUP-C1,ORD-3,INV-3,Bakery,10,4,2025-03-01,2025-03-01,GOOD,BUN-1,\n"
+            "SUP-C1,ORD-4,INV-4,Meat,8,8,2025-03-02,2025-03-01,PARTIAL,PAT-1,Patties\n"
+            "SUP-C1,ORD-5,INV-5,Meat,8,lots,2025-03-02,2025-03-01,GOOD,PAT-1,Patties\n"
+        )
+        rejects = io.StringIO()
+        stats = csv_import.import_csv("deliveries", io.StringIO(rows), chunk_size=2, rejects=rejects)
+
+        self.assertEqual((stats["rows"], stats["imported"], stats["rejected"]), (5, 3, 2))
+        self.assertEqual(
+            list(Delivery.objects.order_by("order_number").values_list("order_number", "delivery_status")),
+            [("ORD-1", "LATE"), ("ORD-3", "ON_TIME"), ("ORD-4", "EARLY")],
+        )
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity_in_stock, 5 + 10 + 4)
+        self.assertEqual(InventoryItem.objects.get(sku="PAT-1").quantity_in_stock, 8)
+        self.assertEqual(
+            sorted(StockMovement.objects.values_list("delivery__order_number", "quantity", "reason")),
+            [("ORD-1", 10, "IMPORT"), ("ORD-3", 4, "IMPORT"), ("ORD-4", 8, "IMPORT")],
+        )
+        self.assertEqual(
+            sorted(SupplierDelayBin.objects.values_list("days", "deliveries")), [(-1, 1), (0, 1), (2, 1)],
+        )
+        # Score stats and scores keep up without a full rescore
+        imported = SupplierPerformanceScore.objects.get(supplier=self.supplier)
+        self.assertEqual(self.supplier.score_stats.deliveries, 3)
+        supplier_scoring.score_all_suppliers()
+        rescored = SupplierPerformanceScore.objects.get(supplier=self.supplier)
+        for field in supplier_scoring.SCORE_FIELDS[:-1]:
+            self.assertEqual(getattr(imported, field), getattr(rescored, field), field)
+
+        rejected = list(csv.DictReader(io.StringIO(rejects.getvalue())))
+        self.assertEqual([(r["order_number"], r["error"]) for r in rejected], [
+            ("ORD-2", "unknown supplier_code"),
+            ("ORD-5", "quantity_delivered must be a whole number >= 0"),
+        ])
+
+    def test_imports_orders_with_allocated_numbers(self):
+        rows = (
+            "supplier_code,product_name,product_category,quantity_ordered,unit_cost,expected_delivery_date,order_number\n"
+            "SUP-C1,Buns,Bakery,10,2.5,2025-03-01,\n"
+            "SUP-C1,Buns,Bakery,10,2.5,2025-03-01,ERP-7\n"
+            "SUP-C1,Buns,Bakery,10,2.5,2025-03-01,ERP-7\n"
+        )
+        stats = csv_import.import_csv("orders", io.StringIO(rows))
+
+        self.assertEqual((stats["imported"], stats["rejected"]), (2, 1))
+        numbers = set(Order.objects.values_list("order_number", flat=True))
+        self.assertIn("ERP-7", numbers)
+        self.assertEqual(Order.objects.get(order_number="ERP-7").total_cost, 25)
+
+    def test_missing_columns_fail_the_whole_file(self):
+        with self.assertRaisesMessage(csv_import.CsvImportError, "condition_status"):
+            csv_import.import_csv("deliveries", io.StringIO(self.HEADER.replace(",condition_status", "")))
+
+
+class StockLedgerTests(TransactionTestCase):
+    def setUp(self):
+        self.supplier = Supplier.objects.create(
+            supplier_code="SUP-S1", name="Stock Supplier", company_name="Stock Ltd",
+            contact_person="Tester", phone="1", location="Harare",
+        )
+
+    def _post_delivery(self, sku, quantity, messages=None):
+        request = RequestFactory().post("/", {
+            "supplier": self.supplier.pk, "order_number": "ORD", "invoice_number": "INV",
+            "product_category": "Bakery", "product_name": "Buns", "sku": sku,
+            "quantity_ordered": quantity, "quantity_delivered": quantity,
+            "delivery_status": "ON_TIME", "condition_status": "GOOD",
+            "expected_delivery_date": "2025-03-01", "actual_delivery_date": "2025-03-01",
+        })
+        with mock.patch("app.views.messages", messages or mock.Mock()):
+            return views.record_delivery(request)
+
+    def test_fractional_quantity_is_rejected(self):
+        messages = mock.Mock()
+        self._post_delivery("BUN-1", "2.5", messages)
+        messages.error.assert_called_once()
+        self.assertFalse(Delivery.objects.exists())
+        self.assertFalse(InventoryItem.objects.filter(sku="BUN-1").exists())
+
+        self._post_delivery("BUN-1", "3.0", messages)
+        self.assertEqual(InventoryItem.objects.get(sku="BUN-1").quantity_in_stock, 3)
+
+    def test_deliveries_create_then_move_stock_through_the_ledger(self):
+        self._post_delivery("BUN-1", 10)
+        self._post_delivery("BUN-1", 5)
+
+        item = InventoryItem.objects.get(sku="BUN-1")
+        self.assertEqual(item.quantity_in_stock, 15)
+        self.assertEqual(item.reorder_level, 0)
+        movements = list(item.movements.order_by("id").values_list("quantity", "reason", "delivery__order_number"))
+        self.assertEqual(movements, [(10, "DELIVERY", "ORD"), (5, "DELIVERY", "ORD")])
+
+    @skipUnless(RUN_THREADED_DB_TESTS, "set RUN_THREADED_DB_TESTS=1 on a database that waits on row locks")
+    def test_concurrent_receipts_are_not_lost(self):
+        def receive(_):
+            try:
+                stock.receive(self.supplier.pk, "PAT-1", 2, "Patties", "Meat")
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(receive, range(20)))
+        item = InventoryItem.objects.get(sku="PAT-1")
+        self.assertEqual(item.quantity_in_stock, 40)
+        self.assertEqual(item.movements.count(), 20)
+
+    def test_existing_item_is_moved_by_update_before_any_read(self):
+        stock.receive(self.supplier.pk, "PAT-1", 2, "Patties", "Meat")
+        with mock.patch("app.services.stock._new_item") as new_item, CaptureQueriesContext(connection) as queries:
+            stock.receive(self.supplier.pk, "PAT-1", 3, "Patties", "Meat")
+        new_item.assert_not_called()
+        first = next(q["sql"] for q in queries if not q["sql"].startswith(("BEGIN", "SAVEPOINT")))
+        self.assertTrue(first.startswith("UPDATE"), first)
+        self.assertEqual(InventoryItem.objects.get(sku="PAT-1").quantity_in_stock, 5)
+
+    @mock.patch("app.services.stock.refresh_low_stock")
+    def test_item_created_by_another_delivery_falls_back_to_update(self, refresh):
+        # another delivery's INSERT lands after our UPDATE found no row
+        stock._new_item(self.supplier.pk, "PAT-1", "Patties", "Meat", 7, timezone.now()).save()
+        update = QuerySet.update
+        updates = []
+
+        def racing_update(queryset, **kwargs):
+            updates.append(queryset.model)
+            return 0 if len(updates) == 1 else update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, "update", autospec=True, side_effect=racing_update):
+            movement = stock.receive(self.supplier.pk, "PAT-1", 2, "Patties", "Meat")
+
+        self.assertEqual(updates[:2], [InventoryItem, InventoryItem])
+        item = InventoryItem.objects.get(sku="PAT-1")
+        self.assertEqual(item.quantity_in_stock, 9)
+        self.assertEqual((movement.item_id, movement.quantity), (item.pk, 2))
+        refresh.assert_called_once_with([item.pk])
+
+
+@mock.patch("app.services.low_stock.notify_low_stock")
+class LowStockTests(TestCase):
+    def setUp(self):
+        self.supplier = Supplier.objects.create(
+            supplier_code="SUP-L1", name="Low Supplier", company_name="Low Ltd",
+            contact_person="Tester", phone="1", location="Harare",
+        )
+
+    def _item(self, quantity):
+        return InventoryItem.objects.create(
+            supplier=self.supplier, sku="FRY-1", name="Fries", category="Frozen", quantity_in_stock=quantity,
+            reorder_level=10, unit_cost=1, selling_price=2, warehouse_location="Main",
+        )
+
+    def test_alerts_only_on_the_transition_into_low_stock(self, notify):
+        item = self._item(15)
+        notify.assert_not_called()
+
+        item.quantity_in_stock = 8
+        item.save()
+        item.quantity_in_stock = 4
+        item.save()
+        self.assertEqual(notify.call_count, 1)
+        self.assertTrue(InventoryItem.objects.get(pk=item.pk).is_below_reorder)
+        self.assertEqual(get_kpis("inventory")["inventory"]["low_stock"], 1)
+
+        stock.receive(self.supplier.pk, "FRY-1", 20, "Fries", "Frozen")
+        self.assertFalse(InventoryItem.objects.get(pk=item.pk).is_below_reorder)
+
+        InventoryItem.objects.filter(pk=item.pk).update(quantity_in_stock=2)
+        self.assertEqual(low_stock.refresh_low_stock(), (1, 0))
+        self.assertEqual(notify.call_count, 2)
+
+    def test_low_stock_panel_reads_the_flag(self, notify):
+        self._item(3)
+        page = PANELS["low_stock"].page()
+        self.assertEqual([row["sku"] for row in page["results"]], ["FRY-1"])
+
+
+class DemandForecastTests(TestCase):
+    def setUp(self):
+        self.supplier = Supplier.objects.create(
+            supplier_code="SUP-F1", name="Forecast Supplier", company_name="Forecast Ltd",
+            contact_person="Tester", phone="1", location="Harare",
+        )
+
+    def _item(self, sku, reorder_level=10):
+        return InventoryItem.objects.create(
+            supplier=self.supplier, sku=sku, name=sku, category="Frozen", quantity_in_stock=60,
+            reorder_level=reorder_level, unit_cost=1, selling_price=2, warehouse_location="Main",
+        )
+
+    def test_smoothing_and_croston_run_over_every_row(self):
+        demand = np.array([[5.0] * 12, [0, 0, 4] * 4, [0.0] * 12])
+        rate, std, methods = forecasting.forecast(demand, alpha=0.2)
+
+        self.assertEqual(methods.tolist(), ["SES", "CROSTON", "NONE"])
+        self.assertAlmostEqual(rate[0], 5)
+        self.assertAlmostEqual(std[0], 0)
+        self.assertAlmostEqual(rate[1], 0.9 * 4 / 3)
+        self.assertEqual(rate[2], 0)
+        self.assertEqual(forecasting.reorder_points(rate, std, np.full(3, 4.0), 0).tolist(), [20, 5, 0])
+
+    def test_writes_forecasts_and_applies_reorder_levels(self):
+        fries, idle = self._item("FRY-1"), self._item("IDLE-1", reorder_level=25)
+        restocked = self._item("BUN-1", reorder_level=30)
+        today = timezone.localdate()
+        for days_ago in range(10):
+            issued = StockMovement.objects.create(item=fries, quantity=-3, reason="ADJUSTMENT")
+            received = stock.receive(self.supplier.pk, "BUN-1", 7, "BUN-1", "Frozen")
+            StockMovement.objects.filter(pk__in=[issued.pk, received.pk]).update(
+                created_at=timezone.now() - timedelta(days=days_ago),
+            )
+
+        with override_settings(DEMAND_FORECAST={"history_days": 10, "lead_time_days": 5, "service_z": 0}):
+            self.assertEqual(forecasting.run_forecasts(apply=True, today=today), 3)
+
+        forecast = fries.forecast
+        forecast.refresh_from_db()
+        self.assertEqual(forecast.method, "SES")
+        self.assertAlmostEqual(forecast.daily_demand, 3)
+        self.assertEqual(forecast.recommended_reorder_level, 15)
+        self.assertAlmostEqual(forecast.days_of_cover, 60 / 3)
+        self.assertEqual(InventoryItem.objects.get(pk=fries.pk).reorder_level, 15)
+
+        self.assertEqual(idle.forecast.method, "NONE")
+        self.assertIsNone(idle.forecast.days_of_cover)
+        self.assertEqual(InventoryItem.objects.get(pk=idle.pk).reorder_level, 25)
+
+        # Receipts are only a proxy for demand, so they never overwrite the level
+        restocked.forecast.refresh_from_db()
+        self.assertEqual(restocked.forecast.method, "RECEIPTS")
+        self.assertAlmostEqual(restocked.forecast.daily_demand, 7)
+        self.assertEqual(InventoryItem.objects.get(pk=restocked.pk).reorder_level, 30)
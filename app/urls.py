@@ -13,6 +13,10 @@ urlpatterns = [
     path('supplierdashboard/',  views.supplierdashboard,  name='supplierdashboard'),
     path('customerdashboard/',  views.customerdashboard,  name='customerdashboard'),
 
+    # AJAX table panels for the main dashboard (keyset-paginated JSON)
+    path('dashboard/panels/<str:panel>/', views.dashboard_panel, name='dashboard_panel'),
+    path('dashboard/calendar/', views.engagement_calendar, name='engagement_calendar'),
+
     # ── Supplier flows ────────────────────────────────────────────────
     path('register/',    views.supplier_register, name='register'),
     path('delivery/',    views.record_delivery,   name='delivery'),
@@ -33,10 +37,12 @@ urlpatterns = [
     # ── Inventory / Audit ─────────────────────────────────────────────
     path('inventory/', views.inventory, name='inventory'),
     path('audit/',     views.audit,     name='audit'),
+    path('import/csv/', views.import_csv_upload, name='import_csv_upload'),
 
     # ── Reports & analytics ───────────────────────────────────────────
     path('reports/',        views.report_and_recommendations, name='reports'),
     path('benchmark/',      views.performance_benchmark,      name='performance_benchmark'),
+    path('suppliers/scores/what-if/', views.supplier_score_what_if, name='supplier_score_what_if'),
     path('market/trends/',  views.market_industry_trends,     name='market_trends'),
     path('insights/',       views.insights_view,              name='insights'),
 ]
\ No newline at end of file
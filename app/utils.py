@@ -1,29 +1,18 @@
 # utils.py
 
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from app.services.sentiment import get_sentiment_service
+
 
-# Initialize once
-vader_analyzer = SentimentIntensityAnalyzer()
 def analyze_sentiment(text):
     """
     Returns:
         vader_score (float)
         bert_score (float placeholder)
-        final_score (float)
-    """
-
-    if not text or text.strip() == "":
-        return 0.0, 0.0, 0.0
-
-    vader_result = vader_analyzer.polarity_scores(text)
-    vader_score = vader_result["compound"]
-
-    bert_score = 0.0  # placeholder (no BERT on free tier)
 
-    # Since no BERT, final_score = vader_score
-    final_score = vader_score
-
-    return vader_score, bert_score
+    Thin wrapper over the cached sentiment service; use
+    get_sentiment_service().score_many(texts) to score many texts at once.
+    """
+    return get_sentiment_service().score(text)
 
 
 def analyze_sentiments(text):
@@ -33,14 +22,7 @@ def analyze_sentiments(text):
         bert_score (float placeholder)
         final_score (float weighted score)
     """
-
-    if not text or text.strip() == "":
-        return 0.0, 0.0, 0.0
-
-    vader_result = vader_analyzer.polarity_scores(text)
-    vader_score = vader_result["compound"]
-
-    bert_score = 0.0  # placeholder
+    vader_score, bert_score = analyze_sentiment(text)
 
     # Weighted logic (future ready)
     vader_weight = 1.0
@@ -48,4 +30,4 @@ def analyze_sentiments(text):
 
     final_score = (vader_score * vader_weight) + (bert_score * bert_weight)
 
-    return vader_score, bert_score, final_score
\ No newline at end of file
+    return vader_score, bert_score, final_score
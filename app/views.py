@@ -8,61 +8,66 @@ from django.contrib.auth import (
 )
 from django.contrib.auth.decorators import login_required
 from django.core.cache import cache
-from django.core.mail import EmailMultiAlternatives
-from django.http import HttpRequest, HttpResponse, HttpResponseForbidden, JsonResponse
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render, get_object_or_404
-from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import condition, require_POST
 from functools import wraps
+import csv
+import hashlib
+import io
 import logging
 import json
+import math
 import re
-import requests
 from typing import Callable, Iterable, Optional
 from datetime import timedelta
 
-from django.db.models import (
-    Avg, Count, Sum, Max, Min, F, Q,
-    FloatField, ExpressionWrapper, DecimalField
-)
+from django.db import transaction
+from django.db.models import Avg, Count, Sum, Max, Min, Q
 from django.db.models.functions import TruncMonth, TruncDate, Coalesce
 
 from .models import (
     VisitorLog, Supplier, Delivery, Complaint,
-    SupplierPerformanceScore, InventoryItem,
+    SupplierPerformanceScore, ScoreWeightProfile, InventoryItem,
     Customer, Review, SentimentAnalysis,
     MarketTrend, SupplierSentiment, SupplierReview,
     CustomerProfile, FastFoodBrand, EngagementMetric,
     MarketIndicator, ScrapedMarketSource, CompetitorMarketData,
     DecisionRecommendation, Benchmark
 )
+from .services.ai_insights import ai_available, insights_from, latest_insights
+from .services.csv_import import CsvImportError, import_csv
+from .services.email_outbox import queue_html_email
+from .services.kpi_snapshot import get_kpis
+from .services.lead_times import lead_time_summary
+from .services.panels import PANELS, DEFAULT_PAGE_SIZE, InvalidCursor
+from .services.stock import receive
+from .services.supplier_scoring import (
+    complaint_increments, delivery_increments, record_event, review_increments, sentiment_increments, what_if,
+)
+from .services.visitor_rollups import visitor_summary
 from .utils import analyze_sentiment
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
-OPENROUTER_API_KEY = getattr(settings, "OPENROUTER_API_KEY", "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")
-OPENROUTER_URL     = "https://openrouter.ai/api/v1/chat/completions"
-OPENROUTER_MODEL   = getattr(settings, "OPENROUTER_MODEL", "openai/gpt-4o")
-
-
 # ─────────────────────────────────────────────
 # EMAIL HELPERS
 # ─────────────────────────────────────────────
 
 def send_html_email(subject, template_name, context, recipient_list):
-    """Send an HTML email. Silently logs failures so they never break a form POST."""
+    """
+    Queue an HTML email in the outbox; `manage.py send_outbox` sends it.
+    Call it inside the transaction that saves the record it announces.
+    Failures are logged so they never break a form POST.
+    """
     try:
-        from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "noreply@kpifastfood.app")
-        html_body  = render_to_string(template_name, context)
-        # Plain-text fallback (strip tags crudely)
-        text_body  = re.sub(r"<[^>]+>", " ", html_body)
-
-        msg = EmailMultiAlternatives(subject, text_body, from_email, recipient_list)
-        msg.attach_alternative(html_body, "text/html")
-        msg.send(fail_silently=False)
+        with transaction.atomic():
+            queue_html_email(subject, template_name, context, recipient_list)
     except Exception as e:
-        logger.error("Email send failed [%s]: %s", template_name, e)
+        logger.error("Email queue failed [%s]: %s", template_name, e)
 
 
 # ─────────────────────────────────────────────
@@ -73,54 +78,37 @@ def admin_dashboard(request):
     now = timezone.now()
     last_30_days = now - timedelta(days=30)
 
-    logs = VisitorLog.objects.filter(visited_at__gte=last_30_days)
-    page_views      = logs.count()
-    unique_visitors = logs.values("ip_address").distinct().count()
-    bounce_ips      = logs.values("ip_address").annotate(count=Count("id")).filter(count=1).count()
+    visits = visitor_summary(since=last_30_days)
+    page_views      = visits["page_views"]
+    unique_visitors = visits["unique_visitors"]
+    bounce_ips      = visits["bounce_ips"]
     bounce_rate     = (bounce_ips / unique_visitors * 100) if unique_visitors else 0
 
-    total_suppliers  = Supplier.objects.count()
-    active_suppliers = Supplier.objects.filter(is_active=True).count()
-    avg_supplier_score = SupplierPerformanceScore.objects.aggregate(avg=Avg("final_score"))["avg"] or 0
-    high_risk_suppliers = SupplierPerformanceScore.objects.filter(risk_index__gt=70).count()
-
-    total_deliveries = Delivery.objects.count()
-    on_time_rate  = (Delivery.objects.filter(delivery_status="ON_TIME").count() / total_deliveries * 100) if total_deliveries else 0
-    damaged_rate  = (Delivery.objects.filter(condition_status="DAMAGED").count() / total_deliveries * 100) if total_deliveries else 0
-
-    total_complaints    = Complaint.objects.count()
-    unresolved_complaints = Complaint.objects.filter(resolved=False).count()
-
-    total_skus = InventoryItem.objects.count()
-    low_stock  = InventoryItem.objects.filter(quantity_in_stock__lte=F("reorder_level")).count()
-    inventory_value = InventoryItem.objects.aggregate(
-        total=Sum(ExpressionWrapper(F("quantity_in_stock") * F("unit_cost"), output_field=FloatField()))
-    )["total"] or 0
-
-    total_customers = Customer.objects.count()
-    avg_ltv   = Customer.objects.aggregate(avg=Avg("lifetime_value"))["avg"] or 0
-    avg_churn = Customer.objects.aggregate(avg=Avg("churn_probability"))["avg"] or 0
-
-    total_reviews      = Review.objects.count()
-    avg_review_score   = Review.objects.aggregate(avg=Avg("overall_weighted_score"))["avg"] or 0
-    positive_sentiment = SentimentAnalysis.objects.filter(sentiment_label="Positive").count()
-    total_sentiments   = SentimentAnalysis.objects.count()
-    sentiment_positive_rate = (positive_sentiment / total_sentiments * 100) if total_sentiments else 0
-
-    avg_market_growth = MarketTrend.objects.aggregate(avg=Avg("overall_growth_rate"))["avg"] or 0
-    avg_market_risk   = MarketTrend.objects.aggregate(avg=Avg("risk_level"))["avg"] or 0
+    kpis = get_kpis(
+        "suppliers", "performance", "deliveries", "complaints", "inventory",
+        "customers", "reviews", "sentiments", "market",
+    )
+    suppliers   = kpis["suppliers"]
+    performance = kpis["performance"]
+    deliveries  = kpis["deliveries"]
+    complaints  = kpis["complaints"]
+    stock       = kpis["inventory"]
+    customers   = kpis["customers"]
+    reviews     = kpis["reviews"]
+    sentiments  = kpis["sentiments"]
+    market      = kpis["market"]
 
     context = {
         "bounce_rate": round(bounce_rate, 2), "page_views": page_views, "unique_visitors": unique_visitors,
-        "total_suppliers": total_suppliers, "active_suppliers": active_suppliers,
-        "avg_supplier_score": round(avg_supplier_score, 2), "high_risk_suppliers": high_risk_suppliers,
-        "on_time_rate": round(on_time_rate, 2), "damaged_rate": round(damaged_rate, 2),
-        "total_complaints": total_complaints, "unresolved_complaints": unresolved_complaints,
-        "total_skus": total_skus, "low_stock": low_stock, "inventory_value": round(inventory_value, 2),
-        "total_customers": total_customers, "avg_ltv": round(float(avg_ltv), 2), "avg_churn": round(avg_churn, 2),
-        "total_reviews": total_reviews, "avg_review_score": round(avg_review_score, 2),
-        "sentiment_positive_rate": round(sentiment_positive_rate, 2),
-        "avg_market_growth": round(avg_market_growth, 2), "avg_market_risk": round(avg_market_risk, 2),
+        "total_suppliers": suppliers["total"], "active_suppliers": suppliers["active"],
+        "avg_supplier_score": round(performance["avg_final_score"] or 0, 2), "high_risk_suppliers": performance["high_risk"],
+        "on_time_rate": round(deliveries["on_time_rate"], 2), "damaged_rate": round(deliveries["damaged_rate"], 2),
+        "total_complaints": complaints["total"], "unresolved_complaints": complaints["unresolved"],
+        "total_skus": stock["total"], "low_stock": stock["low_stock"], "inventory_value": round(float(stock["inventory_value"]), 2),
+        "total_customers": customers["total"], "avg_ltv": round(float(customers["avg_ltv"] or 0), 2), "avg_churn": round(customers["avg_churn"] or 0, 2),
+        "total_reviews": reviews["total"], "avg_review_score": round(reviews["avg_weighted_score"] or 0, 2),
+        "sentiment_positive_rate": round(sentiments["positive_rate"], 2),
+        "avg_market_growth": round(market["avg_growth"] or 0, 2), "avg_market_risk": round(market["avg_risk"] or 0, 2),
     }
     return render(request, "dashboard.html", context)
 
@@ -132,109 +120,159 @@ def admin_dashboard(request):
 def dashboard(request):
     context = {}
 
-    context["total_visits"]    = VisitorLog.objects.count()
-    context["unique_visitors"] = VisitorLog.objects.values("ip_address").distinct().count()
-    context["top_pages"]       = VisitorLog.objects.values("path").annotate(visits=Count("id")).order_by("-visits")[:10]
-    context["top_locations"]   = VisitorLog.objects.values("location").annotate(count=Count("id")).order_by("-count")[:5]
-
-    context["total_suppliers"]   = Supplier.objects.count()
-    context["active_suppliers"]  = Supplier.objects.filter(is_active=True).count()
-    context["inactive_suppliers"] = Supplier.objects.filter(is_active=False).count()
-    context["suppliers"]         = Supplier.objects.all()
-
-    scores = SupplierPerformanceScore.objects.select_related("supplier")
-    context["supplier_scores"]    = scores
-    context["avg_supplier_score"] = scores.aggregate(avg=Avg("final_score"))["avg"]
-    context["excellent_suppliers"] = scores.filter(rating_category="Excellent").count()
-    context["good_suppliers"]      = scores.filter(rating_category="Good").count()
-    context["average_suppliers"]   = scores.filter(rating_category="Average").count()
-    context["poor_suppliers"]      = scores.filter(rating_category="Poor").count()
-
-    sentiment_counts = SupplierSentiment.objects.values("sentiment_label").annotate(count=Count("id"))
-    positive = neutral = negative = 0
-    for s in sentiment_counts:
-        if s["sentiment_label"] == "Positive":   positive = s["count"]
-        elif s["sentiment_label"] == "Neutral":  neutral  = s["count"]
-        elif s["sentiment_label"] == "Negative": negative = s["count"]
-    context["positive_sentiments"] = positive
-    context["neutral_sentiments"]  = neutral
-    context["negative_sentiments"] = negative
-    context["sentiments"] = SupplierSentiment.objects.select_related("supplier")[:100]
-
-    context["total_customers"]    = Customer.objects.count()
-    context["avg_lifetime_value"] = Customer.objects.aggregate(avg=Avg("lifetime_value"))["avg"]
-    context["avg_churn"]          = Customer.objects.aggregate(avg=Avg("churn_probability"))["avg"]
-    context["avg_engagement"]     = Customer.objects.aggregate(avg=Avg("engagement_score"))["avg"]
-
-    low    = Customer.objects.filter(churn_probability__lt=0.3).count()
-    medium = Customer.objects.filter(churn_probability__gte=0.3, churn_probability__lt=0.7).count()
-    high   = Customer.objects.filter(churn_probability__gte=0.7).count()
+    kpis = get_kpis(
+        "suppliers", "performance", "supplier_sentiment", "customers", "reviews",
+        "engagement", "inventory", "deliveries", "complaints", "market",
+    )
+
+    visits = visitor_summary()
+    context["total_visits"]    = visits["page_views"]
+    context["unique_visitors"] = visits["unique_visitors"]
+    context["top_pages"]       = visits["top_pages"]
+    context["top_locations"]   = visits["top_locations"]
+
+    suppliers = kpis["suppliers"]
+    context["total_suppliers"]   = suppliers["total"]
+    context["active_suppliers"]  = suppliers["active"]
+    context["inactive_suppliers"] = suppliers["inactive"]
+
+    performance = kpis["performance"]
+    context["avg_supplier_score"] = performance["avg_final_score"]
+    context["excellent_suppliers"] = performance["excellent"]
+    context["good_suppliers"]      = performance["good"]
+    context["average_suppliers"]   = performance["average"]
+    context["poor_suppliers"]      = performance["poor"]
+
+    sentiment_counts = kpis["supplier_sentiment"]
+    context["positive_sentiments"] = sentiment_counts["positive"]
+    context["neutral_sentiments"]  = sentiment_counts["neutral"]
+    context["negative_sentiments"] = sentiment_counts["negative"]
+
+    customers = kpis["customers"]
+    context["total_customers"]    = customers["total"]
+    context["avg_lifetime_value"] = customers["avg_ltv"]
+    context["avg_churn"]          = customers["avg_churn"]
+    context["avg_engagement"]     = customers["avg_engagement"]
     context["churn_labels"] = json.dumps(["Low Risk", "Medium Risk", "High Risk"])
-    context["churn_values"] = json.dumps([low, medium, high])
+    context["churn_values"] = json.dumps([customers["churn_low"], customers["churn_medium"], customers["churn_high"]])
 
     context["total_profiles"]     = CustomerProfile.objects.count()
     context["profiles_by_location"] = CustomerProfile.objects.values("location").annotate(count=Count("id")).order_by("-count")[:10]
 
     context["total_brands"] = FastFoodBrand.objects.count()
-    context["brands"]       = FastFoodBrand.objects.all()
-
-    context["total_reviews"]   = Review.objects.count()
-    context["avg_review_score"] = Review.objects.aggregate(avg=Avg("overall_weighted_score"))["avg"]
-    context["reviews"]         = Review.objects.select_related("brand", "customer")[:100]
-
-    engagement = EngagementMetric.objects.select_related("customer")
-    context["engagement_records"]  = engagement.count()
-    context["total_page_views"]    = engagement.aggregate(total=Sum("page_views"))["total"]
-    context["total_clicks"]        = engagement.aggregate(total=Sum("clicks"))["total"]
-    context["avg_loyalty_index"]   = engagement.aggregate(avg=Avg("loyalty_index"))["avg"]
-
-    events = [{"title": f"{e.customer.full_name} Engagement", "start": e.recorded_month.strftime("%Y-%m-%d")} for e in engagement]
-    context["calendar_events"] = json.dumps(events)
-
-    inventory = InventoryItem.objects.all()
-    context["inventory_items"]  = inventory
-    context["inventory_count"]  = inventory.count()
-    context["low_stock_items"]  = inventory.filter(quantity_in_stock__lte=5).count()
-    inv_by_cat = inventory.values("category").annotate(count=Count("id"))
+
+    reviews = kpis["reviews"]
+    context["total_reviews"]   = reviews["total"]
+    context["avg_review_score"] = reviews["avg_weighted_score"]
+
+    engagement_totals = kpis["engagement"]
+    context["engagement_records"]  = engagement_totals["total"]
+    context["total_page_views"]    = engagement_totals["total_page_views"]
+    context["total_clicks"]        = engagement_totals["total_clicks"]
+    context["avg_loyalty_index"]   = engagement_totals["avg_loyalty_index"]
+
+    stock = kpis["inventory"]
+    context["inventory_count"]  = stock["total"]
+    context["low_stock_items"]  = stock["low_stock"]
+    inv_by_cat = InventoryItem.objects.values("category").annotate(count=Count("id"))
     context["inventory_chart_labels"] = json.dumps([i["category"] for i in inv_by_cat])
     context["inventory_chart_values"] = json.dumps([i["count"] for i in inv_by_cat])
 
-    deliveries = Delivery.objects.select_related("supplier")
-    context["deliveries"]       = deliveries
-    context["total_deliveries"] = deliveries.count()
-    delivery_chart = deliveries.values("delivery_status").annotate(count=Count("id"))
+    context["total_deliveries"] = kpis["deliveries"]["total"]
+    delivery_chart = Delivery.objects.values("delivery_status").annotate(count=Count("id"))
     context["delivery_labels"] = json.dumps([d["delivery_status"] for d in delivery_chart])
     context["delivery_values"] = json.dumps([d["count"] for d in delivery_chart])
 
-    complaints = Complaint.objects.select_related("supplier")
-    context["complaints"]       = complaints
-    context["total_complaints"] = complaints.count()
+    context["total_complaints"] = kpis["complaints"]["total"]
 
-    trends = MarketTrend.objects.all()
-    context["trends"]        = trends
-    context["market_trends"] = trends.count()
+    context["market_trends"] = kpis["market"]["total"]
     trend_chart = MarketTrend.objects.values("trend_title").annotate(count=Count("id"))
     context["trend_labels"] = json.dumps([t["trend_title"] for t in trend_chart])
     context["trend_values"] = json.dumps([t["count"] for t in trend_chart])
 
-    indicators = MarketIndicator.objects.all()
-    context["market_indicators"] = indicators
-    context["indicator_count"]   = indicators.count()
+    context["indicator_count"]   = MarketIndicator.objects.count()
     ind_chart = MarketIndicator.objects.values("indicator_name").annotate(count=Count("id"))
     context["indicator_labels"] = json.dumps([i["indicator_name"] for i in ind_chart])
     context["indicator_values"] = json.dumps([i["count"] for i in ind_chart])
 
-    competitors = CompetitorMarketData.objects.all()
-    context["competitors"]      = competitors
-    context["competitor_count"] = competitors.count()
+    context["competitor_count"] = CompetitorMarketData.objects.count()
+    context["decision_count"]   = DecisionRecommendation.objects.count()
 
-    decisions = DecisionRecommendation.objects.all()
-    context["decision_reports"] = decisions
-    context["decision_count"]   = decisions.count()
+    # Table panels are fetched lazily from dashboard_panel
+    context["panel_page_size"] = DEFAULT_PAGE_SIZE
 
     return render(request, "index.html", context)
 
 
+def dashboard_panel(request, panel):
+    """AJAX endpoint — one keyset-paginated page of a dashboard table."""
+    spec = PANELS.get(panel)
+    if spec is None:
+        return JsonResponse({"error": f"Unknown panel '{panel}'"}, status=404)
+    try:
+        limit = int(request.GET.get("limit") or DEFAULT_PAGE_SIZE)
+        page = spec.page(cursor=request.GET.get("cursor"), limit=limit)
+    except (ValueError, InvalidCursor):
+        return JsonResponse({"error": "Invalid cursor or limit"}, status=400)
+    return JsonResponse(page)
+
+
+# ─────────────────────────────────────────────
+# ENGAGEMENT CALENDAR FEED
+# ─────────────────────────────────────────────
+
+CALENDAR_MAX_DAYS = 366
+
+
+def _calendar_window(request):
+    """[start, end) dates from FullCalendar's ?start=&end= (ISO, time part ignored)."""
+    start = parse_date((request.GET.get("start") or "")[:10])
+    end   = parse_date((request.GET.get("end") or "")[:10])
+    if start is None:
+        start = timezone.localdate().replace(day=1)
+    if end is None or end <= start:
+        end = start + timedelta(days=31)
+    return start, min(end, start + timedelta(days=CALENDAR_MAX_DAYS))
+
+
+def _calendar_days(request):
+    """(day, count) rows in the window, counted in SQL — one query, memoized per request."""
+    if not hasattr(request, "_calendar_days"):
+        start, end = _calendar_window(request)
+        request._calendar_days = list(
+            EngagementMetric.objects
+            .filter(recorded_month__gte=start, recorded_month__lt=end)
+            .values("recorded_month")
+            .annotate(count=Count("id"))
+            .order_by("recorded_month")
+            .values_list("recorded_month", "count")
+        )
+    return request._calendar_days
+
+
+def _calendar_etag(request):
+    # Hash of the feed itself, so edited rows change it as well as new ones
+    start, end = _calendar_window(request)
+    days = ",".join(f"{day}={count}" for day, count in _calendar_days(request))
+    return hashlib.md5(f"{start}:{end}:{days}".encode()).hexdigest()
+
+
+@condition(etag_func=_calendar_etag)
+def engagement_calendar(request):
+    """Streams one FullCalendar event per day in the window (at most CALENDAR_MAX_DAYS)."""
+    def stream():
+        yield "["
+        for i, (day, count) in enumerate(_calendar_days(request)):
+            event = {
+                "title": f"{count} Engagement{'s' if count != 1 else ''}",
+                "start": day.isoformat(), "allDay": True,
+            }
+            yield ("," if i else "") + json.dumps(event)
+        yield "]"
+
+    return StreamingHttpResponse(stream(), content_type="application/json")
+
+
 def home_view(request):
     return render(request, "home.html")
 
@@ -244,18 +282,18 @@ def home_view(request):
 # ─────────────────────────────────────────────
 
 def supplierdashboard(request):
-    total_suppliers  = Supplier.objects.count()
-    total_deliveries = Delivery.objects.count()
-    total_complaints = Complaint.objects.count()
-
-    avg_score_data = SupplierPerformanceScore.objects.aggregate(Avg("final_score"))
-    avg_score = round(avg_score_data["final_score__avg"] or 0, 2)
+    kpis = get_kpis("suppliers", "deliveries", "complaints", "performance")
+    total_suppliers  = kpis["suppliers"]["total"]
+    total_deliveries = kpis["deliveries"]["total"]
+    total_complaints = kpis["complaints"]["total"]
+    avg_score = round(kpis["performance"]["avg_final_score"] or 0, 2)
 
     supplier_scores = SupplierPerformanceScore.objects.select_related("supplier").order_by("-final_score")
 
     # FIX: safe fallback when no scores exist
-    best_supplier   = supplier_scores.first().supplier.name if supplier_scores.exists() else "N/A"
-    risky_qs        = SupplierPerformanceScore.objects.order_by("-risk_index").first()
+    best_qs         = supplier_scores.first()
+    best_supplier   = best_qs.supplier.name if best_qs else "N/A"
+    risky_qs        = SupplierPerformanceScore.objects.select_related("supplier").order_by("-risk_index").first()
     risky_supplier  = risky_qs.supplier.name if risky_qs else "N/A"
 
     complaint_supplier_data = (
@@ -280,6 +318,7 @@ def supplierdashboard(request):
         "reviews":          SupplierReview.objects.all(),
         "complaints":       Complaint.objects.all(),
         "complaint_supplier": complaint_supplier,
+        "lead_times":       lead_time_summary(),
     }
     return render(request, "supplierdashboard.html", context)
 
@@ -321,29 +360,28 @@ def customerdashboard(request):
 def inventory(request):
     inventory  = InventoryItem.objects.select_related("supplier")
     deliveries = Delivery.objects.select_related("supplier")
-
-    inventory_value = inventory.aggregate(
-        total=Sum(ExpressionWrapper(F("quantity_in_stock") * F("unit_cost"), output_field=DecimalField()))
-    )["total"] or 0
+    kpis       = get_kpis("inventory", "deliveries")
+    stock      = kpis["inventory"]
+    delivered  = kpis["deliveries"]
 
     top_suppliers = deliveries.values("supplier__name").annotate(deliveries_count=Count("id")).order_by("-deliveries_count")[:5]
 
     context = {
         "inventory": inventory, "deliveries": deliveries,
-        "total_products":    inventory.count(),
-        "total_stock":       inventory.aggregate(Sum("quantity_in_stock"))["quantity_in_stock__sum"] or 0,
-        "low_stock_items":   inventory.filter(quantity_in_stock__lte=F("reorder_level")).count(),
-        "active_products":   inventory.filter(is_active=True).count(),
-        "inactive_products": inventory.filter(is_active=False).count(),
-        "inventory_value":   inventory_value,
-        "avg_selling_price": inventory.aggregate(Avg("selling_price"))["selling_price__avg"] or 0,
-        "total_deliveries":      deliveries.count(),
-        "on_time_deliveries":    deliveries.filter(delivery_status="ON_TIME").count(),
-        "late_deliveries":       deliveries.filter(delivery_status="LATE").count(),
-        "early_deliveries":      deliveries.filter(delivery_status="EARLY").count(),
-        "damaged_goods":         deliveries.filter(condition_status="DAMAGED").count(),
-        "partial_deliveries":    deliveries.filter(condition_status="PARTIAL").count(),
-        "documentation_issues":  deliveries.filter(documentation_complete=False).count(),
+        "total_products":    stock["total"],
+        "total_stock":       stock["total_stock"],
+        "low_stock_items":   stock["low_stock"],
+        "active_products":   stock["active"],
+        "inactive_products": stock["inactive"],
+        "inventory_value":   stock["inventory_value"],
+        "avg_selling_price": stock["avg_selling_price"] or 0,
+        "total_deliveries":      delivered["total"],
+        "on_time_deliveries":    delivered["on_time"],
+        "late_deliveries":       delivered["late"],
+        "early_deliveries":      delivered["early"],
+        "damaged_goods":         delivered["damaged"],
+        "partial_deliveries":    delivered["partial"],
+        "documentation_issues":  delivered["documentation_issues"],
         "top_suppliers": top_suppliers,
     }
     return render(request, "inventory.html", context)
@@ -380,87 +418,88 @@ def customer_review_view(request):
             time_spent  = (timezone.now() - start_time).total_seconds()
             clicks      = 1
 
-            customer = CustomerProfile.objects.create(
-                full_name        = request.POST.get("full_name"),
-                age_range        = request.POST.get("age_range"),
-                gender           = request.POST.get("gender"),
-                location         = request.POST.get("location"),
-                employment_status   = request.POST.get("employment_status"),
-                eating_out_frequency = request.POST.get("eating_out_frequency"),
-                preferred_brand  = request.POST.get("preferred_brand"),
-            )
-
-            brand, _ = FastFoodBrand.objects.get_or_create(
-                name=request.POST.get("restaurant_name"),
-                branch=request.POST.get("branch"),
-            )
-
-            review = Review.objects.create(
-                customer=customer, brand=brand,
-                taste=int(request.POST.get("taste") or 0),
-                freshness=int(request.POST.get("freshness") or 0),
-                portion_size=int(request.POST.get("portion_size") or 0),
-                presentation=int(request.POST.get("presentation") or 0),
-                menu_variety=int(request.POST.get("menu_variety") or 0),
-                food_value=int(request.POST.get("food_value") or 0),
-                staff_friendliness=int(request.POST.get("staff_friendliness") or 0),
-                professionalism=int(request.POST.get("professionalism") or 0),
-                order_accuracy=int(request.POST.get("order_accuracy") or 0),
-                waiting_time=int(request.POST.get("waiting_time") or 0),
-                problem_resolution=int(request.POST.get("problem_resolution") or 0),
-                cleanliness=int(request.POST.get("cleanliness") or 0),
-                ambience=int(request.POST.get("ambience") or 0),
-                seating=int(request.POST.get("seating") or 0),
-                hygiene=int(request.POST.get("hygiene") or 0),
-                affordability=int(request.POST.get("affordability") or 0),
-                pricing_fairness=int(request.POST.get("pricing_fairness") or 0),
-                promotions=int(request.POST.get("promotions") or 0),
-                brand_reputation=int(request.POST.get("brand_reputation") or 0),
-                food_trust=int(request.POST.get("food_trust") or 0),
-                nps_score=int(request.POST.get("nps_score") or 0),
-                vs_chickeninn=request.POST.get("vs_chickeninn"),
-                vs_kfc=request.POST.get("vs_kfc"),
-                vs_galitos=request.POST.get("vs_galitos"),
-                full_experience=request.POST.get("full_experience"),
-                improvement_suggestions=request.POST.get("improvement_suggestions"),
-            )
-
-            vader_score, bert_score = analyze_sentiment(review.full_experience or "")
-            final_sentiment = (vader_score + bert_score) / 2
-            sentiment_label = "Positive" if final_sentiment >= 0 else "Negative"
-
-            SentimentAnalysis.objects.create(
-                review=review,
-                vader_score=vader_score, bert_score=bert_score,
-                final_sentiment_score=final_sentiment, sentiment_label=sentiment_label,
-            )
-
-            page_views = request.session.get("page_views", 1)
-            engagement_score = (page_views * 0.2) + (clicks * 0.3) + (time_spent * 0.001)
-            loyalty_index    = (review.nps_score * 0.6) + (engagement_score * 0.4)
-
-            EngagementMetric.objects.create(
-                customer=customer, review=review,
-                page_views=page_views, clicks=clicks,
-                messages_sent=0, support_tickets=0,
-                engagement_score=engagement_score, loyalty_index=loyalty_index,
-            )
-
-            # ── EMAIL NOTIFICATION ──────────────────────────────────────
-            admin_email = getattr(settings, "ADMIN_NOTIFICATION_EMAIL", settings.DEFAULT_FROM_EMAIL)
-            send_html_email(
-                subject=f"New Customer Review — {brand.name}",
-                template_name="customeremail.html",
-                context={
-                    "review":    review,
-                    "customer":  customer,
-                    "brand":     brand,
-                    "sentiment": sentiment_label,
-                    "score":     round(final_sentiment, 3),
-                    "timestamp": timezone.now(),
-                },
-                recipient_list=[admin_email],
-            )
+            with transaction.atomic():
+                customer = CustomerProfile.objects.create(
+                    full_name        = request.POST.get("full_name"),
+                    age_range        = request.POST.get("age_range"),
+                    gender           = request.POST.get("gender"),
+                    location         = request.POST.get("location"),
+                    employment_status   = request.POST.get("employment_status"),
+                    eating_out_frequency = request.POST.get("eating_out_frequency"),
+                    preferred_brand  = request.POST.get("preferred_brand"),
+                )
+
+                brand, _ = FastFoodBrand.objects.get_or_create(
+                    name=request.POST.get("restaurant_name"),
+                    branch=request.POST.get("branch"),
+                )
+
+                review = Review.objects.create(
+                    customer=customer, brand=brand,
+                    taste=int(request.POST.get("taste") or 0),
+                    freshness=int(request.POST.get("freshness") or 0),
+                    portion_size=int(request.POST.get("portion_size") or 0),
+                    presentation=int(request.POST.get("presentation") or 0),
+                    menu_variety=int(request.POST.get("menu_variety") or 0),
+                    food_value=int(request.POST.get("food_value") or 0),
+                    staff_friendliness=int(request.POST.get("staff_friendliness") or 0),
+                    professionalism=int(request.POST.get("professionalism") or 0),
+                    order_accuracy=int(request.POST.get("order_accuracy") or 0),
+                    waiting_time=int(request.POST.get("waiting_time") or 0),
+                    problem_resolution=int(request.POST.get("problem_resolution") or 0),
+                    cleanliness=int(request.POST.get("cleanliness") or 0),
+                    ambience=int(request.POST.get("ambience") or 0),
+                    seating=int(request.POST.get("seating") or 0),
+                    hygiene=int(request.POST.get("hygiene") or 0),
+                    affordability=int(request.POST.get("affordability") or 0),
+                    pricing_fairness=int(request.POST.get("pricing_fairness") or 0),
+                    promotions=int(request.POST.get("promotions") or 0),
+                    brand_reputation=int(request.POST.get("brand_reputation") or 0),
+                    food_trust=int(request.POST.get("food_trust") or 0),
+                    nps_score=int(request.POST.get("nps_score") or 0),
+                    vs_chickeninn=request.POST.get("vs_chickeninn"),
+                    vs_kfc=request.POST.get("vs_kfc"),
+                    vs_galitos=request.POST.get("vs_galitos"),
+                    full_experience=request.POST.get("full_experience"),
+                    improvement_suggestions=request.POST.get("improvement_suggestions"),
+                )
+
+                vader_score, bert_score = analyze_sentiment(review.full_experience or "")
+                final_sentiment = (vader_score + bert_score) / 2
+                sentiment_label = "Positive" if final_sentiment >= 0 else "Negative"
+
+                SentimentAnalysis.objects.create(
+                    review=review,
+                    vader_score=vader_score, bert_score=bert_score,
+                    final_sentiment_score=final_sentiment, sentiment_label=sentiment_label,
+                )
+
+                page_views = request.session.get("page_views", 1)
+                engagement_score = (page_views * 0.2) + (clicks * 0.3) + (time_spent * 0.001)
+                loyalty_index    = (review.nps_score * 0.6) + (engagement_score * 0.4)
+
+                EngagementMetric.objects.create(
+                    customer=customer, review=review,
+                    page_views=page_views, clicks=clicks,
+                    messages_sent=0, support_tickets=0,
+                    engagement_score=engagement_score, loyalty_index=loyalty_index,
+                )
+
+                # ── EMAIL NOTIFICATION ──────────────────────────────────────
+                admin_email = getattr(settings, "ADMIN_NOTIFICATION_EMAIL", settings.DEFAULT_FROM_EMAIL)
+                send_html_email(
+                    subject=f"New Customer Review — {brand.name}",
+                    template_name="customeremail.html",
+                    context={
+                        "review":    review,
+                        "customer":  customer,
+                        "brand":     brand,
+                        "sentiment": sentiment_label,
+                        "score":     round(final_sentiment, 3),
+                        "timestamp": timezone.now(),
+                    },
+                    recipient_list=[admin_email],
+                )
 
             request.session.flush()
             messages.success(request, "Thank you! Your review has been submitted successfully.")
@@ -495,12 +534,26 @@ def supplier_register(request):
             return redirect("register")
 
         try:
-            supplier = Supplier.objects.create(
-                name=name, company_name=company_name,
-                supplier_code=supplier_code, contact_person=contact_person,
-                phone=phone, email=email, location=location,
-                is_active=is_active, created_at=timezone.now(),
-            )
+            with transaction.atomic():
+                supplier = Supplier.objects.create(
+                    name=name, company_name=company_name,
+                    supplier_code=supplier_code, contact_person=contact_person,
+                    phone=phone, email=email, location=location,
+                    is_active=is_active, created_at=timezone.now(),
+                )
+
+                # ── EMAIL NOTIFICATION ──────────────────────────────────────
+                admin_email = getattr(settings, "ADMIN_NOTIFICATION_EMAIL", settings.DEFAULT_FROM_EMAIL)
+                recipients  = [admin_email]
+                if supplier.email:
+                    recipients.append(supplier.email)
+
+                send_html_email(
+                    subject=f"New Supplier Registered — {supplier.name}",
+                    template_name="email.html",
+                    context={"supplier": supplier, "timestamp": timezone.now()},
+                    recipient_list=recipients,
+                )
 
         except IntegrityError as e:
             error_msg = str(e).lower()
@@ -520,19 +573,6 @@ def supplier_register(request):
             messages.error(request, f"An unexpected error occurred: {e}")
             return redirect("register")
 
-        # ── EMAIL NOTIFICATION ──────────────────────────────────────
-        admin_email = getattr(settings, "ADMIN_NOTIFICATION_EMAIL", settings.DEFAULT_FROM_EMAIL)
-        recipients  = [admin_email]
-        if supplier.email:
-            recipients.append(supplier.email)
-
-        send_html_email(
-            subject=f"New Supplier Registered — {supplier.name}",
-            template_name="email.html",
-            context={"supplier": supplier, "timestamp": timezone.now()},
-            recipient_list=recipients,
-        )
-
         messages.success(request, f"Supplier {name} registered successfully!")
         return redirect("register")
 
@@ -562,6 +602,15 @@ def delivery_lookup(request):
         return JsonResponse({"found": False})
 
 
+def _whole_number(value):
+    """A non-negative whole number from a form value ("12" or "12.0"), or None."""
+    try:
+        number = float(value or 0)
+    except ValueError:
+        return None
+    return int(number) if number.is_integer() and number >= 0 else None
+
+
 def record_delivery(request):
     suppliers = Supplier.objects.filter(is_active=True)
 
@@ -572,8 +621,8 @@ def record_delivery(request):
         product_category   = request.POST.get("product_category")
         product_name       = request.POST.get("product_name")
         sku                = request.POST.get("sku")
-        quantity_ordered   = float(request.POST.get("quantity_ordered") or 0)
-        quantity_delivered = float(request.POST.get("quantity_delivered") or 0)
+        quantity_ordered   = _whole_number(request.POST.get("quantity_ordered"))
+        quantity_delivered = _whole_number(request.POST.get("quantity_delivered"))
         delivery_status    = request.POST.get("delivery_status")
         condition_status   = request.POST.get("condition_status")
         vehicle_registration = request.POST.get("vehicle_registration")
@@ -582,43 +631,45 @@ def record_delivery(request):
         actual_delivery_date   = request.POST.get("actual_delivery_date")
         delivery_comment   = request.POST.get("delivery_comment", "")
 
+        # The stock ledger counts whole units, as the Delivery row does
+        if quantity_ordered is None or quantity_delivered is None:
+            messages.error(request, "Quantities must be whole numbers of units.")
+            return redirect("delivery")
+
         supplier = Supplier.objects.get(id=supplier_id)
+        # Scored before the transaction so no row locks are held while VADER runs
+        vader, bert = analyze_sentiment(delivery_comment) if delivery_comment else (None, None)
+
+        # Delivery, stock movement, sentiment and score stats commit together
+        with transaction.atomic():
+            delivery = Delivery.objects.create(
+                supplier=supplier,
+                order_number=order_number, invoice_number=invoice_number,
+                product_category=product_category,
+                quantity_ordered=quantity_ordered, quantity_delivered=quantity_delivered,
+                delivery_status=delivery_status, condition_status=condition_status,
+                vehicle_registration=vehicle_registration, driver_name=driver_name,
+                expected_delivery_date=expected_delivery_date,
+                actual_delivery_date=actual_delivery_date,
+                created_at=timezone.now(),
+            )
 
-        delivery = Delivery.objects.create(
-            supplier=supplier,
-            order_number=order_number, invoice_number=invoice_number,
-            product_category=product_category,
-            quantity_ordered=quantity_ordered, quantity_delivered=quantity_delivered,
-            delivery_status=delivery_status, condition_status=condition_status,
-            vehicle_registration=vehicle_registration, driver_name=driver_name,
-            expected_delivery_date=expected_delivery_date,
-            actual_delivery_date=actual_delivery_date,
-            created_at=timezone.now(),
-        )
+            if sku and product_name:
+                receive(
+                    supplier.pk, sku, quantity_delivered, product_name, product_category,
+                    delivery=delivery,
+                )
 
-        if sku and product_name:
-            item, created = InventoryItem.objects.get_or_create(
-                supplier=supplier, sku=sku,
-                defaults={
-                    "name": product_name, "category": product_category,
-                    "quantity_in_stock": quantity_delivered, "unit_cost": 0,
-                    "selling_price": 0, "warehouse_location": "Default Warehouse",
-                    "last_restocked": timezone.now(),
-                },
-            )
-            if not created:
-                item.quantity_in_stock += quantity_delivered
-                item.last_restocked = timezone.now()
-                item.save()
-
-        if delivery_comment:
-            vader, bert = analyze_sentiment(delivery_comment)
-            SupplierSentiment.objects.create(
-                supplier=supplier, source_type="delivery", source_id=delivery.id,
-                text=delivery_comment, sentiment_label=vader, confidence_score=vader,
-            )
+            increments = [delivery_increments(delivery)]
+            if delivery_comment:
+                sentiment = SupplierSentiment.objects.create(
+                    supplier=supplier, source_type="delivery", source_id=delivery.id,
+                    text=delivery_comment, sentiment_label=vader, confidence_score=vader,
+                )
+                increments.append(sentiment_increments(sentiment))
+
+            record_event(supplier.pk, *increments)
 
-        SupplierPerformanceScore.objects.get_or_create(supplier=supplier)
         messages.success(request, f"Delivery for {supplier.name} recorded successfully!")
         return redirect("delivery")
 
@@ -644,50 +695,55 @@ def supplier_review(request):
         review_comment      = request.POST.get("review_comment", "")
 
         supplier = Supplier.objects.get(id=supplier_id)
+        # Scored before the transaction so no row locks are held while VADER runs
+        vader, bert = analyze_sentiment(review_comment) if review_comment else (None, None)
+
+        # Review, sentiment, score stats and the email commit together
+        with transaction.atomic():
+            review = SupplierReview.objects.create(
+                supplier=supplier,
+                communication_score=communication_score,
+                flexibility_score=flexibility_score,
+                documentation_score=documentation_score,
+                price_competitiveness_score=pricing_score,
+                review_comment=review_comment,
+                created_at=timezone.now(),
+            )
 
-        review = SupplierReview.objects.create(
-            supplier=supplier,
-            communication_score=communication_score,
-            flexibility_score=flexibility_score,
-            documentation_score=documentation_score,
-            price_competitiveness_score=pricing_score,
-            review_comment=review_comment,
-            created_at=timezone.now(),
-        )
+            increments = [review_increments(review)]
+            if review_comment:
+                sentiment = SupplierSentiment.objects.create(
+                    supplier=supplier, source_type="review", source_id=review.id,
+                    text=review_comment, sentiment_label=vader, confidence_score=vader,
+                )
+                increments.append(sentiment_increments(sentiment))
 
-        if review_comment:
-            vader, bert = analyze_sentiment(review_comment)
-            SupplierSentiment.objects.create(
-                supplier=supplier, source_type="review", source_id=review.id,
-                text=review_comment, sentiment_label=vader, confidence_score=vader,
-            )
+            record_event(supplier.pk, *increments)
 
-        SupplierPerformanceScore.objects.get_or_create(supplier=supplier)
-
-        # ── EMAIL NOTIFICATION ──────────────────────────────────────
-        admin_email = getattr(settings, "ADMIN_NOTIFICATION_EMAIL", settings.DEFAULT_FROM_EMAIL)
-        recipients  = [admin_email]
-        if supplier.email:
-            recipients.append(supplier.email)
-
-        send_html_email(
-            subject=f"Supplier Review Submitted — {supplier.name}",
-            template_name="supplieremail.html",
-            context={
-                "supplier":       supplier,
-                "review":         review,
-                "review_comment": review_comment,
-                "timestamp":      timezone.now(),
-                # pass as list of (label, value) tuples for easy template rendering
-                "scores": [
-                    ("Communication",        communication_score),
-                    ("Flexibility",          flexibility_score),
-                    ("Documentation",        documentation_score),
-                    ("Price Competitiveness", pricing_score),
-                ],
-            },
-            recipient_list=recipients,
-        )
+            # ── EMAIL NOTIFICATION ──────────────────────────────────────
+            admin_email = getattr(settings, "ADMIN_NOTIFICATION_EMAIL", settings.DEFAULT_FROM_EMAIL)
+            recipients  = [admin_email]
+            if supplier.email:
+                recipients.append(supplier.email)
+
+            send_html_email(
+                subject=f"Supplier Review Submitted — {supplier.name}",
+                template_name="supplieremail.html",
+                context={
+                    "supplier":       supplier,
+                    "review":         review,
+                    "review_comment": review_comment,
+                    "timestamp":      timezone.now(),
+                    # pass as list of (label, value) tuples for easy template rendering
+                    "scores": [
+                        ("Communication",        communication_score),
+                        ("Flexibility",          flexibility_score),
+                        ("Documentation",        documentation_score),
+                        ("Price Competitiveness", pricing_score),
+                    ],
+                },
+                recipient_list=recipients,
+            )
 
         messages.success(request, f"Review for {supplier.name} recorded successfully!")
         # FIX: correct URL name
@@ -710,39 +766,44 @@ def record_complaint(request):
         supplier_id = request.POST.get("supplier")
         description = request.POST.get("description", "")
         supplier    = Supplier.objects.get(id=supplier_id)
+        # Scored before the transaction so no row locks are held while VADER runs
+        vader, bert = analyze_sentiment(description) if description else (None, None)
+
+        # Complaint, sentiment, score stats and the email commit together
+        with transaction.atomic():
+            complaint = Complaint.objects.create(
+                supplier=supplier, description=description,
+                created_at=timezone.now(),
+            )
 
-        complaint = Complaint.objects.create(
-            supplier=supplier, description=description,
-            created_at=timezone.now(),
-        )
+            increments = [complaint_increments(complaint)]
+            if description:
+                final_score = min(vader, 0)   # ensure negative for complaints
+                sentiment = SupplierSentiment.objects.create(
+                    supplier=supplier, source_type="complaint", source_id=complaint.id,
+                    text=description, sentiment_label=vader, confidence_score=final_score,
+                )
+                increments.append(sentiment_increments(sentiment))
 
-        if description:
-            vader, bert = analyze_sentiment(description)
-            final_score = min(vader, 0)   # ensure negative for complaints
-            SupplierSentiment.objects.create(
-                supplier=supplier, source_type="complaint", source_id=complaint.id,
-                text=description, sentiment_label=vader, confidence_score=final_score,
-            )
+            record_event(supplier.pk, *increments)
 
-        SupplierPerformanceScore.objects.get_or_create(supplier=supplier)
-
-        # ── EMAIL NOTIFICATION ──────────────────────────────────────
-        admin_email = getattr(settings, "ADMIN_NOTIFICATION_EMAIL", settings.DEFAULT_FROM_EMAIL)
-        recipients  = [admin_email]
-        if supplier.email:
-            recipients.append(supplier.email)
-
-        send_html_email(
-            subject=f"⚠️ Supplier Complaint Filed — {supplier.name}",
-            template_name="complaintemail.html",
-            context={
-                "supplier":    supplier,
-                "complaint":   complaint,
-                "description": description,
-                "timestamp":   timezone.now(),
-            },
-            recipient_list=recipients,
-        )
+            # ── EMAIL NOTIFICATION ──────────────────────────────────────
+            admin_email = getattr(settings, "ADMIN_NOTIFICATION_EMAIL", settings.DEFAULT_FROM_EMAIL)
+            recipients  = [admin_email]
+            if supplier.email:
+                recipients.append(supplier.email)
+
+            send_html_email(
+                subject=f"⚠️ Supplier Complaint Filed — {supplier.name}",
+                template_name="complaintemail.html",
+                context={
+                    "supplier":    supplier,
+                    "complaint":   complaint,
+                    "description": description,
+                    "timestamp":   timezone.now(),
+                },
+                recipient_list=recipients,
+            )
 
         messages.success(request, f"Complaint for {supplier.name} recorded successfully!")
         # FIX: correct URL name
@@ -789,8 +850,62 @@ def store_inventory(request):
     return render(request, "store_inventory.html", {"inventory": InventoryItem.objects.all()})
 
 def performance_benchmark(request):
-    benchmarks = Benchmark.objects.order_by("-benchmark_score")
-    return render(request, "benchmark.html", {"benchmarks": benchmarks})
+    benchmarks = Benchmark.objects.select_related("supplier").order_by("-benchmark_score")
+    period = request.GET.get("period")
+    if period:
+        benchmarks = benchmarks.filter(evaluation_period=period)
+    return render(request, "benchmark.html", {"benchmarks": benchmarks, "period": period})
+
+@login_required
+def supplier_score_what_if(request):
+    """
+    AJAX endpoint — re-rank suppliers under candidate weights without
+    saving. `?profile=<name>` starts from a stored ScoreWeightProfile; any
+    weight key (e.g. `?timeliness=0.4`) overrides it and must be a finite,
+    non-negative number; `limit` caps the rows.
+    """
+    weights = {}
+    profile_name = request.GET.get("profile")
+    if profile_name:
+        profile = ScoreWeightProfile.objects.filter(name=profile_name).first()
+        if profile is None:
+            return JsonResponse({"error": f"Unknown weight profile '{profile_name}'"}, status=404)
+        weights = profile.resolved_weights()
+    try:
+        for key in SupplierPerformanceScore.DEFAULT_WEIGHTS:
+            if key in request.GET:
+                weights[key] = float(request.GET[key])
+                if not math.isfinite(weights[key]) or weights[key] < 0:
+                    raise ValueError(key)
+        limit = int(request.GET["limit"]) if request.GET.get("limit") else None
+    except ValueError:
+        return JsonResponse({"error": "Weights must be finite non-negative numbers and limit a whole number"}, status=400)
+    return JsonResponse(what_if(weights, limit=limit))
+
+# Rejected rows echoed back to the uploader; the rest are only counted
+IMPORT_REJECTS_SHOWN = 100
+
+@login_required
+@require_POST
+def import_csv_upload(request):
+    """
+    AJAX endpoint — bulk import an uploaded orders or deliveries CSV
+    (`kind` and `file` form fields). Returns the import statistics and the
+    first rejected rows with their errors.
+    """
+    upload = request.FILES.get("file")
+    if upload is None:
+        return JsonResponse({"error": "No file uploaded"}, status=400)
+    rejects = io.StringIO()
+    try:
+        stats = import_csv(
+            request.POST.get("kind", ""), io.TextIOWrapper(upload.file, encoding="utf-8-sig"), rejects=rejects,
+        )
+    except (CsvImportError, ValueError) as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    rejects.seek(0)
+    stats["rejects"] = [row for _, row in zip(range(IMPORT_REJECTS_SHOWN), csv.DictReader(rejects))]
+    return JsonResponse(stats)
 
 def market_industry_trends(request):
     trends = MarketTrend.objects.order_by("-created_at")
@@ -811,87 +926,42 @@ def extract_json(text):
         return None
 
 
-def call_openrouter(system_prompt: str, user_prompt: str, max_tokens: int = 900) -> str:
-    if not OPENROUTER_API_KEY:
-        return ""
-    try:
-        resp = requests.post(
-            OPENROUTER_URL,
-            headers={
-                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                "Content-Type":  "application/json",
-                "HTTP-Referer":  "https://kpifastfood.app",
-                "X-Title":       "KPI Fastfood Analytics",
-            },
-            json={
-                "model": OPENROUTER_MODEL, "max_tokens": max_tokens,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user",   "content": user_prompt},
-                ],
-            },
-            timeout=30,
-        )
-        resp.raise_for_status()
-        return resp.json()["choices"][0]["message"]["content"].strip()
-    except Exception as e:
-        logger.error("OPENROUTER ERROR: %s", e)
-        return ""
-
-
 def build_data_snapshot() -> dict:
-    perf_scores   = SupplierPerformanceScore.objects.select_related("supplier")
-    total_deliveries = Delivery.objects.count()
-    on_time_count    = Delivery.objects.filter(delivery_status="ON_TIME").count()
+    kpis = get_kpis("suppliers", "performance", "deliveries", "complaints", "reviews", "inventory")
+    performance = kpis["performance"]
+    deliveries  = kpis["deliveries"]
+    complaints  = kpis["complaints"]
+    reviews     = kpis["reviews"]
 
     return {
-        "supplier_total":    Supplier.objects.filter(is_active=True).count(),
-        "avg_final_score":   round(perf_scores.aggregate(a=Avg("final_score"))["a"] or 0, 1),
-        "avg_risk_index":    round(perf_scores.aggregate(a=Avg("risk_index"))["a"] or 0, 1),
-        "avg_trust_index":   round(perf_scores.aggregate(a=Avg("trust_index"))["a"] or 0, 1),
-        "high_risk_suppliers": perf_scores.filter(risk_index__gte=70).count(),
-        "rating_distribution": {cat: perf_scores.filter(rating_category=cat).count() for cat in ("Excellent", "Good", "Average", "Poor")},
-        "total_deliveries":  total_deliveries,
-        "on_time_rate":      round((on_time_count / total_deliveries * 100) if total_deliveries else 0, 1),
-        "late_deliveries":   Delivery.objects.filter(delivery_status="LATE").count(),
-        "damaged_deliveries": Delivery.objects.filter(condition_status="DAMAGED").count(),
-        "total_complaints":  Complaint.objects.count(),
-        "unresolved_complaints": Complaint.objects.filter(resolved=False).count(),
-        "high_severity_complaints": Complaint.objects.filter(severity_level__gte=4).count(),
-        "customer_review_count": Review.objects.count(),
-        "avg_weighted_customer_score": round(Review.objects.aggregate(a=Avg("overall_weighted_score"))["a"] or 0, 1),
-        "avg_nps": round(Review.objects.aggregate(a=Avg("nps_score"))["a"] or 0, 1),
-        "low_stock_items": InventoryItem.objects.filter(quantity_in_stock__lte=F("reorder_level"), is_active=True).count(),
+        "supplier_total":    kpis["suppliers"]["active"],
+        "avg_final_score":   round(performance["avg_final_score"] or 0, 1),
+        "avg_risk_index":    round(performance["avg_risk_index"] or 0, 1),
+        "avg_trust_index":   round(performance["avg_trust_index"] or 0, 1),
+        "high_risk_suppliers": performance["high_risk"],
+        "rating_distribution": {
+            "Excellent": performance["excellent"], "Good": performance["good"],
+            "Average": performance["average"], "Poor": performance["poor"],
+        },
+        "total_deliveries":  deliveries["total"],
+        "on_time_rate":      round(deliveries["on_time_rate"], 1),
+        "late_deliveries":   deliveries["late"],
+        "damaged_deliveries": deliveries["damaged"],
+        "total_complaints":  complaints["total"],
+        "unresolved_complaints": complaints["unresolved"],
+        "high_severity_complaints": complaints["high_severity"],
+        "customer_review_count": reviews["total"],
+        "avg_weighted_customer_score": round(reviews["avg_weighted_score"] or 0, 1),
+        "avg_nps": round(reviews["avg_nps"] or 0, 1),
+        "low_stock_items": kpis["inventory"]["low_stock_active"],
         "top_suppliers_by_reviews": list(Supplier.objects.annotate(rc=Count("reviews")).order_by("-rc")[:5].values("name", "rc")),
     }
 
 
-def get_ai_insights(snapshot: dict) -> dict:
-    SYSTEM = (
-        "You are an expert supply-chain and restaurant operations analyst.\n"
-        "Return ONLY valid JSON. No markdown, no explanations, no code blocks.\n\n"
-        'Format EXACTLY: {"summary":"text","risks":["...","..."],"opportunities":["...","..."],"actions":["...","...","..."]}'
-    )
-    USER = f"Here is today's KPI snapshot:\n{json.dumps(snapshot, indent=2)}\n\nProvide a concise strategic analysis."
-    raw  = call_openrouter(SYSTEM, USER, max_tokens=700)
-
-    if not raw:
-        return {"summary": "", "risks": [], "opportunities": [], "actions": []}
-    try:
-        text = re.sub(r"^```json\s*|^```|```$", "", raw.strip())
-        match = re.search(r"\{.*\}", text, re.DOTALL)
-        if not match:
-            raise ValueError("No JSON found")
-        parsed = json.loads(match.group(0))
-        return {k: parsed.get(k, [] if k != "summary" else "") for k in ("summary", "risks", "opportunities", "actions")}
-    except Exception as e:
-        logger.error("AI parse error: %s", e)
-        return {"summary": "AI response could not be structured properly.", "risks": [], "opportunities": [], "actions": []}
-
-
 def report_and_recommendations(request):
     snapshot = build_data_snapshot()
-    ai       = get_ai_insights(snapshot)
+    latest, ai_stale = latest_insights(snapshot)
+    ai       = insights_from(latest)
 
     top_performers  = Supplier.objects.annotate(review_count=Count("reviews")).order_by("-review_count")[:5]
     decision_reports = DecisionRecommendation.objects.order_by("-created_at")[:12]
@@ -906,8 +976,9 @@ def report_and_recommendations(request):
         "ai_risks":            ai.get("risks", []),
         "ai_opportunities":    ai.get("opportunities", []),
         "ai_actions":          ai.get("actions", []),
-        "ai_available":        bool(OPENROUTER_API_KEY),
-        "generated_at":        timezone.now(),
+        "ai_available":        ai_available(),
+        "ai_stale":            ai_stale,
+        "generated_at":        latest.created_at if latest else None,
     }
     return render(request, "reports.html", context)
 
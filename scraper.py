@@ -1,5 +1,3 @@
-import feedparser
-from bs4 import BeautifulSoup
 from datetime import datetime
 import random
 import re
@@ -53,6 +53,17 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'app.middleware.VisitorLoggingMiddleware',
 ]
+# Visitor logging: "buffered" queues visits in-process and bulk-inserts them from
+# a background thread, "sync" writes one row per request, "off" disables it.
+VISITOR_LOG_MODE = "buffered"
+VISITOR_LOG_BUFFER = {
+    "max_size": 10000,       # rows held in memory before the overflow policy applies
+    "batch_size": 500,       # flush once this many rows are waiting...
+    "flush_interval": 2.0,   # ...or after this many seconds
+    "overflow": "drop",      # "drop" or "block"
+    "block_timeout": 0.05,   # seconds a request may wait for room when blocking
+}
+
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 ROOT_URLCONF = 'supplyinsights.urls'
 
@@ -143,6 +154,28 @@ OPENROUTER_API_KEY = "sk-or-v1-d5ae07ff8de7b9b2f1adf460d59a0c21580733b70ef0784d6
 OPENROUTER_URL     = "https://openrouter.ai/api/v1/chat/completions"
 OPENROUTER_MODEL   = "openai/gpt-5.2"
 
+# Seconds before a failed background AI insight generation is retried
+AI_INSIGHTS_RETRY_AFTER = 300
+
+# Where completions come from: "openrouter" (default), "http" with a "url"
+# for any OpenAI-compatible endpoint such as `manage.py llm_stub_server`,
+# or "fixture" with a "path" to canned replies and/or a default "reply".
+LLM_BACKEND = {"backend": "openrouter"}
+LLM_CACHE = {
+    "enabled": True,
+    "ttl": 86400,          # seconds a cached completion stays valid
+    "max_entries": 500,    # least recently used rows beyond this are evicted
+}
+LLM_HTTP = {
+    "connect_timeout": 5,     # seconds
+    "read_timeout": 30,       # seconds; read timeouts are never retried
+    "retries": 2,             # connection errors and 429/5xx, with exponential backoff
+    "backoff": 0.5,
+    "pool_size": 10,          # keep-alive connections per host
+    "failure_threshold": 5,   # consecutive failures before the circuit opens
+    "reset_timeout": 30,      # seconds before a trial call is let through
+}
+
 
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -152,4 +185,46 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = 'fastfoodkpisys@gmail.com'
 EMAIL_HOST_PASSWORD = 'vcab szrv cuvb bqlc'
 
-DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
\ No newline at end of file
+DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+# Transactional emails are queued in EmailOutbox and sent by
+# `python manage.py send_outbox` over one SMTP connection per run
+EMAIL_OUTBOX = {
+    "batch_size": 50,      # rows claimed per transaction
+    "max_attempts": 5,     # then the row is marked "failed"
+    "backoff": 60,         # seconds before the first retry, doubling each time
+    "max_backoff": 3600,
+    "claim_timeout": 600,  # seconds before rows claimed by a crashed worker are retried
+}
+
+# Complaint, delivery and low-stock notifications are coalesced into one
+# digest per recipient and kind every `window` seconds; complaints at or
+# above `urgent_severity` are emailed immediately
+NOTIFICATION_DIGEST = {
+    "enabled": True,
+    "window": 900,
+    "urgent_severity": 4,
+}
+
+# Sentiment scoring (app/services/sentiment.py)
+SENTIMENT_SERVICE = {
+    "cache_size": 10000,      # distinct normalized texts kept in the LRU cache
+    "workers": 1,             # >1 scores large batches in a process pool
+    "pool_threshold": 5000,   # uncached texts in a batch before the pool is used
+}
+
+# Optional local transformer for bert_score (CPU only, never downloads).
+# Point model_path at a saved sequence-classification model directory, e.g.
+# a copy of distilbert-base-uncased-finetuned-sst-2-english; leave it None
+# to keep VADER-only scoring.
+SENTIMENT_TRANSFORMER = {
+    "model_path": None,
+    "max_length": 256,     # tokens; longer texts are truncated
+    "batch_size": 32,
+    "threads": None,       # torch intra-op threads; None uses every core
+}
+
+# Heavy dependencies (VADER, the transformer, requests) load on first use.
+# True warms them in a background thread at start-up instead; web workers
+# can also call app.services.warmup.warm_up() from a post-fork hook.
+WARM_UP_ON_START = False